@@ -1,3 +1,6 @@
+import os
+
+
 class CommonWidgetSettings:
     """Common settings shared across all widgets"""
     class Sizes:
@@ -17,12 +20,22 @@ class ShortcutSettings:
     class File:
         OPEN = "Ctrl+O"
         SAVE = "Ctrl+S"
+        OPEN_PROJECT = "Ctrl+Shift+O"
+        SAVE_PROJECT = None
+        OPEN_FOLDER = None
     
     # Edit operations
     class Edit:
         UNDO = "Ctrl+Z"
         REDO = "Ctrl+Shift+Z"
         TOGGLE_SELECT = "Tab"
+        CANCEL = "Esc"
+
+    # View operations
+    class View:
+        ZOOM_IN = "Ctrl+="
+        ZOOM_OUT = "Ctrl+-"
+        RESET_ZOOM = "Ctrl+0"
 
     # Tool operations
     class Tools:
@@ -30,23 +43,33 @@ class ShortcutSettings:
         APPLY_MOSAIC = "Ctrl+M"
         APPLY_BLUR = "Ctrl+B"
         APPLY_CAMERA_EFFECT = None
+        APPLY_RECIPE = None
+        AUTO_REDACT = None
 
 class ButtonTextSettings:
     """Button text settings with optional shortcuts"""
     class File:
         OPEN = ("Open Image", ShortcutSettings.File.OPEN)
         SAVE = ("Save Image", ShortcutSettings.File.SAVE)
+        OPEN_PROJECT = ("Open as Project", ShortcutSettings.File.OPEN_PROJECT)
+        SAVE_PROJECT = ("Save Project", ShortcutSettings.File.SAVE_PROJECT)
+        OPEN_FOLDER = ("Open Folder", ShortcutSettings.File.OPEN_FOLDER)
     
     class Edit:
         UNDO = ("Undo", ShortcutSettings.Edit.UNDO)
         REDO = ("Redo", ShortcutSettings.Edit.REDO)
         TOGGLE_MODE = ("Toggle Selection Mode - Current: {}", ShortcutSettings.Edit.TOGGLE_SELECT)
+        CANCEL = ("Cancel", ShortcutSettings.Edit.CANCEL)
+        LOAD_SELECTIONS = ("Load Selections", None)
     
     class Tools:
         APPLY_TEXT = ("Add Text", ShortcutSettings.Tools.APPLY_TEXT)
         APPLY_MOSAIC = ("Apply Mosaic", ShortcutSettings.Tools.APPLY_MOSAIC)
         APPLY_BLUR = ("Apply Blur", ShortcutSettings.Tools.APPLY_BLUR)
         APPLY_CAMERA_EFFECT = ("Apply Camera Effect", ShortcutSettings.Tools.APPLY_CAMERA_EFFECT)
+        LOAD_RECIPE = ("Load Recipe", None)
+        APPLY_RECIPE = ("Apply Recipe", ShortcutSettings.Tools.APPLY_RECIPE)
+        AUTO_REDACT = ("Detect and Redact", ShortcutSettings.Tools.AUTO_REDACT)
 
 
 class TextWidgetSettings:
@@ -79,17 +102,32 @@ class TextWidgetSettings:
     }
     ANGLE_TICK_INTERVAL = 10
     ANGLE_CONTAINER_SIZE = (300, 70)
+    EFFECT_NAME = "Text"
 
 
 class MosaicWidgetSettings:
     """Settings for mosaic tool"""
+    # Slider steps of SIZE_MULTIPLIER px; block cost does not depend on its size
     MOSAIC_SIZE = {
         'MIN': 1,
-        'MAX': 10,
+        'MAX': 100,
         'DEFAULT': 20
     }
     SIZE_MULTIPLIER = 5
     SIZE_LABEL_TEXT = "Mosaic Size: {}"
+    HEIGHT_LABEL_TEXT = "Block Height: {}"
+    SQUARE_TEXT = "Square blocks"
+    EFFECT_NAME = "Mosaic"
+
+
+class RecipeWidgetSettings:
+    """Settings for recipe tool"""
+    OPEN_TITLE = "Load Recipe"
+    FILE_FILTER = "Recipes (*.json *.yaml *.yml)"
+    EMPTY_TEXT = "No recipe loaded"
+    STEP_TEXT = "{index}. {op}: {params}"
+    ERROR_TITLE = "Recipe Error"
+    EFFECT_NAME = "Recipe"
 
 
 class ImageSelectionWidgetSettings:
@@ -101,12 +139,81 @@ class ImageSelectionWidgetSettings:
             'RECT': "RECT",
             'LASSO': "LASSO"
         }
+        # Selections (with their rasterized masks) kept for polygons given as point lists
+        MASK_CACHE_SIZE = 16
+        # Lasso points within this many screen pixels of the simplified outline are dropped
+        LASSO_TOLERANCE = 1.0
+        LOAD_TITLE = "Load Selections"
+        FILE_FILTER = "Selections (*.json)"
+        ERROR_TITLE = "Selection Error"
+
+    class View:
+        # Side of the square tiles the image is cut into for display
+        TILE_SIZE = 256
+        # Tiles kept across all zoom levels before the least recent are dropped
+        TILE_CACHE_SIZE = 512
+        MIN_ZOOM = 1 / 64
+        MAX_ZOOM = 32
+        # Zoom factor per wheel notch or zoom shortcut
+        ZOOM_STEP = 1.25
+
+    class WorkingBuffer:
+        # Images with at least this many pixels are edited in a memory-mapped
+        # scratch file instead of in RAM; None turns the working buffer off
+        THRESHOLD_PIXELS = 100 * 1000 * 1000
+        # Directory for the scratch file, None for the system temp directory
+        SCRATCH_DIR = None
+        # Longest side of the downsampled overview shown for these images
+        OVERVIEW_SIDE = 4096
+        # Largest image opened at all, in pixels; checked instead of PIL's
+        # decompression bomb limit, see utils.working_buffer.open_image().
+        # None for no limit
+        MAX_PIXELS = 2 * 1000 * 1000 * 1000
+        # Formats that cannot be read strip by strip (PNG, JPEG, compressed
+        # TIFF) are decoded whole in RAM first; larger decodes are refused
+        MAX_DECODE_BYTES = 2 * 1024 * 1024 * 1024
+
+    class Preview:
+        # Delay after the last slider change before the preview is rendered
+        DEBOUNCE_MS = 150
+        # Largest proxy image the preview is rendered on
+        MAX_PIXELS = 512 * 512
+
+    class Progress:
+        FORMAT = "{}: %p%"
+        ERROR_TITLE = "Effect Failed"
+
+    class History:
+        # Undo/redo patches are dropped oldest-first beyond this size
+        BUDGET_BYTES = 512 * 1024 * 1024
+        # zlib level for stored patches, None to keep them uncompressed
+        COMPRESSION_LEVEL = 1
+
+    class Save:
+        # Encoder defaults, also the initial values of the save options dialog
+        JPEG_QUALITY = 90
+        JPEG_PROGRESSIVE = False
+        # zlib level 0-9; low levels encode much faster for slightly larger files
+        PNG_COMPRESS_LEVEL = 1
+        WEBP_QUALITY = 90
+        WEBP_LOSSLESS = False
+        # WebP effort 0-6, trading speed for size
+        WEBP_METHOD = 4
+        OPTIONS_TITLE = "Save Options"
+        QUALITY_LABEL = "Quality:"
+        PROGRESSIVE_LABEL = "Progressive"
+        COMPRESS_LEVEL_LABEL = "Compression level:"
+        LOSSLESS_LABEL = "Lossless"
+        SAVING_TEXT = "Saving {name}..."
+        SAVED_TEXT = "Saved {name} ({size:.2f} MB) in {seconds:.2f} s"
+        ERROR_TITLE = "Save Failed"
 
     class FileDialog:
         OPEN_TITLE = "Open Image"
+        OPEN_ERROR_TITLE = "Cannot Open Image"
         SAVE_TITLE = "Save Image"
-        IMAGE_FILTER = "Images (*.png *.jpg *.jpeg)"
-        SAVE_FILTER = "JPG Files (*.jpg *.jpeg);;PNG Files (*.png);;All Files (*)"
+        IMAGE_FILTER = "Images (*.png *.jpg *.jpeg *.webp)"
+        SAVE_FILTER = "JPG Files (*.jpg *.jpeg);;PNG Files (*.png);;WebP Files (*.webp);;All Files (*)"
 
 
 class Settings:
@@ -114,6 +221,7 @@ class Settings:
     Common = CommonWidgetSettings
     Text = TextWidgetSettings
     Mosaic = MosaicWidgetSettings
+    Recipe = RecipeWidgetSettings
     Image = ImageSelectionWidgetSettings
     Shortcut = ShortcutSettings
     ButtonText = ButtonTextSettings
@@ -131,6 +239,19 @@ class Settings:
         }
         INTENSITY_LABEL_TEXT = "Blur Intensity: {}"
         ANGLE_LABEL_TEXT = "Blur Angle: {}°"
+        EFFECT_NAME = "Motion Blur"
+
+        # Motion blur kernel cache
+        KERNEL_CACHE_SIZE = 64
+        # (intensity, angle) pairs pre-built when the blur tool starts
+        PRESETS = [
+            (20, 90),
+            (20, 0),
+            (20, 45),
+            (20, 135),
+            (10, 90),
+            (35, 90),
+        ]
 
     class Camera:
         # Battery level settings
@@ -149,7 +270,111 @@ class Settings:
         # UI text
         BATTERY_LABEL_TEXT = "Battery: {:.0%}"
         TIMER_LABEL_TEXT = "Timer: HH:MM:SS.mmm"
+        EFFECT_NAME = "Camera Effect"
+        # Pre-rendered overlays kept, one per (image size, battery level)
+        SPRITE_CACHE_SIZE = 8
+
+        class Sequence:
+            # Frame rate used when the source does not report one
+            DEFAULT_FPS = 30.0
+            # Sources and outputs with these extensions are read and written as video
+            VIDEO_EXTENSIONS = ('.mp4', '.avi', '.mov', '.mkv')
+            VIDEO_FOURCC = 'mp4v'
+            # File name of each frame when a video is written out as images
+            FRAME_NAME = "frame_{:06d}.png"
         
+    class Benchmark:
+        # Synthetic image sizes timed by default
+        MEGAPIXELS = (1, 4, 16, 100)
+        # Timed runs per case, after one warm-up run
+        REPEATS = 5
+        # Slowdown against the baseline, as a fraction, before a case is flagged
+        TOLERANCE = 0.2
+        # Points of the star-shaped lasso selection
+        LASSO_POINTS = 64
+
+    class Parallel:
+        # Side of the tiles mosaic and blur are split into (rounded down to whole mosaic blocks)
+        TILE_SIZE = 512
+        # Threads the tiles run on, None for one per CPU core
+        WORKERS = None
+        # Working-memory cap in bytes for one mosaic or blur, None for no cap.
+        # Setting one turns on low-memory mode: strip-wise processing and float32 blending
+        PEAK_BYTES = None
+
+    class Instrumentation:
+        # JSON-lines log of every traced operation, None to disable
+        LOG_PATH = os.path.join(os.path.expanduser("~"), ".image_tools", "operations.jsonl")
+        LOG_MAX_BYTES = 5 * 1024 * 1024
+        LOG_BACKUP_COUNT = 5
+        # Record peak Python/NumPy allocations with tracemalloc, at some cost in
+        # speed; also turned on by running main.py with --trace-memory
+        TRACE_MEMORY = False
+        # Status bar readout
+        STATUS_TEXT = "{name}: {total:.0f} ms ({stages})"
+        PEAK_TEXT = ", peak {peak:.1f} MB"
+        HISTORY_TEXT = ", history {history:.1f} MB"
+        DETECTIONS_TEXT = ", {detections} regions detected"
+        # Names of the traced operations that are not effects
+        OPEN_NAME = "Open"
+        SAVE_NAME = "Save"
+        UNDO_NAME = "Undo"
+        REDO_NAME = "Redo"
+
+    class Detection:
+        # Haar cascades bundled with OpenCV (cv2.data.haarcascades), by target name
+        CASCADES = {
+            'face': 'haarcascade_frontalface_default.xml',
+            'plate': 'haarcascade_russian_plate_number.xml',
+        }
+        TARGETS = ('face',)
+        # Detection runs on the first image pyramid level no longer than this
+        MAX_SIDE = 1024
+        SCALE_FACTOR = 1.1
+        MIN_NEIGHBORS = 5
+        # Smallest region searched, in pixels of the pyramid level
+        MIN_SIZE = 20
+        # Margin added around each region, as a fraction of its size
+        PADDING = 0.15
+        # UI text
+        TARGET_TEXT = {'face': "Faces", 'plate': "License plates"}
+        EFFECT_TEXT = {'mosaic': "Mosaic", 'blur': "Motion blur"}
+        EFFECT_NAME = "Auto Redact"
+        ERROR_TITLE = "Auto Redact"
+
+    class Project:
+        # Sidecar file written next to the source image, e.g. photo.jpg.imgproj.json
+        SIDECAR_SUFFIX = ".imgproj.json"
+        # Longest side of the proxy edits are rendered on; export replays them at full size
+        PROXY_SIDE = 2048
+        # Encoding of the rendered proxy cached in the sidecar, shown when a project reopens
+        CACHE_FORMAT = "WEBP"
+        CACHE_QUALITY = 80
+        SAVED_TEXT = "Saved project {name} ({steps} steps)"
+        ERROR_TITLE = "Project Error"
+
+    class Thumbnails:
+        # Thumbnails of browsed folders, kept across sessions
+        CACHE_DIR = os.path.join(os.path.expanduser("~"), ".image_tools", "thumbnails")
+        # Longest side of a thumbnail in pixels
+        SIZE = 160
+        # Largest image a thumbnail is made for, PIL's decompression bomb limit
+        MAX_PIXELS = 1024 * 1024 * 1024 // 4 // 3
+        FORMAT = "WEBP"
+        QUALITY = 80
+        # Threads generating thumbnails, None for one per CPU core
+        WORKERS = None
+        # UI text
+        OPEN_TITLE = "Open Folder"
+        EMPTY_TEXT = "No folder open"
+        FOLDER_TEXT = "{folder}: {count} images"
+
+    class Batch:
+        # File types picked up when an input directory is given
+        IMAGE_EXTENSIONS = ('.png', '.jpg', '.jpeg', '.webp')
+        # Worker processes, None for one per CPU core
+        WORKERS = None
+
     @staticmethod
     def get_button_text_with_shortcut(text_and_shortcut):
         text, shortcut = text_and_shortcut
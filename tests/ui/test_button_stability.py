@@ -14,7 +14,7 @@ project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '../..'))
 sys.path.insert(0, project_root)
 
 # Import
-from ui.main_window import MainWindow
+from ui.main_window import MainWindow, parseArguments
 
 
 class TestButtonStability(unittest.TestCase):
@@ -57,6 +57,8 @@ class TestButtonStability(unittest.TestCase):
             # ImageAndSelectionWidget buttons
             (self.window.imageAndSelectionWidget.openImageButton, "Open Image"),
             (self.window.imageAndSelectionWidget.saveButton, "Save Image"),
+            (self.window.imageAndSelectionWidget.openProjectButton, "Open as Project"),
+            (self.window.imageAndSelectionWidget.saveProjectButton, "Save Project"),
             (self.window.imageAndSelectionWidget.undoButton, "Undo"),
             (self.window.imageAndSelectionWidget.redoButton, "Redo"),
             (self.window.imageAndSelectionWidget.toggleSelectionModeButton, "Toggle Selection"),
@@ -67,6 +69,10 @@ class TestButtonStability(unittest.TestCase):
             
             # MosaicWidget buttons
             (self.window.mosaicWidget.applyMosaicButton, "Apply Mosaic"),
+
+            # RecipeWidget buttons
+            (self.window.recipeWidget.loadRecipeButton, "Load Recipe"),
+            (self.window.recipeWidget.applyRecipeButton, "Apply Recipe"),
         ]
 
         # Test each button
@@ -89,6 +95,7 @@ class TestButtonStability(unittest.TestCase):
             # File operations
             ((Qt.ControlModifier, Qt.Key_O), "Ctrl+O (Open)"),
             ((Qt.ControlModifier, Qt.Key_S), "Ctrl+S (Save)"),
+            ((Qt.ControlModifier | Qt.ShiftModifier, Qt.Key_O), "Ctrl+Shift+O (Open as Project)"),
             
             # Edit operations
             ((Qt.ControlModifier, Qt.Key_Z), "Ctrl+Z (Undo)"),
@@ -108,6 +115,14 @@ class TestButtonStability(unittest.TestCase):
                 except Exception as e:
                     self.fail(f"Shortcut '{shortcut_name}' crashed with error: {str(e)}")
 
+    def test_command_line_options(self):
+        args, qt_argv = parseArguments(['main.py', '-platform', 'offscreen'])
+        self.assertFalse(args.trace_memory)
+        self.assertEqual(qt_argv, ['main.py', '-platform', 'offscreen'])
+        args, qt_argv = parseArguments(['main.py', '--trace-memory'])
+        self.assertTrue(args.trace_memory)
+        self.assertEqual(qt_argv, ['main.py'])
+
     def test_slider_interactions(self):
         """Test all sliders in the application"""
         sliders_to_test = [
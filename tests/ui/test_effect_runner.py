@@ -0,0 +1,123 @@
+import os
+import sys
+import threading
+import unittest
+
+from PyQt5.QtWidgets import QApplication
+from PyQt5.QtGui import QPixmap, QColor
+
+# Get project root directory
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '../..'))
+
+# Add project root directory to Python path
+sys.path.insert(0, project_root)
+
+# Import
+from ui.effect_runner import EffectRunner
+from config.settings import Settings
+from utils.image_utils import apply_mosaic
+from utils.qimage_bridge import pixmap_to_array, array_to_pixmap, array_to_pil_image
+from utils.tiling import tile_scheduler
+
+
+class TestEffectRunner(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.app = QApplication.instance() or QApplication(sys.argv)
+
+    def setUp(self):
+        self.pixmap = QPixmap(8, 6)
+        self.pixmap.fill(QColor(0, 0, 0))
+        self.commits = []
+        self.runner = EffectRunner(lambda: pixmap_to_array(self.pixmap), self._commit)
+
+    def _commit(self, image_array, dirtyRect):
+        self.pixmap = array_to_pixmap(image_array)
+        self.commits.append(dirtyRect)
+
+    def test_queued_effects_run_in_order_on_latest_image(self):
+        def add(value):
+            def effect(image_array, job):
+                image_array[..., 0] += value
+            return effect
+
+        for value in (1, 2, 3):
+            self.runner.submit("add", add(value))
+        self.assertTrue(self.runner.isBusy())
+        self.runner.waitForDone()
+
+        self.assertEqual(len(self.commits), 3)
+        self.assertTrue((pixmap_to_array(self.pixmap)[..., 0] == 6).all())
+
+    def test_cancel_discards_running_and_queued(self):
+        started = threading.Event()
+        release = threading.Event()
+
+        def blocking(image_array, job):
+            started.set()
+            release.wait(5)
+            image_array[..., 0] = 255
+            job.setProgress(50)
+
+        self.runner.submit("blocking", blocking)
+        self.runner.submit("queued", lambda image_array, job: None)
+        started.wait(5)
+        self.runner.cancel()
+        release.set()
+        self.runner.waitForDone()
+
+        self.assertEqual(self.commits, [])
+        self.assertTrue((pixmap_to_array(self.pixmap)[..., 0] == 0).all())
+
+    def test_cancel_stops_an_effect_between_tiles(self):
+        tile_scheduler.set_workers(1)
+        self.addCleanup(tile_scheduler.set_workers, Settings.Parallel.WORKERS)
+        self.pixmap = QPixmap(1200, 800)
+        self.pixmap.fill(QColor(0, 0, 0))
+        reports, values, jobs = [], [], []
+        self.runner.progress.connect(values.append)
+        self.runner.jobDone.connect(jobs.append)
+
+        def mosaic(image_array, job):
+            def progress(done, total):
+                reports.append(done)
+                if done == 3:
+                    job.cancel()
+                job.reportProgress(done, total)
+            apply_mosaic(array_to_pil_image(image_array), [(0, 0), (1199, 0), (1199, 799), (0, 799)], 10, progress)
+
+        self.runner.submit("mosaic", mosaic)
+        self.runner.waitForDone()
+
+        self.assertEqual(reports, [1, 2, 3])
+        self.assertEqual(len(values), 3)  # 0, then two tiles; the third was cancelled
+        self.assertEqual(jobs[0].trace.status, 'cancelled')
+        self.assertEqual(self.commits, [])
+
+    def test_failure_is_reported_and_queue_continues(self):
+        failures = []
+        self.runner.failed.connect(failures.append)
+        self.runner.submit("broken", lambda image_array, job: 1 / 0)
+        self.runner.submit("fine", lambda image_array, job: None)
+        self.runner.waitForDone()
+
+        self.assertEqual(len(failures), 1)
+        self.assertTrue(failures[0].startswith("broken"))
+        self.assertEqual(len(self.commits), 1)
+
+    def test_jobs_report_stage_traces(self):
+        jobs = []
+        self.runner.jobDone.connect(jobs.append)
+        self.runner.submit("fine", lambda image_array, job: None)
+        self.runner.submit("broken", lambda image_array, job: 1 / 0)
+        self.runner.waitForDone()
+
+        fine, broken = jobs
+        self.assertEqual(fine.trace.status, 'ok')
+        self.assertEqual(list(fine.trace.stages), ['to_numpy', 'compute'])
+        self.assertGreaterEqual(fine.trace.total_ms, sum(fine.trace.stages.values()))
+        self.assertEqual(broken.trace.status, 'failed')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,65 @@
+import os
+import sys
+import tempfile
+import unittest
+
+from PyQt5.QtWidgets import QApplication
+from PyQt5.QtGui import QImage, QColor
+
+# Get project root directory
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '../..'))
+
+# Add project root directory to Python path
+sys.path.insert(0, project_root)
+
+# Import
+from ui.folder_browser_widget import FolderBrowserWidget
+from utils.thumbnails import ThumbnailCache
+
+
+class FakeImageSource:
+    def __init__(self):
+        self.opened = []
+
+    def isBusy(self):
+        return False
+
+    def openImage(self, path):
+        self.opened.append(path)
+
+
+class TestFolderBrowserWidget(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.app = QApplication.instance() or QApplication(sys.argv)
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.addCleanup(self.directory.cleanup)
+        self.folder = os.path.join(self.directory.name, 'photos')
+        os.makedirs(self.folder)
+        for index in range(3):
+            image = QImage(120, 80, QImage.Format_RGB32)
+            image.fill(QColor(index * 100, 0, 0))
+            image.save(os.path.join(self.folder, f"{index}.png"))
+        with open(os.path.join(self.folder, 'notes.txt'), 'w') as f:
+            f.write("not an image")
+
+        self.cache = ThumbnailCache(os.path.join(self.directory.name, 'cache'), size=32)
+        self.source = FakeImageSource()
+        self.browser = FolderBrowserWidget(self.source, self.cache)
+
+    def test_thumbnails_load_and_open(self):
+        self.browser.setFolder(self.folder)
+        self.browser.waitForThumbnails()
+        items = [self.browser.thumbnailList.item(index) for index in range(self.browser.thumbnailList.count())]
+        self.assertEqual([item.text() for item in items], ['0.png', '1.png', '2.png'])
+        self.assertTrue(all(not item.icon().isNull() for item in items))
+        self.assertTrue(all(self.cache.cached(path) for path in self.browser.paths))
+
+        self.browser._openItem(items[1])
+        self.assertEqual(self.source.opened, [os.path.join(self.folder, '1.png')])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,64 @@
+import os
+import sys
+import unittest
+
+import numpy as np
+from PyQt5.QtWidgets import QApplication
+from PyQt5.QtGui import QPixmap
+
+# Get project root directory
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '../..'))
+
+# Add project root directory to Python path
+sys.path.insert(0, project_root)
+
+# Import
+from ui.text_widget import TextWidget
+from utils.recipe import run_recipe
+from utils.selection import combine
+
+
+class _Source:
+    """Image and selection source recording the effects the widget runs"""
+    def __init__(self, selection):
+        self.selection = selection
+        self.effects = []
+
+    def getImage(self):
+        return QPixmap(120, 80)
+
+    def getSelectionPolygon(self):
+        return self.selection
+
+    def runEffect(self, name, effect, steps=None):
+        self.effects.append((effect, steps))
+
+
+class TestTextWidget(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.app = QApplication.instance() or QApplication(sys.argv)
+
+    def test_project_step_draws_like_the_tool(self):
+        selection = combine([[(10, 10), (70, 10), (70, 40), (10, 40)], [(60, 50), (110, 50), (85, 75)]])
+        source = _Source(selection)
+        widget = TextWidget(source)
+        widget.textInput.setText("Hi")
+        widget.textSize = 28
+        widget.textAngle = 20
+        widget.applyText()
+
+        effect, steps = source.effects[0]
+        self.assertEqual(steps[0]['font'], widget.currentFont.family())
+        self.assertEqual(steps[0]['size'], 28)
+
+        rng = np.random.default_rng(0)
+        pixels = rng.integers(0, 256, (80, 120, 4), dtype=np.uint8)
+        expected = pixels.copy()
+        effect(expected, None)
+        self.assertFalse(np.array_equal(expected, pixels))
+        np.testing.assert_array_equal(run_recipe(pixels.copy(), steps, selection), expected)
+
+
+if __name__ == '__main__':
+    unittest.main()
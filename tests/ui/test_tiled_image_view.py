@@ -0,0 +1,219 @@
+import os
+import sys
+import tempfile
+import unittest
+
+import numpy as np
+
+from PyQt5.QtWidgets import QApplication
+from PyQt5.QtCore import Qt, QPoint, QRect, QRectF, QSize, QEvent
+from PyQt5.QtGui import QPixmap, QColor, QPainter, QPolygon, QMouseEvent, QImage
+
+# Get project root directory
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '../..'))
+
+# Add project root directory to Python path
+sys.path.insert(0, project_root)
+
+# Import
+from ui.tiled_image_view import TilePyramid, SelectableImageView
+from utils.qimage_bridge import qimage_to_array, array_to_pixmap
+from utils.working_buffer import WorkingBuffer
+
+
+class RecordingBuffer(WorkingBuffer):
+    """Working buffer that records the boxes read from it"""
+    def read_scaled(self, box, size):
+        self.reads.append(box)
+        return super().read_scaled(box, size)
+
+
+class TestTilePyramid(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.app = QApplication.instance() or QApplication(sys.argv)
+
+    def setUp(self):
+        self.pixmap = QPixmap(100, 60)
+        self.pixmap.fill(QColor(0, 0, 0))
+        self.pyramid = TilePyramid(16, 1000)
+        self.pyramid.setPixmap(self.pixmap)
+
+    def test_levels_and_tiles(self):
+        self.assertEqual(self.pyramid.levelCount(), 4)
+        self.assertEqual(self.pyramid.levelSize(2), (25, 15))
+        self.assertEqual(self.pyramid.levelForZoom(2), 0)
+        self.assertEqual(self.pyramid.levelForZoom(0.5), 1)
+        self.assertEqual(self.pyramid.levelForZoom(0.3), 1)
+        self.assertEqual(self.pyramid.levelForZoom(0.01), 3)
+        self.assertEqual(self.pyramid.tilesInRect(1, QRect(0, 0, 40, 20)), [(0, 0), (1, 0)])
+        self.assertEqual(self.pyramid.tileRect(0, 6, 3), QRect(96, 48, 4, 12))
+
+    def test_edit_updates_only_touched_tiles(self):
+        for level in range(3):
+            for column, row in self.pyramid.tilesInRect(level, self.pixmap.rect()):
+                self.pyramid.tile(level, column, row)
+        cached = len(self.pyramid._tiles)
+
+        pixmap = QPixmap(self.pixmap)
+        painter = QPainter(pixmap)
+        painter.fillRect(QRect(0, 0, 8, 8), QColor(255, 255, 255))
+        painter.end()
+        self.pyramid.setPixmap(pixmap, QRect(0, 0, 8, 8))
+
+        # One tile per level covers the top-left corner
+        self.assertEqual(len(self.pyramid._tiles), cached - 3)
+        self.assertEqual(qimage_to_array(self.pyramid.tile(0, 0, 0).toImage())[0, 0, 0], 255)
+        level2 = qimage_to_array(self.pyramid.tile(2, 0, 0).toImage())
+        self.assertEqual(level2[0, 0, 0], 255)
+        self.assertEqual(level2[5, 5, 0], 0)
+
+    def test_resize_rebuilds(self):
+        self.pyramid.tile(1, 0, 0)
+        self.pyramid.setPixmap(QPixmap(20, 20), QRect(0, 0, 4, 4))
+        self.assertEqual(len(self.pyramid._tiles), 0)
+        self.assertEqual(self.pyramid.levelCount(), 2)
+
+
+    def test_level_one_is_built_band_by_band(self):
+        rng = np.random.default_rng(0)
+        pixels = rng.integers(0, 256, (60, 100, 4), dtype=np.uint8)
+        pixels[..., 3] = 255
+        pixmap = array_to_pixmap(pixels)
+        self.pyramid.setPixmap(pixmap)
+
+        expected = QImage(50, 30, QImage.Format_ARGB32_Premultiplied)
+        painter = QPainter(expected)
+        painter.setCompositionMode(QPainter.CompositionMode_Source)
+        painter.setRenderHint(QPainter.SmoothPixmapTransform)
+        painter.drawImage(QRectF(0, 0, 50, 30), pixmap.toImage(), QRectF(0, 0, 100, 60))
+        painter.end()
+        np.testing.assert_array_equal(qimage_to_array(self.pyramid._level(1)), qimage_to_array(expected))
+
+    def test_source_tiles_are_read_on_demand(self):
+        with tempfile.TemporaryDirectory() as scratch:
+            buffer = RecordingBuffer(100, 60, scratch)
+            buffer.reads = []
+            rng = np.random.default_rng(0)
+            buffer.array[...] = rng.integers(0, 256, (60, 100, 4), dtype=np.uint8)
+            buffer.array[..., 3] = 255
+            self.pyramid.setSource(buffer)
+            self.assertTrue(self.pyramid.pixmap.isNull())
+            self.assertEqual(self.pyramid.levelCount(), 4)
+            self.assertEqual(buffer.reads, [])
+
+            tile = qimage_to_array(self.pyramid.tile(0, 6, 3).toImage())
+            np.testing.assert_array_equal(tile, buffer.array[48:60, 96:100])
+            self.assertEqual(buffer.reads, [(96, 48, 100, 60)])
+            self.assertEqual(self.pyramid.tile(2, 0, 0).size(), QPixmap(16, 15).size())
+            self.assertEqual(buffer.reads[-1], (0, 0, 64, 60))
+
+            # An edit drops only the tiles it touches, which are read again
+            buffer.array[50, 97, :3] = 0
+            self.pyramid.setSource(buffer, QRect(97, 50, 1, 1))
+            self.assertEqual(len(self.pyramid._tiles), 1)
+            self.assertEqual(qimage_to_array(self.pyramid.tile(0, 6, 3).toImage())[2, 1].tolist(), [0, 0, 0, 255])
+
+            self.pyramid.setSource(None)
+            self.assertTrue(self.pyramid.isNull())
+            buffer.close()
+
+
+class TestSelectableImageView(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.app = QApplication.instance() or QApplication(sys.argv)
+
+    def setUp(self):
+        self.view = SelectableImageView()
+        self.view.resize(200, 150)
+        pixmap = QPixmap(1000, 800)
+        pixmap.fill(QColor(0, 0, 0))
+        self.view.setPixmap(pixmap)
+
+    def test_mapping_with_zoom_and_scroll(self):
+        self.view.setZoom(2)
+        self.view.horizontalScrollBar().setValue(100)
+        self.view.verticalScrollBar().setValue(40)
+        self.assertEqual(self.view.mapToImage(QPoint(0, 0)), QPoint(50, 20))
+        self.assertEqual(self.view.mapToImage(QPoint(3, 3)), QPoint(51, 21))
+        self.assertEqual(self.view.mapFromImage(QPoint(51, 21)).toPoint(), QPoint(2, 2))
+
+    def test_zoom_keeps_anchor_in_place(self):
+        anchor = QPoint(30, 40)
+        before = self.view.mapToImage(anchor)
+        self.view.setZoom(4, anchor)
+        self.assertEqual(self.view.mapToImage(anchor), before)
+
+    def test_visible_rect_is_clipped_to_image(self):
+        self.view.setZoom(1 / 64)
+        self.assertEqual(self.view.visibleImageRect(), QRect(0, 0, 1000, 800))
+
+    def test_selection_is_rebuilt_only_when_polygon_changes(self):
+        self.view.selection_polygon = QPolygon([QPoint(10, 10), QPoint(50, 10), QPoint(50, 40)])
+        selection = self.view.selection()
+        self.assertEqual(list(selection), [(10, 10), (50, 10), (50, 40)])
+        self.assertIs(self.view.selection(), selection)
+
+        self.view.selection_polygon.append(QPoint(10, 40))
+        self.assertEqual(len(self.view.selection()), 4)
+
+    def test_zoomed_in_overview_draws_tiles_read_from_the_source(self):
+        with tempfile.TemporaryDirectory() as scratch:
+            buffer = RecordingBuffer(4000, 3200, scratch)
+            buffer.reads = []
+            buffer.array[..., 3] = 255
+            buffer.array[:, :, 1] = 200
+            # The overview is black; the full image is green
+            overview = QPixmap(1000, 800)
+            overview.fill(QColor(0, 0, 0))
+            self.view.setPixmap(overview, scale=4, imageSize=QSize(4000, 3200), source=buffer)
+            self.view.setZoom(1 / 8)
+            self.view.viewport().grab()
+            self.assertEqual(buffer.reads, [])
+
+            self.view.setZoom(2)
+            frame = qimage_to_array(self.view.viewport().grab().toImage())
+            self.assertEqual(frame[10, 10].tolist(), [0, 200, 0, 255])
+            # Only the few tiles around the visible pixels are read
+            read = sum((right - left) * (bottom - top) for left, top, right, bottom in buffer.reads)
+            self.assertLessEqual(read, 4 * 256 * 256)
+
+            self.view.setPixmap(overview)
+            buffer.close()
+
+    def drag(self, start, end, modifiers=Qt.NoModifier, path=()):
+        """Press at start, move through path to end and release there"""
+        events = [(QEvent.MouseButtonPress, start, self.view.mousePressEvent)]
+        events += [(QEvent.MouseMove, pos, self.view.mouseMoveEvent) for pos in list(path) + [end]]
+        events.append((QEvent.MouseButtonRelease, end, self.view.mouseReleaseEvent))
+        for eventType, pos, method in events:
+            method(QMouseEvent(eventType, QPoint(*pos), Qt.LeftButton, Qt.LeftButton, modifiers))
+
+    def test_shift_drag_adds_regions(self):
+        self.drag((10, 10), (30, 20))
+        self.drag((50, 60), (70, 90), Qt.ShiftModifier)
+        self.assertEqual(len(self.view.selection().parts), 2)
+        self.assertEqual(self.view.selectionRect(), QRect(QPoint(10, 10), QPoint(70, 90)))
+
+        self.drag((5, 5), (8, 8))
+        self.assertEqual(len(self.view.selection().parts), 1)
+
+
+    def test_lasso_is_simplified_and_repainted_per_segment(self):
+        self.view.toggleMode()
+        updates = []
+        self.view.viewport().update = lambda *rect: updates.append(rect)
+        # A slightly wobbly line right, then straight down
+        path = [(x, 10 + x % 2) for x in range(11, 150)] + [(150, y) for y in range(11, 120)]
+        self.drag((10, 10), (150, 120), path=path)
+
+        self.assertEqual([(point.x(), point.y()) for point in self.view.selection_polygon],
+                         [(10, 10), (150, 11), (150, 120)])
+        moves = [rect[0] for rect in updates[1:-1]]
+        self.assertEqual(len(moves), len(path) + 1)
+        self.assertTrue(all(rect.height() < 20 for rect in moves[:len(path) // 2]))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,129 @@
+import os
+import sys
+import tempfile
+import unittest
+
+import numpy as np
+from PIL import Image
+
+# Get project root directory
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '../..'))
+
+# Add project root directory to Python path
+sys.path.insert(0, project_root)
+
+# Import
+from utils.batch_processing import parse_operation, collect_inputs, run_batch, output_paths, process_file
+
+
+class TestParseOperation(unittest.TestCase):
+    def test_parses_parameters(self):
+        self.assertEqual(
+            parse_operation("mosaic rect=10,20,30,40 block_size=15"),
+            {'op': 'mosaic', 'rect': [10, 20, 30, 40], 'block_size': 15}
+        )
+        self.assertEqual(parse_operation("mosaic block_size=20x10")['block_size'], [20, 10])
+        self.assertEqual(
+            parse_operation("redact targets=face,plate effect=blur"),
+            {'op': 'redact', 'targets': ['face', 'plate'], 'effect': 'blur'}
+        )
+        self.assertEqual(
+            parse_operation("blur polygon=0,0;10,0;5,8 intensity=12 angle=22.5"),
+            {'op': 'blur', 'polygon': [[0, 0], [10, 0], [5, 8]], 'intensity': 12, 'angle': 22.5}
+        )
+        self.assertEqual(
+            parse_operation("text rect=0,0,10,10 text='two words' color=#ff0000"),
+            {'op': 'text', 'rect': [0, 0, 10, 10], 'text': 'two words', 'color': '#ff0000'}
+        )
+
+    def test_rejects_bad_specs(self):
+        for spec in ("", "sharpen rect=0,0,1,1", "mosaic rect"):
+            with self.subTest(spec=spec):
+                with self.assertRaises(ValueError):
+                    parse_operation(spec)
+
+
+class TestRunBatch(unittest.TestCase):
+    def setUp(self):
+        self.tempdir = tempfile.TemporaryDirectory()
+        self.input_dir = os.path.join(self.tempdir.name, 'in')
+        self.output_dir = os.path.join(self.tempdir.name, 'out')
+        os.makedirs(self.input_dir)
+        rng = np.random.default_rng(0)
+        for name in ('a.png', 'b.jpg', 'c.png'):
+            pixels = rng.integers(0, 256, (60, 80, 3), dtype=np.uint8)
+            Image.fromarray(pixels).save(os.path.join(self.input_dir, name))
+        open(os.path.join(self.input_dir, 'notes.txt'), 'w').close()
+
+    def tearDown(self):
+        self.tempdir.cleanup()
+
+    def test_processes_all_images(self):
+        operations = [
+            parse_operation("mosaic rect=5,5,40,30 block_size=10"),
+            parse_operation("blur rect=30,20,40,30 intensity=7 angle=45"),
+            parse_operation("text rect=0,40,80,20 text=Hi size=10"),
+            parse_operation("camera battery=0.5 timer=00:00:01.000"),
+        ]
+        paths = collect_inputs([self.input_dir])
+        self.assertEqual([os.path.basename(path) for path in paths], ['a.png', 'b.jpg', 'c.png'])
+
+        for workers in (1, 2):
+            with self.subTest(workers=workers):
+                lines = []
+                # The second run also exercises the low-memory mode of the worker processes
+                results = run_batch(paths, operations, self.output_dir, workers, report=lines.append,
+                                    memory_cap=(1 << 20) if workers == 2 else None)
+                self.assertEqual([result['error'] for result in results], [None] * 3)
+                self.assertEqual(len(lines), 4)
+                self.assertTrue(lines[-1].startswith("Processed 3 images (0 failed)"))
+
+                with Image.open(os.path.join(self.output_dir, 'a.png')) as output:
+                    self.assertEqual((output.mode, output.size), ('RGB', (80, 60)))
+
+    def test_outputs_never_overwrite_inputs_or_each_other(self):
+        other_dir = os.path.join(self.tempdir.name, 'other')
+        os.makedirs(other_dir)
+        Image.new('RGB', (8, 8)).save(os.path.join(other_dir, 'a.png'))
+        paths = collect_inputs([self.input_dir, other_dir])
+        outputs = output_paths(paths, self.output_dir)
+        self.assertEqual(outputs[os.path.join(other_dir, 'a.png')], os.path.join(self.output_dir, 'other', 'a.png'))
+        self.assertEqual(len(set(outputs.values())), len(paths))
+        self.assertEqual(output_paths(collect_inputs([self.input_dir]), self.output_dir)[paths[0]],
+                         os.path.join(self.output_dir, 'a.png'))
+
+        # Saving into the input folder would overwrite the originals
+        with open(paths[0], 'rb') as f:
+            original = f.read()
+        results = run_batch(paths[:1], [], self.input_dir, workers=1, report=lambda line: None)
+        self.assertIsNotNone(results[0]['error'])
+        with open(paths[0], 'rb') as f:
+            self.assertEqual(f.read(), original)
+
+    def test_keeps_palette_and_color_key_transparency(self):
+        palette = Image.new('P', (16, 16), 0)
+        palette.putpalette([0, 0, 0, 255, 0, 0] + [0] * 762)
+        palette.paste(1, (4, 4, 12, 12))
+        rgb = Image.new('RGB', (16, 16), (0, 0, 0))
+        rgb.paste((255, 0, 0), (4, 4, 12, 12))
+        for name, image in (('palette.png', palette), ('rgb.png', rgb)):
+            with self.subTest(name=name):
+                path = os.path.join(self.tempdir.name, name)
+                image.save(path, transparency=0 if image.mode == 'P' else (0, 0, 0))
+                output = os.path.join(self.output_dir, name)
+                self.assertIsNone(process_file(path, [], output)['error'])
+                with Image.open(output) as saved:
+                    self.assertEqual(saved.mode, 'RGBA')
+                    self.assertEqual(saved.getpixel((0, 0))[3], 0)
+                    self.assertEqual(saved.getpixel((8, 8)), (255, 0, 0, 255))
+
+    def test_reports_failures(self):
+        broken = os.path.join(self.input_dir, 'broken.png')
+        with open(broken, 'w') as f:
+            f.write("not an image")
+        results = run_batch([broken], [], self.output_dir, workers=1, report=lambda line: None)
+        self.assertIsNotNone(results[0]['error'])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,57 @@
+import os
+import sys
+import unittest
+
+import numpy as np
+
+# Get project root directory
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '../..'))
+
+# Add project root directory to Python path
+sys.path.insert(0, project_root)
+
+# Import
+from utils.benchmark import run_benchmarks, compare, image_size, selection_polygon, synthetic_image, time_call
+
+
+class TestBenchmark(unittest.TestCase):
+    def test_cases_and_fields(self):
+        results = run_benchmarks([0.01], kernels=('mosaic', 'camera'), repeats=2, report=lambda line: None)
+        self.assertEqual(set(results['results']),
+                         {'mosaic/0.01MP/small', 'mosaic/0.01MP/large', 'mosaic/0.01MP/lasso', 'camera/0.01MP'})
+        for result in results['results'].values():
+            self.assertLessEqual(result['min_ms'], result['mean_ms'])
+            self.assertLessEqual(result['mean_ms'], result['p95_ms'] + 1e-9)
+            self.assertGreaterEqual(result['peak_mb'], 0)
+
+    def test_every_run_gets_an_unmodified_image(self):
+        image = synthetic_image((16, 12))
+        original = np.array(image)
+        seen = []
+
+        def erase(target):
+            seen.append(np.array_equal(np.array(target), original))
+            target.paste((0, 0, 0, 0), (0, 0, 16, 12))
+
+        time_call(erase, image, repeats=3)
+        self.assertEqual(seen, [True] * 4)
+        np.testing.assert_array_equal(np.array(image), original)
+
+    def test_selections_fit_image(self):
+        size = image_size(1)
+        self.assertAlmostEqual(size[0] * size[1] / 1e6, 1, places=2)
+        for shape in ('small', 'large', 'lasso'):
+            with self.subTest(shape=shape):
+                x_coords, y_coords = zip(*selection_polygon(shape, size))
+                self.assertTrue(0 <= min(x_coords) and max(x_coords) < size[0])
+                self.assertTrue(0 <= min(y_coords) and max(y_coords) < size[1])
+
+    def test_compare_flags_regressions(self):
+        baseline = {'results': {'a': {'mean_ms': 10.0}, 'b': {'mean_ms': 10.0}, 'gone': {'mean_ms': 1.0}}}
+        results = {'results': {'a': {'mean_ms': 11.0}, 'b': {'mean_ms': 13.0}, 'new': {'mean_ms': 1.0}}}
+        rows = compare(results, baseline, tolerance=0.2)
+        self.assertEqual([(row[0], row[4]) for row in rows], [('a', False), ('b', True)])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,64 @@
+import os
+import sys
+import tempfile
+import unittest
+
+import numpy as np
+from PIL import Image
+
+# Get project root directory
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '../..'))
+
+# Add project root directory to Python path
+sys.path.insert(0, project_root)
+
+# Import
+from utils.camera_sequence import format_timer, parse_timer, add_camera_effect_to_frames, run_camera_sequence
+from utils.image_utils import add_camera_effect
+
+
+class TestTimer(unittest.TestCase):
+    def test_format_and_parse(self):
+        self.assertEqual(format_timer(0), "00:00:00.000")
+        self.assertEqual(format_timer(3725.0406), "01:02:05.041")
+        self.assertEqual(format_timer(59.9996), "00:01:00.000")
+        self.assertAlmostEqual(parse_timer("01:02:05.040"), 3725.04)
+        self.assertAlmostEqual(parse_timer("12.5"), 12.5)
+
+
+class TestCameraSequence(unittest.TestCase):
+    def setUp(self):
+        rng = np.random.default_rng(0)
+        self.frames = [rng.integers(0, 256, (240, 320, 3), dtype=np.uint8) for _ in range(3)]
+
+    def test_frames_match_single_image_effect(self):
+        frames = [frame.copy() for frame in self.frames]
+        results = list(add_camera_effect_to_frames(iter(frames), start_seconds=61, fps=4, battery_level_ratio=0.5))
+        for index, (frame, result) in enumerate(zip(self.frames, results)):
+            with self.subTest(frame=index):
+                expected = add_camera_effect(Image.fromarray(frame), 0.5, format_timer(61 + index / 4))
+                np.testing.assert_array_equal(result, np.asarray(expected))
+
+    def test_bgr_frames(self):
+        bgr = [frame[..., ::-1].copy() for frame in self.frames]
+        rgb = [frame.copy() for frame in self.frames]
+        for from_bgr, from_rgb in zip(add_camera_effect_to_frames(bgr, bgr=True), add_camera_effect_to_frames(rgb)):
+            np.testing.assert_array_equal(from_bgr[..., ::-1], from_rgb)
+
+    def test_directory_to_directory(self):
+        with tempfile.TemporaryDirectory() as tempdir:
+            source = os.path.join(tempdir, 'in')
+            output = os.path.join(tempdir, 'out')
+            os.makedirs(source)
+            for index, frame in enumerate(self.frames):
+                Image.fromarray(frame).save(os.path.join(source, f'{index}.png'))
+
+            result = run_camera_sequence(source, output, start_seconds=10, fps=2, report=lambda line: None)
+            self.assertEqual(result['frames'], 3)
+            written = np.array(Image.open(os.path.join(output, '2.png')))
+            expected = add_camera_effect(Image.fromarray(self.frames[2]), 1, "00:00:11.000")
+            np.testing.assert_array_equal(written, np.asarray(expected))
+
+
+if __name__ == '__main__':
+    unittest.main()
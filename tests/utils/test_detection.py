@@ -0,0 +1,76 @@
+import os
+import sys
+import unittest
+
+import numpy as np
+
+# Get project root directory
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '../..'))
+
+# Add project root directory to Python path
+sys.path.insert(0, project_root)
+
+# Import
+from utils import detection
+from utils.detection import detect_regions, box_polygon, pyramid_level, cascades_available
+from utils.image_utils import apply_mosaic
+from utils.instrumentation import OperationTrace, activate
+from utils.qimage_bridge import array_to_pil_image
+from utils.recipe import run_recipe, validate_steps
+
+
+class FakeCascade:
+    """Finds one fixed box at whatever pyramid level it is given"""
+    def __init__(self, box):
+        self.box = box
+        self.shapes = []
+
+    def detectMultiScale(self, gray, **kwargs):
+        self.shapes.append(gray.shape)
+        return np.array([self.box])
+
+
+class TestDetection(unittest.TestCase):
+    def setUp(self):
+        self.cascade = FakeCascade((100, 50, 40, 30))
+        detection._cascades['face'] = self.cascade
+        self.addCleanup(detection._cascades.pop, 'face', None)
+        rng = np.random.default_rng(0)
+        self.image = rng.integers(0, 256, (1200, 1600, 4), dtype=np.uint8)
+
+    def test_pyramid_level(self):
+        level, scale_x, scale_y = pyramid_level(self.image[..., 0], 500)
+        self.assertEqual(level.shape, (300, 400))
+        self.assertEqual((scale_x, scale_y), (4.0, 4.0))
+
+    def test_boxes_are_mapped_to_full_resolution(self):
+        boxes = detect_regions(self.image, ['face'], max_side=500, padding=0)
+        self.assertEqual(self.cascade.shapes, [(300, 400)])
+        self.assertEqual(boxes, [(400, 200, 560, 320)])
+        self.assertEqual(box_polygon(boxes[0]), [(400, 200), (559, 200), (559, 319), (400, 319)])
+
+    def test_redact_step_mosaics_detected_regions(self):
+        expected = self.image.copy()
+        box = detect_regions(self.image, ['face'])[0]
+        apply_mosaic(array_to_pil_image(expected), box_polygon(box), 10)
+
+        trace = OperationTrace('redact')
+        with activate(trace):
+            run_recipe(self.image, [{'op': 'redact', 'targets': ['face'], 'block_size': 10}])
+        np.testing.assert_array_equal(self.image, expected)
+        self.assertIn('detect', trace.stages)
+        self.assertEqual(trace.fields['detections'], 1)
+
+    def test_rejects_bad_steps(self):
+        with self.assertRaises(ValueError):
+            validate_steps([{'op': 'redact', 'effect': 'text'}])
+        with self.assertRaises(ValueError):
+            validate_steps([{'op': 'redact', 'targets': ['cat']}])
+
+    @unittest.skipUnless(cascades_available(['plate']), "OpenCV was installed without its Haar cascades")
+    def test_bundled_cascade_runs(self):
+        self.assertEqual(detect_regions(np.zeros((240, 320, 4), dtype=np.uint8), ['plate']), [])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,90 @@
+import os
+import sys
+import unittest
+
+import numpy as np
+
+# Get project root directory
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '../..'))
+
+# Add project root directory to Python path
+sys.path.insert(0, project_root)
+
+# Import
+from utils.image_history import ImageHistory, changed_rect
+
+
+class ArrayImage:
+    """Minimal image holder that applies history patches to a NumPy array"""
+    def __init__(self, array):
+        self.array = array
+
+    def edit(self, history, rect, value):
+        x, y, width, height = rect
+        history.push(rect, self.array[y:y + height, x:x + width].copy())
+        self.array[y:y + height, x:x + width] = value
+
+    def swap(self, rect, pixels):
+        if rect is None:
+            replaced, self.array = self.array, pixels
+            return replaced
+        x, y, width, height = rect
+        replaced = self.array[y:y + height, x:x + width].copy()
+        self.array[y:y + height, x:x + width] = pixels
+        return replaced
+
+
+class TestImageHistory(unittest.TestCase):
+    def setUp(self):
+        self.original = np.random.default_rng(0).integers(0, 256, (40, 60, 4), dtype=np.uint8)
+        self.image = ArrayImage(self.original.copy())
+
+    def test_undo_redo_round_trip(self):
+        for compression_level in (None, 1):
+            with self.subTest(compression_level=compression_level):
+                history = ImageHistory(budget_bytes=1 << 20, compression_level=compression_level)
+                self.image.array = self.original.copy()
+                self.image.edit(history, (5, 5, 10, 8), 0)
+                edited = self.image.array.copy()
+                self.image.edit(history, (20, 10, 15, 15), 255)
+                final = self.image.array.copy()
+
+                self.assertTrue(history.undo(self.image.swap))
+                np.testing.assert_array_equal(self.image.array, edited)
+                self.assertTrue(history.undo(self.image.swap))
+                np.testing.assert_array_equal(self.image.array, self.original)
+                self.assertFalse(history.undo(self.image.swap))
+
+                self.assertTrue(history.redo(self.image.swap))
+                self.assertTrue(history.redo(self.image.swap))
+                np.testing.assert_array_equal(self.image.array, final)
+                self.assertFalse(history.can_redo())
+
+    def test_push_clears_redo(self):
+        history = ImageHistory(budget_bytes=1 << 20)
+        self.image.edit(history, (0, 0, 4, 4), 1)
+        history.undo(self.image.swap)
+        self.assertTrue(history.can_redo())
+        self.image.edit(history, (0, 0, 4, 4), 2)
+        self.assertFalse(history.can_redo())
+
+    def test_budget_evicts_oldest(self):
+        patch_bytes = 10 * 10 * 4
+        history = ImageHistory(budget_bytes=2 * patch_bytes)
+        for value in range(4):
+            self.image.edit(history, (value, value, 10, 10), value)
+        self.assertLessEqual(history.nbytes, 2 * patch_bytes)
+        self.assertTrue(history.undo(self.image.swap))
+        self.assertTrue(history.undo(self.image.swap))
+        self.assertFalse(history.undo(self.image.swap))
+
+    def test_changed_rect(self):
+        after = self.original.copy()
+        self.assertIsNone(changed_rect(self.original, after))
+        after[7, 3] = after[12, 9] + 1
+        after[12, 9] += 1
+        self.assertEqual(changed_rect(self.original, after), (3, 7, 7, 6))
+
+
+if __name__ == '__main__':
+    unittest.main()
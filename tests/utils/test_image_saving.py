@@ -0,0 +1,64 @@
+import os
+import sys
+import tempfile
+import unittest
+
+import numpy as np
+from PIL import Image
+
+# Get project root directory
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '../..'))
+
+# Add project root directory to Python path
+sys.path.insert(0, project_root)
+
+# Import
+from utils.image_saving import encoder_params, save_image_array
+
+
+class TestImageSaving(unittest.TestCase):
+    def setUp(self):
+        self.tempdir = tempfile.TemporaryDirectory()
+        rng = np.random.default_rng(0)
+        self.image = np.full((64, 96, 4), 255, np.uint8)
+        self.image[..., :3] = rng.integers(0, 256, (64, 96, 3), dtype=np.uint8)
+
+    def tearDown(self):
+        self.tempdir.cleanup()
+
+    def _path(self, name):
+        return os.path.join(self.tempdir.name, name)
+
+    def test_encoder_params_per_format(self):
+        self.assertEqual(encoder_params('JPEG', {'quality': 70, 'progressive': True}),
+                         {'quality': 70, 'progressive': True})
+        self.assertEqual(encoder_params('PNG', {'compress_level': 6}), {'compress_level': 6})
+        self.assertTrue(encoder_params('WEBP', {'lossless': True})['lossless'])
+        self.assertEqual(encoder_params(None), {})
+
+    def test_reports_time_and_size(self):
+        result = save_image_array(self.image, self._path('out.png'), {'compress_level': 0})
+        self.assertEqual(result['bytes'], os.path.getsize(self._path('out.png')))
+        self.assertGreaterEqual(result['seconds'], 0)
+        with Image.open(self._path('out.png')) as saved:
+            self.assertEqual(saved.mode, 'RGBA')
+            np.testing.assert_array_equal(np.asarray(saved), self.image)
+
+    def test_lossless_formats_round_trip_without_alpha(self):
+        for name, options in (('fast.png', {'compress_level': 1}), ('exact.webp', {'lossless': True})):
+            with self.subTest(name=name):
+                save_image_array(self.image, self._path(name), options, keep_alpha=False)
+                with Image.open(self._path(name)) as saved:
+                    self.assertEqual(saved.mode, 'RGB')
+                    np.testing.assert_array_equal(np.asarray(saved), self.image[..., :3])
+
+    def test_jpeg_quality_trades_size(self):
+        small = save_image_array(self.image, self._path('low.jpg'), {'quality': 20})
+        large = save_image_array(self.image, self._path('high.jpg'), {'quality': 95, 'progressive': True})
+        self.assertLess(small['bytes'], large['bytes'])
+        with Image.open(self._path('high.jpg')) as saved:
+            self.assertTrue(saved.info.get('progressive'))
+
+
+if __name__ == '__main__':
+    unittest.main()
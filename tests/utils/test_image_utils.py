@@ -0,0 +1,227 @@
+import os
+import sys
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+
+import cv2
+import numpy as np
+from PIL import Image, ImageDraw
+
+# Get project root directory
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '../..'))
+
+# Add project root directory to Python path
+sys.path.insert(0, project_root)
+
+# Import
+from utils.image_utils import (
+    apply_mosaic,
+    apply_optimized_motion_blur_to_polygon,
+    add_camera_effect,
+    camera_overlay_sprite_cache,
+    CameraOverlaySpriteCache,
+    MotionBlurKernelCache,
+    CameraEffectConfig,
+    _draw_camera_overlay,
+    _draw_timer
+)
+
+
+def reference_mosaic(pil_image, polygon, block_size):
+    """Per-block mosaic used as the ground truth for the summed-area table engine"""
+    block_width, block_height = block_size if isinstance(block_size, tuple) else (block_size, block_size)
+    mask = Image.new('L', pil_image.size, 0)
+    ImageDraw.Draw(mask).polygon(polygon, outline=1, fill=1)
+    mask_array = np.array(mask)
+
+    for i in range(0, pil_image.width, block_width):
+        for j in range(0, pil_image.height, block_height):
+            box = (i, j, min(i + block_width, pil_image.width), min(j + block_height, pil_image.height))
+            block = pil_image.crop(box)
+            block_mask = mask_array[j: j + block.size[1], i: i + block.size[0]]
+
+            if np.any(block_mask):
+                block_data = np.array(block)
+                avg_color = tuple(np.mean(block_data[block_mask == 1], axis=0).astype(int))
+                block_data[block_mask == 1] = avg_color
+                pil_image.paste(Image.fromarray(block_data), box)
+
+
+def reference_motion_blur(pil_image, polygon, intense, angle):
+    """Full-image motion blur, blended into the selection's bounding rectangle"""
+    image = np.array(pil_image)
+    mask = Image.new('L', pil_image.size, 0)
+    ImageDraw.Draw(mask).polygon(polygon, outline=1, fill=1)
+    mask_array = np.array(mask)
+
+    x_coords, y_coords = zip(*polygon)
+    x, y, w, h = min(x_coords), min(y_coords), max(x_coords) - min(x_coords), max(y_coords) - min(y_coords)
+
+    M = cv2.getRotationMatrix2D((intense / 2, intense / 2), -((angle - 45) % 360), 1)
+    kernel = cv2.warpAffine(np.diag(np.ones(intense)), M, (intense, intense))
+    blurred = cv2.filter2D(image[..., :3], -1, kernel / np.sum(kernel))
+
+    yy, xx = np.ogrid[:image.shape[0], :image.shape[1]]
+    weight = np.sqrt((xx - (x + w // 2)) ** 2 + (yy - (y + h // 2)) ** 2)
+    weight = np.clip(1 - weight / np.max(weight), 0, 1)
+
+    final_mask = (mask_array * weight)[y:y + h, x:x + w, None]
+    rgb = image[y:y + h, x:x + w, :3]
+    image[y:y + h, x:x + w, :3] = cv2.convertScaleAbs(rgb * (1 - final_mask) + blurred[y:y + h, x:x + w] * final_mask)
+    return image
+
+
+def random_image(width, height, seed=0):
+    rng = np.random.default_rng(seed)
+    return Image.fromarray(rng.integers(0, 256, (height, width, 4), dtype=np.uint8), "RGBA")
+
+
+class TestApplyMosaic(unittest.TestCase):
+    POLYGONS = [
+        [(10, 12), (90, 12), (90, 70), (10, 70)],
+        [(5, 5), (60, 20), (110, 95), (70, 60), (40, 80)],
+        [(-20, -10), (50, 30), (140, 130), (0, 90)],
+        [(33, 41), (33, 41)],
+    ]
+
+    def test_matches_reference(self):
+        for polygon in self.POLYGONS:
+            for block_size in (1, 5, 7, 20, (3, 8), (25, 4), (200, 200)):
+                with self.subTest(polygon=polygon, block_size=block_size):
+                    expected = random_image(123, 97)
+                    actual = expected.copy()
+                    reference_mosaic(expected, polygon, block_size)
+                    apply_mosaic(actual, polygon, block_size)
+                    np.testing.assert_array_equal(np.array(actual), np.array(expected))
+
+    def test_blocks_wider_than_tiles(self):
+        from utils.tiling import tile_scheduler
+        polygon = self.POLYGONS[1]
+        expected = random_image(123, 97)
+        actual = expected.copy()
+        reference_mosaic(expected, polygon, (30, 9))
+        tile_size = tile_scheduler.tile_size
+        tile_scheduler.tile_size = 16
+        try:
+            apply_mosaic(actual, polygon, (30, 9))
+        finally:
+            tile_scheduler.tile_size = tile_size
+        np.testing.assert_array_equal(np.array(actual), np.array(expected))
+
+    def test_selection_outside_image_is_noop(self):
+        image = random_image(40, 30)
+        original = np.array(image)
+        apply_mosaic(image, [(100, 100), (150, 100), (150, 150)], 10)
+        np.testing.assert_array_equal(np.array(image), original)
+
+
+class TestMotionBlur(unittest.TestCase):
+    POLYGONS = [
+        [(20, 15), (100, 15), (100, 80), (20, 80)],
+        [(0, 0), (60, 20), (122, 96), (30, 70)],
+        [(50, 40), (90, 30), (110, 90), (60, 60)],
+    ]
+
+    def test_matches_full_image_filter(self):
+        for polygon in self.POLYGONS:
+            for intense, angle in ((5, 0), (20, 90), (31, 135)):
+                with self.subTest(polygon=polygon, intense=intense, angle=angle):
+                    image = random_image(123, 97)
+                    expected = reference_motion_blur(image, polygon, intense, angle)
+                    actual = np.array(apply_optimized_motion_blur_to_polygon(image, polygon, intense, angle))
+                    difference = np.abs(actual.astype(int) - expected.astype(int))
+                    self.assertLessEqual(difference.max(), 1)
+
+    def test_in_place_writes_only_bounding_rect(self):
+        image = random_image(123, 97)
+        original = np.array(image)
+        result = apply_optimized_motion_blur_to_polygon(image, self.POLYGONS[2], 20, 45, in_place=True)
+        self.assertIs(result, image)
+
+        changed = np.argwhere(np.any(np.array(image) != original, axis=2))
+        self.assertGreater(len(changed), 0)
+        self.assertTrue(np.all(changed.min(axis=0) >= (30, 50)))
+        self.assertTrue(np.all(changed.max(axis=0) < (90, 110)))
+
+    def test_copy_leaves_input_untouched(self):
+        image = random_image(60, 40)
+        original = np.array(image)
+        apply_optimized_motion_blur_to_polygon(image, [(5, 5), (50, 5), (50, 35), (5, 35)], 10, 30)
+        np.testing.assert_array_equal(np.array(image), original)
+
+
+class TestMotionBlurKernelCache(unittest.TestCase):
+    def test_hits_and_misses(self):
+        cache = MotionBlurKernelCache(max_entries=4)
+        first = cache.get(20, 45)
+        second = cache.get(20, 405)
+        self.assertIs(first, second)
+        self.assertEqual(cache.stats(), {'hits': 1, 'misses': 1, 'size': 1, 'max_entries': 4})
+        self.assertFalse(first.flags.writeable)
+        self.assertAlmostEqual(first.sum(), 1.0)
+
+    def test_evicts_least_recently_used(self):
+        cache = MotionBlurKernelCache(max_entries=2)
+        cache.get(10, 0)
+        cache.get(10, 90)
+        cache.get(10, 0)
+        cache.get(10, 45)
+        self.assertIn((10, 0), cache)
+        self.assertNotIn((10, 90), cache)
+        self.assertEqual(len(cache), 2)
+
+    def test_warm_builds_presets_once(self):
+        cache = MotionBlurKernelCache(max_entries=8)
+        cache.warm([(20, 90), (20, 0), (20, 90)])
+        self.assertEqual(cache.stats()['misses'], 2)
+        cache.get(20, 0)
+        self.assertEqual(cache.stats()['hits'], 1)
+
+    def test_concurrent_lookups(self):
+        cache = MotionBlurKernelCache(max_entries=4)
+        with ThreadPoolExecutor(8) as executor:
+            kernels = list(executor.map(lambda i: cache.get(5 + i % 7, i % 3 * 30), range(2000)))
+        self.assertTrue(all(kernel.shape[0] >= 5 for kernel in kernels))
+        stats = cache.stats()
+        self.assertEqual(stats['hits'] + stats['misses'], 2000)
+        self.assertLessEqual(stats['size'], 4)
+
+
+class TestCameraEffect(unittest.TestCase):
+    def _reference(self, pil_image, battery, timer):
+        """Draw the whole overlay directly on the image, as before sprites"""
+        draw = ImageDraw.Draw(pil_image)
+        _draw_camera_overlay(draw, pil_image.width, pil_image.height, battery)
+        _draw_timer(draw, pil_image.width, pil_image.height, timer, CameraEffectConfig)
+        return pil_image
+
+    def test_sprite_matches_direct_drawing(self):
+        rng = np.random.default_rng(0)
+        for width, height, mode in ((640, 480, 'RGBA'), (333, 777, 'RGB'), (40, 30, 'RGBA')):
+            with self.subTest(size=(width, height), mode=mode):
+                pixels = rng.integers(0, 256, (height, width, len(mode)), dtype=np.uint8)
+                expected = self._reference(Image.fromarray(pixels, mode), 0.5, "00:00:01.000")
+                result = add_camera_effect(Image.fromarray(pixels, mode), 0.5, "00:00:01.000")
+                np.testing.assert_array_equal(np.asarray(result), np.asarray(expected))
+
+    def test_sprite_is_rendered_once_per_size_and_battery(self):
+        camera_overlay_sprite_cache.clear()
+        image = Image.new('RGBA', (320, 240))
+        for timer in ("00:00:01.000", "00:00:02.000"):
+            add_camera_effect(image, 0.8, timer)
+        add_camera_effect(image, 0.4)
+        self.assertEqual(camera_overlay_sprite_cache.stats()['misses'], 2)
+        self.assertEqual(camera_overlay_sprite_cache.stats()['hits'], 1)
+
+    def test_concurrent_sprite_lookups(self):
+        cache = CameraOverlaySpriteCache(max_entries=2)
+        with ThreadPoolExecutor(8) as executor:
+            sprites = list(executor.map(lambda i: cache.get(64 + i % 3, 48, 0.5), range(300)))
+        self.assertTrue(all(sprites))
+        stats = cache.stats()
+        self.assertEqual(stats['hits'] + stats['misses'], 300)
+        self.assertLessEqual(stats['size'], 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
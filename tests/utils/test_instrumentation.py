@@ -0,0 +1,73 @@
+import json
+import os
+import sys
+import tempfile
+import tracemalloc
+import unittest
+
+# Get project root directory
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '../..'))
+
+# Add project root directory to Python path
+sys.path.insert(0, project_root)
+
+# Import
+from utils.instrumentation import Instrumentation, activate, stage, annotate, current_trace, load_records, summarize
+
+
+class TestInstrumentation(unittest.TestCase):
+    def setUp(self):
+        self.tempdir = tempfile.TemporaryDirectory()
+        self.log_path = os.path.join(self.tempdir.name, 'logs', 'operations.jsonl')
+        self.instrumentation = Instrumentation(self.log_path, max_bytes=2000, backup_count=2, trace_memory=True)
+
+    def tearDown(self):
+        self.instrumentation.close()
+        self.tempdir.cleanup()
+
+    def test_stages_and_annotations_reach_the_active_trace(self):
+        trace = self.instrumentation.start("Mosaic")
+        with stage('ignored'):  # No active trace yet
+            pass
+        with activate(trace):
+            with stage('compute'):
+                data = bytearray(1 << 20)
+            with stage('compute'):
+                pass
+            annotate(history_bytes=len(data))
+        self.assertIsNone(current_trace())
+
+        record = self.instrumentation.finish(trace)
+        self.assertEqual(list(record['stages_ms']), ['compute'])
+        self.assertEqual(record['history_bytes'], 1 << 20)
+        self.assertGreaterEqual(record['peak_bytes'], 1 << 20)
+        self.assertGreaterEqual(record['total_ms'], record['stages_ms']['compute'])
+
+    def test_memory_tracing_is_opt_in(self):
+        tracemalloc.stop()
+        self.addCleanup(tracemalloc.stop)
+        Instrumentation().start("Open")
+        self.assertFalse(tracemalloc.is_tracing())
+        self.instrumentation.start("Open")
+        self.assertTrue(tracemalloc.is_tracing())
+
+    def test_log_rotates_and_summarizes(self):
+        for index in range(40):
+            trace = self.instrumentation.start("Blur" if index % 2 else "Undo")
+            trace.record('compute', index / 1000)
+            self.instrumentation.finish(trace)
+        self.instrumentation.close()
+
+        paths = [self.log_path, self.log_path + '.1']
+        self.assertTrue(all(os.path.exists(path) for path in paths))
+        with open(self.log_path, encoding='utf-8') as f:
+            self.assertEqual(json.loads(f.readline())['status'], 'ok')
+
+        summary = summarize(load_records(paths))
+        self.assertEqual(set(summary), {'Blur', 'Undo'})
+        self.assertEqual(summary['Blur']['hosts'], 1)
+        self.assertIn('compute', summary['Blur']['stages_ms'])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,76 @@
+import os
+import sys
+import threading
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+
+# Get project root directory
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '../..'))
+
+# Add project root directory to Python path
+sys.path.insert(0, project_root)
+
+# Import
+from utils.lru_cache import LRUCache
+
+
+class _BlockingCache(LRUCache):
+    """Builds a fresh object per call, waiting for release on the key 'slow'"""
+    def __init__(self, max_entries):
+        super().__init__(max_entries)
+        self.started = threading.Event()
+        self.release = threading.Event()
+        self.builds = 0
+
+    def build(self, key):
+        self.builds += 1
+        if key == 'slow':
+            self.started.set()
+            self.release.wait(5)
+        return [key]
+
+
+class TestLRUCache(unittest.TestCase):
+    def test_hits_misses_and_eviction(self):
+        cache = _BlockingCache(max_entries=2)
+        first = cache.get('a')
+        cache.get('b')
+        self.assertIs(cache.get('a'), first)
+        cache.get('c')
+        self.assertIn('a', cache)
+        self.assertNotIn('b', cache)
+        self.assertEqual(len(cache), 2)
+        self.assertEqual(cache.stats(), {'hits': 1, 'misses': 3, 'size': 2, 'max_entries': 2})
+
+        cache.clear()
+        self.assertEqual(cache.stats(), {'hits': 0, 'misses': 0, 'size': 0, 'max_entries': 2})
+
+    def test_build_runs_outside_the_lock(self):
+        cache = _BlockingCache(max_entries=4)
+        cache.get('a')
+        with ThreadPoolExecutor(1) as executor:
+            slow = executor.submit(cache.get, 'slow')
+            self.assertTrue(cache.started.wait(5))
+            # Lookups and stats go on while the slow value is being built
+            self.assertEqual(cache.get('a'), ['a'])
+            self.assertNotIn('slow', cache)
+            self.assertEqual(cache.stats()['hits'], 1)
+            cache.release.set()
+            self.assertEqual(slow.result(), ['slow'])
+        self.assertIn('slow', cache)
+
+    def test_concurrent_misses_share_the_first_value(self):
+        cache = _BlockingCache(max_entries=4)
+        with ThreadPoolExecutor(2) as executor:
+            futures = [executor.submit(cache.get, 'slow') for _ in range(2)]
+            self.assertTrue(cache.started.wait(5))
+            cache.release.set()
+            values = [future.result() for future in futures]
+        self.assertIs(values[0], values[1])
+        self.assertEqual(len(cache), 1)
+        stats = cache.stats()
+        self.assertEqual(stats['hits'] + stats['misses'], 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,67 @@
+import os
+import sys
+import unittest
+
+import numpy as np
+
+# Get project root directory
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '../..'))
+
+# Add project root directory to Python path
+sys.path.insert(0, project_root)
+
+# Import
+from utils.preview import preview_region, proxy_size, scale_step
+from utils.recipe import run_recipe
+
+
+POLYGON = [(23, 17), (101, 30), (90, 84), (30, 70)]
+
+
+class TestPreview(unittest.TestCase):
+    def setUp(self):
+        self.image = np.random.default_rng(0).integers(0, 256, (97, 123, 4), dtype=np.uint8)
+        self.size = (123, 97)
+
+    def render(self, step, visible_box, max_pixels):
+        box, scale = preview_region(POLYGON, visible_box, self.size, step, max_pixels)
+        left, top, right, bottom = box
+        self.assertEqual(proxy_size(box, scale), (right - left, bottom - top))
+        proxy = self.image[top:bottom, left:right].copy()
+        run_recipe(proxy, [scale_step(step, POLYGON, box, scale, self.size)])
+        return box, proxy
+
+    def test_full_scale_preview_matches_final_result(self):
+        steps = [
+            {'op': 'mosaic', 'block_size': 10},
+            {'op': 'mosaic', 'block_size': [12, 5]},
+            {'op': 'blur', 'intensity': 9, 'angle': 30},
+        ]
+        for step in steps:
+            with self.subTest(step=step):
+                expected = run_recipe(self.image.copy(), [step], POLYGON)
+                (left, top, right, bottom), proxy = self.render(step, (0, 0) + self.size, 1 << 20)
+                if step['op'] == 'blur':
+                    # The halo around the selection is only read, never shown
+                    margin = step['intensity'] // 2 + 1
+                    proxy = proxy[margin:-margin, margin:-margin]
+                    left, top, right, bottom = left + margin, top + margin, right - margin, bottom - margin
+                np.testing.assert_array_equal(proxy, expected[top:bottom, left:right])
+
+    def test_region_is_clipped_to_visible_box(self):
+        box, scale = preview_region(POLYGON, (40, 0, 80, 50), self.size, {'op': 'mosaic', 'block_size': 10}, 1 << 20)
+        self.assertEqual(box, (40, 10, 80, 50))
+        self.assertEqual(scale, 1.0)
+        self.assertIsNone(preview_region(POLYGON, (110, 90, 123, 97), self.size, {'op': 'mosaic'}, 1 << 20))
+
+    def test_downscaled_mosaic_keeps_whole_blocks(self):
+        step = {'op': 'mosaic', 'block_size': 10}
+        box, scale = preview_region(POLYGON, (0, 0) + self.size, self.size, step, 1000)
+        width, height = proxy_size(box, scale)
+        self.assertLessEqual(width * height, 1000 * 1.5)
+        scaled = scale_step(step, POLYGON, box, scale, self.size)
+        self.assertEqual(scaled['block_size'], step['block_size'] * scale)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,117 @@
+import os
+import sys
+import tempfile
+import unittest
+
+import numpy as np
+from PIL import Image
+
+# Get project root directory
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '../..'))
+
+# Add project root directory to Python path
+sys.path.insert(0, project_root)
+
+# Import
+from utils import detection
+from utils.project import Project, open_project, sidecar_path
+from utils.recipe import run_recipe
+
+
+SELECTION = [(20, 10), (120, 10), (120, 70), (20, 70)]
+
+
+class FakeCascade:
+    """Finds one fixed box in whatever image it is given"""
+    def __init__(self, box):
+        self.box = box
+        self.calls = 0
+
+    def detectMultiScale(self, gray, **kwargs):
+        self.calls += 1
+        return np.array([self.box])
+
+
+def changed_box(before, after):
+    """(left, top, right, bottom) of the changed pixels, right and bottom inclusive"""
+    rows, cols = np.nonzero((before != after).any(axis=2))
+    return cols.min(), rows.min(), cols.max(), rows.max()
+
+
+class TestProject(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.addCleanup(self.directory.cleanup)
+        self.image = np.random.default_rng(0).integers(0, 256, (90, 160, 4), dtype=np.uint8)
+        self.image[..., 3] = 255
+        self.source = os.path.join(self.directory.name, 'photo.png')
+        Image.fromarray(self.image, 'RGBA').save(self.source)
+
+    def project(self):
+        project = Project(self.source, proxy_side=64)
+        project.add([{'op': 'mosaic', 'block_size': 10}], SELECTION)
+        project.add([{'op': 'blur', 'intensity': 9, 'angle': 30, 'rect': [60, 40, 80, 40]}, {'op': 'camera'}])
+        return project
+
+    def test_steps_keep_their_selection(self):
+        project = self.project()
+        self.assertEqual(project.steps[0]['polygons'], [[list(point) for point in SELECTION]])
+        self.assertEqual(project.factor, 3)
+        self.assertEqual(project.proxy_steps()[0]['block_size'], 3)
+
+    def test_render_replays_at_full_resolution(self):
+        project = self.project()
+        expected = run_recipe(self.image.copy(), project.steps)
+        np.testing.assert_array_equal(project.render(), expected)
+        self.assertEqual(project.render_proxy(project.load_proxy_source()).shape, (30, 54, 4))
+
+    def test_undo_redo_whole_edits(self):
+        project = self.project()
+        self.assertTrue(project.undo())
+        self.assertEqual([step['op'] for step in project.steps], ['mosaic'])
+        self.assertEqual([step['op'] for step in project.redo()], ['blur', 'camera'])
+        project.update(0, block_size=20)
+        self.assertEqual(project.steps[0]['block_size'], 20)
+        self.assertFalse(project.can_redo())
+
+    def test_sidecar_reopens_with_cached_proxy(self):
+        project = self.project()
+        project.cache_proxy(project.render_proxy(project.load_proxy_source()))
+        self.assertEqual(project.save(), sidecar_path(self.source))
+
+        reopened = open_project(self.source, proxy_side=64)
+        self.assertEqual(reopened.steps, project.steps)
+        self.assertEqual(reopened.cached_proxy().shape, (30, 54, 4))
+        reopened.update(0, block_size=20)
+        self.assertIsNone(reopened.cached_proxy())
+
+    def test_redact_exports_the_regions_previewed(self):
+        cascade = FakeCascade((5, 4, 10, 8))
+        detection._cascades['face'] = cascade
+        self.addCleanup(detection._cascades.pop, 'face', None)
+        project = Project(self.source, proxy_side=64)
+        steps = [{'op': 'redact', 'targets': ['face'], 'block_size': 6}]
+        proxy = project.load_proxy_source()
+        preview = project.render_proxy(proxy.copy(), steps)
+        project.add(steps)
+
+        (polygon,) = project.steps[0]['polygons']
+        box = polygon[0] + polygon[2]
+        export = project.render()
+        self.assertEqual(cascade.calls, 1)
+        self.assertEqual(changed_box(self.image, export), tuple(box))
+        # The preview shows the same region, up to rounding to proxy pixels
+        previewed = [side * project.factor for side in changed_box(proxy, preview)]
+        for side, expected in zip(previewed, box):
+            self.assertLessEqual(abs(side - expected), project.factor)
+
+    def test_rejects_other_files(self):
+        path = os.path.join(self.directory.name, 'recipe.json')
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write('{"steps": []}')
+        with self.assertRaises(ValueError):
+            Project.load(path)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,73 @@
+import os
+import sys
+import unittest
+
+import numpy as np
+from PyQt5.QtWidgets import QApplication
+from PyQt5.QtGui import QImage, QColor, QPixmap, QPainter
+from PIL import ImageDraw
+
+# Get project root directory
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '../..'))
+
+# Add project root directory to Python path
+sys.path.insert(0, project_root)
+
+# Import
+from utils.qimage_bridge import (
+    qimage_to_array,
+    pixmap_to_array,
+    array_to_qimage,
+    array_to_pixmap,
+    array_to_pil_image
+)
+
+
+class TestQImageBridge(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.app = QApplication.instance() or QApplication(sys.argv)
+
+    def test_argb32_is_exposed_in_rgba_order(self):
+        qimage = QImage(6, 4, QImage.Format_ARGB32)
+        qimage.fill(QColor(200, 100, 50, 255))
+        array = qimage_to_array(qimage)
+        self.assertEqual(array.shape, (4, 6, 4))
+        np.testing.assert_array_equal(array[2, 3], [200, 100, 50, 255])
+
+    def test_rgba_image_is_viewed_without_copy(self):
+        qimage = QImage(6, 4, QImage.Format_RGBA8888)
+        qimage.fill(QColor(0, 0, 0, 255))
+        array = qimage_to_array(qimage)
+        array[1, 2] = (10, 20, 30, 255)
+        self.assertEqual(array.base.qimage.pixelColor(2, 1).getRgb(), (10, 20, 30, 255))
+
+    def test_array_to_qimage_shares_memory(self):
+        array = np.zeros((3, 5, 4), dtype=np.uint8)
+        qimage = array_to_qimage(array)
+        array[0, 4] = (1, 2, 3, 255)
+        self.assertEqual(qimage.pixelColor(4, 0).getRgb(), (1, 2, 3, 255))
+
+    def test_painting_on_qimage_writes_into_array(self):
+        array = np.zeros((4, 4, 4), dtype=np.uint8)
+        qimage = array_to_qimage(array)
+        painter = QPainter(qimage)
+        painter.fillRect(0, 0, 2, 2, QColor(255, 0, 0))
+        painter.end()
+        np.testing.assert_array_equal(array[1, 1], [255, 0, 0, 255])
+        np.testing.assert_array_equal(array[3, 3], [0, 0, 0, 0])
+
+    def test_pixmap_round_trip(self):
+        array = np.random.default_rng(0).integers(0, 256, (7, 9, 4), dtype=np.uint8)
+        array[..., 3] = 255
+        np.testing.assert_array_equal(pixmap_to_array(array_to_pixmap(array)), array)
+        self.assertIsInstance(array_to_pixmap(array), QPixmap)
+
+    def test_pil_view_writes_into_array(self):
+        array = np.zeros((4, 4, 4), dtype=np.uint8)
+        ImageDraw.Draw(array_to_pil_image(array)).point((1, 2), fill=(9, 8, 7, 255))
+        np.testing.assert_array_equal(array[2, 1], [9, 8, 7, 255])
+
+
+if __name__ == '__main__':
+    unittest.main()
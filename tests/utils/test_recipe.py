@@ -0,0 +1,123 @@
+import os
+import sys
+import json
+import tempfile
+import unittest
+
+import numpy as np
+from PIL import Image
+from PyQt5.QtGui import QColor, QFont, QPainter
+from PyQt5.QtWidgets import QApplication
+
+# Get project root directory
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '../..'))
+
+# Add project root directory to Python path
+sys.path.insert(0, project_root)
+
+# Import
+from utils.qimage_bridge import array_to_qimage
+from utils.image_utils import apply_mosaic, apply_optimized_motion_blur_to_polygon, add_camera_effect
+from utils.recipe import yaml, load_recipe, save_recipe, run_recipe, validate_steps
+
+
+STEPS = [
+    {'op': 'mosaic', 'rect': [5, 5, 40, 30], 'block_size': 10},
+    {'op': 'blur', 'polygon': [[30, 20], [70, 25], [50, 55]], 'intensity': 9, 'angle': 30},
+    {'op': 'camera', 'battery': 0.5, 'timer': "00:00:01.000"},
+]
+
+
+class TestRecipe(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.app = QApplication.instance() or QApplication(sys.argv)
+
+    def setUp(self):
+        rng = np.random.default_rng(0)
+        self.pixels = rng.integers(0, 256, (60, 80, 4), dtype=np.uint8)
+
+    def test_matches_step_by_step_path(self):
+        expected = Image.fromarray(self.pixels.copy(), "RGBA")
+        apply_mosaic(expected, [(5, 5), (45, 5), (45, 35), (5, 35)], 10)
+        expected = apply_optimized_motion_blur_to_polygon(expected, [(30, 20), (70, 25), (50, 55)], 9, 30)
+        add_camera_effect(expected, 0.5, "00:00:01.000")
+
+        actual = run_recipe(self.pixels.copy(), STEPS)
+        np.testing.assert_array_equal(actual, np.array(expected))
+
+    def test_text_matches_text_tool(self):
+        family = QFont().family()
+        # What the text tool draws: the font family at a point size, centered on the selection
+        expected = self.pixels.copy()
+        image = array_to_qimage(expected)
+        painter = QPainter(image)
+        painter.setRenderHint(QPainter.Antialiasing)
+        font = QFont(family)
+        font.setPointSize(30)
+        painter.setFont(font)
+        painter.setPen(QColor("#ff0000"))
+        metrics = painter.fontMetrics()
+        painter.translate(40, 30)
+        painter.rotate(15)
+        painter.drawText(int(-metrics.horizontalAdvance("Hi") / 2), int(metrics.height() / 4), "Hi")
+        painter.end()
+
+        step = {'op': 'text', 'rect': [10, 10, 60, 40], 'text': "Hi", 'size': 30,
+                'color': "#ff0000", 'angle': 15, 'font': family}
+        actual = run_recipe(self.pixels.copy(), [step])
+        self.assertFalse(np.array_equal(actual, self.pixels))
+        np.testing.assert_array_equal(actual, expected)
+
+    def test_selection_fills_missing_geometry(self):
+        selection = [(5, 5), (45, 5), (45, 35), (5, 35)]
+        with_rect = run_recipe(self.pixels.copy(), STEPS[:1])
+        with_selection = run_recipe(self.pixels.copy(), [{'op': 'mosaic', 'block_size': 10}], selection)
+        np.testing.assert_array_equal(with_selection, with_rect)
+
+    def test_validation(self):
+        for steps in ({'op': 'mosaic'}, [{'op': 'sharpen'}], [{'op': 'blur'}], [{'op': 'text', 'rect': [0, 0, 1, 1]}]):
+            with self.subTest(steps=steps):
+                with self.assertRaises(ValueError):
+                    validate_steps(steps)
+
+    def test_validation_checks_parameter_types(self):
+        for step in ({'op': 'mosaic', 'rect': [0, 0, 10, 10], 'block_size': "10"},
+                     {'op': 'mosaic', 'rect': [0, 0, 10, 10], 'block_size': [4, 0]},
+                     {'op': 'blur', 'rect': [0, 0, 10, 10], 'intensity': 9.5},
+                     {'op': 'blur', 'rect': [0, 0, 10]},
+                     {'op': 'text', 'polygon': [[0, 0], [5]], 'text': "A"},
+                     {'op': 'text', 'rect': [0, 0, 10, 10], 'text': 5},
+                     {'op': 'camera', 'timer': 10},
+                     {'op': 'redact', 'targets': "face"}):
+            with self.subTest(step=step):
+                with self.assertRaises(ValueError):
+                    validate_steps([step])
+        validate_steps([{'op': 'mosaic', 'rect': [0, 0, 10, 10], 'block_size': [4, 8]}])
+
+    @unittest.skipUnless(yaml, "PyYAML is not installed")
+    def test_malformed_yaml_raises_value_error(self):
+        with tempfile.TemporaryDirectory() as tempdir:
+            path = os.path.join(tempdir, 'recipe.yaml')
+            with open(path, 'w') as f:
+                f.write("steps: [\n  {op: mosaic, rect: [0, 0, 10, 10]\n")
+            with self.assertRaises(ValueError) as context:
+                load_recipe(path)
+            self.assertIn(path, str(context.exception))
+
+    def test_save_and_load(self):
+        with tempfile.TemporaryDirectory() as tempdir:
+            for name in ['recipe.json'] + (['recipe.yaml'] if yaml else []):
+                with self.subTest(name=name):
+                    path = os.path.join(tempdir, name)
+                    save_recipe(path, STEPS)
+                    self.assertEqual(load_recipe(path), STEPS)
+
+            path = os.path.join(tempdir, 'list.json')
+            with open(path, 'w') as f:
+                json.dump(STEPS, f)
+            self.assertEqual(load_recipe(path), STEPS)
+
+
+if __name__ == '__main__':
+    unittest.main()
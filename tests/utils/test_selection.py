@@ -0,0 +1,147 @@
+import os
+import sys
+import tempfile
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+from PIL import Image, ImageDraw
+
+# Get project root directory
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '../..'))
+
+# Add project root directory to Python path
+sys.path.insert(0, project_root)
+
+# Import
+from utils.selection import (Selection, SelectionCache, MultiSelection, PolylineSimplifier, combine,
+                             load_selections, save_selections, _segment_distance)
+from utils.image_utils import apply_mosaic, apply_optimized_motion_blur_to_polygon
+
+
+def full_mask(polygon, size):
+    mask = Image.new('L', size, 0)
+    ImageDraw.Draw(mask).polygon(polygon, outline=1, fill=1)
+    return np.array(mask) == 1
+
+
+class TestSelection(unittest.TestCase):
+    def setUp(self):
+        self.polygon = [(-5, 12), (40, 3), (70, 45), (22, 58)]
+        self.size = (64, 50)
+        self.selection = Selection(self.polygon)
+
+    def test_mask_is_cropped_and_cached(self):
+        box, mask = self.selection.mask(self.size)
+        self.assertEqual(box, (0, 3, 64, 50))
+        self.assertFalse(mask.flags.writeable)
+        self.assertIs(self.selection.mask(self.size)[1], mask)
+
+        expected = full_mask(self.polygon, self.size)
+        for box in ((0, 0, 64, 50), (8, 8, 30, 40), (60, 0, 64, 10)):
+            with self.subTest(box=box):
+                left, top, right, bottom = box
+                np.testing.assert_array_equal(self.selection.mask_in(box, self.size),
+                                              expected[top:bottom, left:right])
+
+    def test_mask_matches_full_image_rasterization(self):
+        rng = np.random.default_rng(0)
+        for _ in range(2000):
+            size = (int(rng.integers(20, 250)), int(rng.integers(20, 250)))
+            polygon = [(int(rng.integers(-20, size[0] + 20)), int(rng.integers(-20, size[1] + 20)))
+                       for _ in range(int(rng.integers(3, 8)))]
+            selection = Selection(polygon)
+            mask = selection.mask_in((0, 0) + size, size)
+            if not np.array_equal(mask, full_mask(polygon, size)):
+                self.fail(f"{polygon} on {size} differs from the full-image mask")
+
+    def test_effects_reuse_mask(self):
+        image = Image.new('RGBA', self.size, (255, 0, 0, 255))
+        apply_mosaic(image, self.selection, 8)
+        mask = self.selection.mask(self.size)[1]
+        apply_mosaic(image, self.selection, 4)
+        self.assertIs(self.selection.mask(self.size)[1], mask)
+
+    def test_cache_keys_on_points(self):
+        cache = SelectionCache(max_entries=2)
+        first = cache.get(self.polygon)
+        self.assertIs(cache.get([list(point) for point in self.polygon]), first)
+        cache.get([(0, 0), (1, 1), (0, 1)])
+        cache.get([(0, 0), (2, 2), (0, 2)])
+        self.assertIsNot(cache.get(self.polygon), first)
+        self.assertEqual(cache.stats()['hits'], 1)
+
+    def test_concurrent_lookups(self):
+        cache = SelectionCache(max_entries=3)
+        with ThreadPoolExecutor(8) as executor:
+            selections = list(executor.map(lambda i: cache.get([(0, 0), (i % 5, 9), (0, 9)]), range(2000)))
+        self.assertTrue(all(selection.points[1] == (i % 5, 9) for i, selection in enumerate(selections)))
+        stats = cache.stats()
+        self.assertEqual(stats['hits'] + stats['misses'], 2000)
+        self.assertLessEqual(stats['size'], 3)
+
+
+class TestMultiSelection(unittest.TestCase):
+    POLYGONS = [[(2, 3), (20, 3), (20, 15), (2, 15)], [(33, 30), (60, 35), (40, 48)]]
+
+    def setUp(self):
+        self.size = (64, 50)
+        rng = np.random.default_rng(0)
+        self.image = Image.fromarray(rng.integers(0, 256, (50, 64, 4), dtype=np.uint8), 'RGBA')
+
+    def test_combined_mask(self):
+        selection = combine(self.POLYGONS)
+        self.assertIsInstance(selection, MultiSelection)
+        self.assertEqual(selection.bounds(), (2, 3, 60, 48))
+        expected = full_mask(self.POLYGONS[0], self.size) | full_mask(self.POLYGONS[1], self.size)
+        np.testing.assert_array_equal(selection.mask_in((0, 0) + self.size, self.size), expected)
+        self.assertEqual(combine(self.POLYGONS[:1]), Selection(self.POLYGONS[0]))
+
+    def test_effects_match_one_pass_per_polygon(self):
+        for name, effect in (('mosaic', lambda image, polygon: apply_mosaic(image, polygon, 8)),
+                             ('blur', lambda image, polygon: apply_optimized_motion_blur_to_polygon(
+                                 image, polygon, 9, 30, in_place=True))):
+            with self.subTest(effect=name):
+                expected, actual = self.image.copy(), self.image.copy()
+                for polygon in self.POLYGONS:
+                    effect(expected, polygon)
+                effect(actual, MultiSelection(self.POLYGONS))
+                np.testing.assert_array_equal(np.array(actual), np.array(expected))
+
+    def test_load_and_save(self):
+        with tempfile.TemporaryDirectory() as tempdir:
+            path = os.path.join(tempdir, 'selections.json')
+            save_selections(path, self.POLYGONS)
+            self.assertEqual(load_selections(path), self.POLYGONS)
+
+            with open(path, 'w', encoding='utf-8') as f:
+                f.write('[{"rect": [1, 2, 3, 4]}, [[0, 0], [5, 5], [0, 5]]]')
+            self.assertEqual(load_selections(path), [[(1, 2), (4, 2), (4, 6), (1, 6)], [(0, 0), (5, 5), (0, 5)]])
+
+            with open(path, 'w', encoding='utf-8') as f:
+                f.write('[{"size": 3}]')
+            with self.assertRaises(ValueError):
+                load_selections(path)
+
+
+
+class TestPolylineSimplifier(unittest.TestCase):
+    def test_dropped_points_stay_within_tolerance(self):
+        rng = np.random.default_rng(0)
+        angles = np.linspace(0, 3 * np.pi, 2000)
+        points = [(int(round(200 + 150 * np.cos(a) + rng.normal(0, 0.3))), int(round(200 + 100 * np.sin(a))))
+                  for a in angles]
+        simplifier = PolylineSimplifier(points[0], 1.5)
+        for point in points[1:]:
+            simplifier.add(point)
+
+        vertices = simplifier.points
+        self.assertLess(len(vertices), len(points) // 10)
+        self.assertEqual((vertices[0], vertices[-1]), (points[0], points[-1]))
+        for point in points:
+            distance = min(_segment_distance(point, start, end) for start, end in zip(vertices, vertices[1:]))
+            self.assertLessEqual(distance, 1.5)
+
+
+if __name__ == '__main__':
+    unittest.main()
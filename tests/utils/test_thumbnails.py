@@ -0,0 +1,54 @@
+import os
+import sys
+import tempfile
+import unittest
+
+import numpy as np
+from PIL import Image
+
+# Get project root directory
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '../..'))
+
+# Add project root directory to Python path
+sys.path.insert(0, project_root)
+
+# Import
+from utils.thumbnails import ThumbnailCache, make_thumbnail
+
+
+class TestThumbnails(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.addCleanup(self.directory.cleanup)
+        self.cache = ThumbnailCache(os.path.join(self.directory.name, 'cache'), size=64)
+        self.path = os.path.join(self.directory.name, 'photo.jpg')
+        pixels = np.random.default_rng(0).integers(0, 256, (600, 800, 3), dtype=np.uint8)
+        Image.fromarray(pixels).save(self.path)
+
+    def test_thumbnail_fits_size(self):
+        thumbnail = make_thumbnail(self.path, 64)
+        self.assertEqual((thumbnail.size, thumbnail.mode), ((64, 48), 'RGBA'))
+
+    def test_entries_are_reused_until_the_file_changes(self):
+        self.assertIsNone(self.cache.cached(self.path))
+        entry = self.cache.ensure(self.path)
+        self.assertEqual(self.cache.cached(self.path), entry)
+        with Image.open(entry) as image:
+            self.assertEqual(image.size, (64, 48))
+
+        stat = os.stat(self.path)
+        os.utime(self.path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10 ** 9))
+        self.assertIsNone(self.cache.cached(self.path))
+        self.assertNotEqual(self.cache.ensure(self.path), entry)
+
+    def test_unreadable_files(self):
+        path = os.path.join(self.directory.name, 'broken.jpg')
+        with open(path, 'wb') as f:
+            f.write(b'not an image')
+        with self.assertRaises(OSError):
+            self.cache.ensure(path)
+        self.assertIsNone(self.cache.cached(os.path.join(self.directory.name, 'missing.jpg')))
+
+
+if __name__ == '__main__':
+    unittest.main()
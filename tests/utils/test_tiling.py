@@ -0,0 +1,123 @@
+import os
+import sys
+import time
+import tracemalloc
+import unittest
+
+import numpy as np
+from PIL import Image
+
+# Get project root directory
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '../..'))
+
+# Add project root directory to Python path
+sys.path.insert(0, project_root)
+
+# Import
+from utils.tiling import tile_boxes, tile_scheduler, set_low_memory, part_progress
+from utils.image_utils import apply_mosaic, apply_optimized_motion_blur_to_polygon
+
+
+class TestTiling(unittest.TestCase):
+    def setUp(self):
+        self.tile_size, self.workers = tile_scheduler.tile_size, tile_scheduler.workers
+
+    def tearDown(self):
+        tile_scheduler.tile_size = self.tile_size
+        tile_scheduler.set_workers(self.workers)
+        set_low_memory(None)
+
+    def test_tiles_cover_area_in_whole_blocks(self):
+        tiles = tile_boxes(50, 23, 16, align=5)
+        self.assertEqual(tiles[:4], [(0, 0, 15, 15), (15, 0, 30, 15), (30, 0, 45, 15), (45, 0, 50, 15)])
+        covered = np.zeros((23, 50), dtype=int)
+        for left, top, right, bottom in tiles:
+            covered[top:bottom, left:right] += 1
+        self.assertTrue((covered == 1).all())
+
+    def _effects(self, peaks=None):
+        rng = np.random.default_rng(0)
+        pixels = rng.integers(0, 256, (180, 240, 4), dtype=np.uint8)
+        polygon = [(5, 9), (230, 20), (200, 170), (30, 150)]
+        results = []
+        for effect in (lambda image: apply_mosaic(image, polygon, 7),
+                       lambda image: apply_optimized_motion_blur_to_polygon(image, polygon, 20, 30, in_place=True)):
+            image = Image.fromarray(pixels.copy(), 'RGBA')
+            if peaks is None:
+                effect(image)
+            else:
+                # Peak NumPy allocations of the effect alone
+                tracemalloc.start()
+                try:
+                    effect(image)
+                    peaks.append(tracemalloc.get_traced_memory()[1])
+                finally:
+                    tracemalloc.stop()
+            results.append(np.asarray(image))
+        return results
+
+    def test_worker_count_does_not_change_results(self):
+        tile_scheduler.tile_size = 40
+        tile_scheduler.set_workers(1)
+        serial = self._effects()
+        tile_scheduler.set_workers(4)
+        for serial_result, parallel_result in zip(serial, self._effects()):
+            np.testing.assert_array_equal(serial_result, parallel_result)
+
+    def test_strips_fit_the_cap(self):
+        tile_scheduler.tile_size = 100
+        tile_scheduler.set_workers(2)
+        self.assertEqual(tile_scheduler.strips(300, 250, 8, 32), [(0, 250)])
+
+        set_low_memory(300 * 40 * 8 + 2 * 100 * 40 * 32)
+        strips = tile_scheduler.strips(300, 250, 8, 32, align=(7, 20))
+        self.assertEqual(strips, [(0, 40), (40, 80), (80, 120), (120, 160), (160, 200), (200, 240), (240, 250)])
+        set_low_memory(1)
+        self.assertEqual(tile_scheduler.strips(300, 250, 8, 32, align=(7, 20))[0], (0, 20))
+
+    def test_progress_is_reported_per_tile_across_strips(self):
+        tile_scheduler.tile_size = 40
+        set_low_memory(64 * 1024)
+        for workers in (1, 4):
+            with self.subTest(workers=workers):
+                tile_scheduler.set_workers(workers)
+                reports = []
+                image = Image.new('RGBA', (240, 180))
+                apply_mosaic(image, [(0, 0), (239, 0), (239, 179), (0, 179)], 8,
+                             lambda done, total: reports.append(done / total))
+                self.assertGreater(len(reports), 10)
+                self.assertEqual(reports, sorted(reports))
+                self.assertEqual(reports[-1], 1.0)
+
+    def test_progress_exception_stops_the_run(self):
+        tile_scheduler.set_workers(4)
+        ran = []
+
+        def tile(index):
+            time.sleep(0.01)
+            ran.append(index)
+
+        def progress(done, total):
+            raise KeyboardInterrupt()
+
+        with self.assertRaises(KeyboardInterrupt):
+            tile_scheduler.run(tile, list(range(200)), progress)
+        time.sleep(0.6)  # Long enough for every tile to run, had they not been dropped
+        self.assertLess(len(ran), 20)
+        self.assertEqual(part_progress(None, 0, 2), None)
+        self.assertEqual(part_progress(lambda done, total: done / total, 1, 4)(1, 2), 0.375)
+
+    def test_low_memory_mode(self):
+        default_peaks, low_memory_peaks = [], []
+        default = self._effects(default_peaks)  # Also caches the selection mask
+        set_low_memory(256 * 1024)
+        low_memory = self._effects(low_memory_peaks)
+        np.testing.assert_array_equal(low_memory[0], default[0])
+        self.assertLessEqual(np.abs(low_memory[1].astype(int) - default[1]).max(), 1)
+        for default_peak, low_memory_peak in zip(default_peaks, low_memory_peaks):
+            self.assertLess(low_memory_peak, 256 * 1024)
+            self.assertLess(low_memory_peak, default_peak / 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,144 @@
+import os
+import struct
+import sys
+import tempfile
+import unittest
+
+import numpy as np
+from PIL import Image
+
+# Get project root directory
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '../..'))
+
+# Add project root directory to Python path
+sys.path.insert(0, project_root)
+
+# Import
+from utils import working_buffer
+from utils.working_buffer import WorkingBuffer, image_pixel_count, open_image
+from utils.recipe import run_recipe
+
+
+def write_tiled_tiff(path, pixels, tile=16):
+    """Write a grayscale array as an uncompressed TIFF stored in tile x tile tiles"""
+    height, width = pixels.shape
+    padded = np.zeros((-(-height // tile) * tile, -(-width // tile) * tile), np.uint8)
+    padded[:height, :width] = pixels
+    tiles = [padded[y:y + tile, x:x + tile].tobytes()
+             for y in range(0, padded.shape[0], tile) for x in range(0, padded.shape[1], tile)]
+    entries = [(256, 4, 1, width), (257, 4, 1, height), (258, 3, 1, 8), (259, 3, 1, 1), (262, 3, 1, 1),
+               (277, 3, 1, 1), (322, 3, 1, tile), (323, 3, 1, tile)]
+    ifd_size = 2 + 12 * (len(entries) + 2) + 4
+    offsets_at = 8 + ifd_size
+    counts_at = offsets_at + 4 * len(tiles)
+    data_at = counts_at + 4 * len(tiles)
+    entries += [(324, 4, len(tiles), offsets_at), (325, 4, len(tiles), counts_at)]
+    with open(path, 'wb') as f:
+        f.write(b'II' + struct.pack('<HI', 42, 8) + struct.pack('<H', len(entries)))
+        for tag, kind, count, value in entries:
+            f.write(struct.pack('<HHIHH' if kind == 3 else '<HHII', tag, kind, count, value, *((0,) if kind == 3 else ())))
+        f.write(struct.pack('<I', 0))
+        f.write(struct.pack(f'<{len(tiles)}I', *(data_at + i * tile * tile for i in range(len(tiles)))))
+        f.write(struct.pack(f'<{len(tiles)}I', *([tile * tile] * len(tiles))))
+        f.write(b''.join(tiles))
+
+
+class TestWorkingBuffer(unittest.TestCase):
+    def setUp(self):
+        self.tempdir = tempfile.TemporaryDirectory()
+        rng = np.random.default_rng(0)
+        self.pixels = rng.integers(0, 256, (90, 130, 3), dtype=np.uint8)
+        self.path = os.path.join(self.tempdir.name, 'source.png')
+        Image.fromarray(self.pixels).save(self.path)
+        # Small strips so the strip-wise code paths loop several times
+        self.buffer = WorkingBuffer.from_file(self.path, self.tempdir.name, overview_side=32, strip_bytes=130 * 4 * 7)
+
+    def tearDown(self):
+        self.buffer.close()
+        self.tempdir.cleanup()
+
+    def test_decodes_into_scratch_file(self):
+        self.assertEqual(image_pixel_count(self.path), 90 * 130)
+        self.assertEqual(self.buffer.size, (130, 90))
+        self.assertTrue(os.path.exists(self.buffer.path))
+        np.testing.assert_array_equal(self.buffer.array[..., :3], self.pixels)
+        self.assertTrue((self.buffer.array[..., 3] == 255).all())
+
+    def test_uncompressed_files_are_read_strip_by_strip(self):
+        rgba = np.dstack([self.pixels, self.pixels[..., 0]])
+        for name, pixels in (('bottom_up.bmp', self.pixels), ('rgba.tif', rgba), ('gray.ppm', self.pixels[..., 0]),
+                             ('tiled.tif', self.pixels[..., 1])):
+            with self.subTest(name=name):
+                path = os.path.join(self.tempdir.name, name)
+                if name == 'tiled.tif':
+                    write_tiled_tiff(path, pixels)
+                else:
+                    Image.fromarray(pixels).save(path)
+                with Image.open(path) as image:
+                    self.assertIsNotNone(working_buffer._raw_tiles(image))
+                    expected = np.asarray(image.convert('RGBA'))
+                buffer = WorkingBuffer.from_file(path, self.tempdir.name, strip_bytes=130 * 4 * 7)
+                np.testing.assert_array_equal(buffer.array, expected)
+                buffer.close()
+
+    def test_pixel_limit_is_checked_per_call(self):
+        self.assertIsNotNone(Image.MAX_IMAGE_PIXELS)
+        with self.assertRaises(ValueError):
+            open_image(self.path, max_pixels=90 * 130 - 1)
+        open_image(self.path, max_pixels=90 * 130).close()
+
+        # Images beyond PIL's own limit open without changing it
+        limit = Image.MAX_IMAGE_PIXELS
+        Image.MAX_IMAGE_PIXELS = 1000
+        try:
+            with self.assertRaises(Image.DecompressionBombError):
+                Image.open(self.path)
+            with open_image(self.path) as image:
+                self.assertEqual(image.size, (130, 90))
+            self.assertEqual(Image.MAX_IMAGE_PIXELS, 1000)
+        finally:
+            Image.MAX_IMAGE_PIXELS = limit
+
+    def test_whole_decodes_over_the_limit_are_refused(self):
+        with self.assertRaises(ValueError) as context:
+            WorkingBuffer.from_file(self.path, self.tempdir.name, max_decode_bytes=90 * 130 * 4 - 1)
+        self.assertIn(self.path, str(context.exception))
+        buffer = WorkingBuffer.from_file(self.path, self.tempdir.name, max_decode_bytes=90 * 130 * 4)
+        np.testing.assert_array_equal(buffer.array[..., :3], self.pixels)
+        buffer.close()
+
+    def test_overview_is_block_mean(self):
+        f = self.buffer.factor
+        self.assertEqual(f, 5)
+        self.assertEqual(self.buffer.overview.shape, (18, 26, 4))
+        expected = (self.buffer.array[:f, :f].reshape(-1, 4).sum(axis=0) + f * f // 2) // (f * f)
+        np.testing.assert_array_equal(self.buffer.overview[0, 0], expected)
+
+    def test_effect_on_snapshot_leaves_buffer_until_written(self):
+        snapshot = self.buffer.snapshot()
+        run_recipe(snapshot, [{'op': 'mosaic', 'rect': [20, 10, 30, 25], 'block_size': 5}])
+        np.testing.assert_array_equal(self.buffer.array[..., :3], self.pixels)
+
+        rect = self.buffer.changed_rect(snapshot)
+        x, y, width, height = rect
+        self.assertTrue(x >= 20 and y >= 10 and x + width <= 51 and y + height <= 36)
+
+        before = self.buffer.overview.copy()
+        self.buffer.write(rect, snapshot[y:y + height, x:x + width])
+        np.testing.assert_array_equal(self.buffer.array, snapshot)
+        changed = np.argwhere((before != self.buffer.overview).any(axis=-1))
+        self.assertTrue((changed >= [y // 5, x // 5]).all())
+        self.assertTrue((changed < [-(-(y + height) // 5), -(-(x + width) // 5)]).all())
+
+        in_memory = np.array(Image.open(self.path).convert('RGBA'))
+        run_recipe(in_memory, [{'op': 'mosaic', 'rect': [20, 10, 30, 25], 'block_size': 5}])
+        np.testing.assert_array_equal(self.buffer.array, in_memory)
+
+    def test_close_removes_scratch_file(self):
+        path = self.buffer.path
+        self.buffer.close()
+        self.assertFalse(os.path.exists(path))
+
+
+if __name__ == '__main__':
+    unittest.main()
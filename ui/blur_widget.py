@@ -1,13 +1,13 @@
 from PyQt5.QtWidgets import (QLabel, QVBoxLayout, QWidget, QPushButton, 
                            QSlider, QHBoxLayout, QSpinBox)
-from PyQt5.QtCore import Qt
+from PyQt5.QtCore import Qt, QTimer
 from PyQt5.QtGui import QPixmap, QPainter, QPen
 
 from utils.image_utils import (
-    pixmap_to_pil_image_with_alpha, 
-    pil_image_to_qimage_with_alpha, 
-    apply_optimized_motion_blur_to_polygon
+    apply_optimized_motion_blur_to_polygon,
+    warm_motion_blur_kernels
 )
+from utils.qimage_bridge import array_to_pil_image
 from config.settings import Settings
 
 
@@ -17,8 +17,15 @@ class BlurWidget(QWidget):
         self.blur_intensity = Settings.Blur.INTENSITY['DEFAULT']
         self.blur_angle = Settings.Blur.ANGLE['DEFAULT']
         self.image_and_selection_source = image_and_selection_source
+        warm_motion_blur_kernels()
         self._initUI()
 
+        # Render the live preview once the sliders have settled
+        self._previewTimer = QTimer(self)
+        self._previewTimer.setSingleShot(True)
+        self._previewTimer.setInterval(Settings.Image.Preview.DEBOUNCE_MS)
+        self._previewTimer.timeout.connect(self._updatePreview)
+
     def _initUI(self):
         """Initialize the user interface"""
         layout = QVBoxLayout()
@@ -145,6 +152,7 @@ class BlurWidget(QWidget):
         """Update blur intensity based on slider value"""
         self.blur_intensity = value
         self.intensityLabel.setText(Settings.Blur.INTENSITY_LABEL_TEXT.format(self.blur_intensity))
+        self._previewTimer.start()
 
     def _changeBlurAngle(self, value):
         """Update blur angle based on slider value"""
@@ -155,24 +163,36 @@ class BlurWidget(QWidget):
         else:
             self.angleSlider.setValue(value)
         self._updateAnglePreview()
+        self._previewTimer.start()
+
+    def _updatePreview(self):
+        """Show the current blur settings on a proxy of the visible selection"""
+        self.image_and_selection_source.showPreview(
+            {'op': 'blur', 'intensity': self.blur_intensity, 'angle': self.blur_angle}
+        )
 
     def applyBlur(self):
-        """Apply motion blur effect to the selected area"""
+        """Apply motion blur effect to the selected area on a worker thread"""
+        self._previewTimer.stop()
         pixmap = self.image_and_selection_source.getImage()
         selection_polygon = self.image_and_selection_source.getSelectionPolygon()
 
         if pixmap and len(selection_polygon) > 0:
-            # Convert QPixmap to PIL Image
-            pil_image = pixmap_to_pil_image_with_alpha(pixmap)
-            
-            # Apply motion blur effect
-            result_image = apply_optimized_motion_blur_to_polygon(
-                pil_image, 
-                selection_polygon, 
-                self.blur_intensity,
-                self.blur_angle
+            intensity, angle = self.blur_intensity, self.blur_angle
+
+            def effect(image_array, job):
+                apply_optimized_motion_blur_to_polygon(
+                    array_to_pil_image(image_array),
+                    selection_polygon,
+                    intensity,
+                    angle,
+                    in_place=True,
+                    progress=job.reportProgress
+                )
+
+            self.image_and_selection_source.runEffect(
+                Settings.Blur.EFFECT_NAME,
+                effect,
+                self.image_and_selection_source.getSelectionRect(),
+                [{'op': 'blur', 'intensity': intensity, 'angle': angle}]
             )
-            
-            # Convert back to QPixmap and update image
-            result_pixmap = QPixmap.fromImage(pil_image_to_qimage_with_alpha(result_image))
-            self.image_and_selection_source.setImage(result_pixmap) 
\ No newline at end of file
@@ -1,12 +1,10 @@
 from PyQt5.QtWidgets import QLabel, QVBoxLayout, QWidget, QPushButton, QSlider, QLineEdit
 from PyQt5.QtCore import Qt
-from PyQt5.QtGui import QPixmap
 
 from utils.image_utils import (
-    pixmap_to_pil_image_with_alpha, 
-    pil_image_to_qimage_with_alpha, 
     add_camera_effect
 )
+from utils.qimage_bridge import array_to_pil_image
 from config.settings import Settings
 
 class CameraWidget(QWidget):
@@ -59,16 +57,17 @@ class CameraWidget(QWidget):
         self.batteryLabel.setText(Settings.Camera.BATTERY_LABEL_TEXT.format(self.batteryLevel))
 
     def applyCameraEffect(self):
-        """Apply camera effect to the image"""
+        """Apply camera effect to the image on a worker thread"""
         pixmap = self.image_and_selection_source.getImage()
 
         if pixmap:
-            # Convert QPixmap to PIL Image
-            pil_image = pixmap_to_pil_image_with_alpha(pixmap)
-            
-            # Apply camera effect
-            add_camera_effect(pil_image, self.batteryLevel, self.timerInput.text())
-            
-            # Convert back to QPixmap and update image
-            result_pixmap = pil_image_to_qimage_with_alpha(pil_image)
-            self.image_and_selection_source.setImage(QPixmap.fromImage(result_pixmap)) 
\ No newline at end of file
+            battery_level, timer_text = self.batteryLevel, self.timerInput.text()
+
+            def effect(image_array, job):
+                add_camera_effect(array_to_pil_image(image_array), battery_level, timer_text)
+
+            self.image_and_selection_source.runEffect(
+                Settings.Camera.EFFECT_NAME,
+                effect,
+                steps=[{'op': 'camera', 'battery': battery_level, 'timer': timer_text}]
+            )
@@ -0,0 +1,182 @@
+import threading
+from collections import deque
+
+from PyQt5.QtCore import QObject, QRunnable, QThreadPool, QCoreApplication, QEventLoop, pyqtSignal
+
+from utils.instrumentation import OperationTrace, activate
+
+
+class EffectCancelled(Exception):
+    """Raised inside an effect when its job has been cancelled"""
+
+
+class EffectJob(QObject):
+    """One queued effect and the signals it reports through
+
+    The effect is called on a worker thread as effect(image_array, job) and
+    edits the (H, W, 4) RGBA array in place. It reports progress through
+    job.setProgress(), or by passing job.reportProgress as the progress
+    callback of a mosaic, blur or recipe, which is then called as each tile
+    finishes. Either also stops the effect early once the job is cancelled.
+
+    trace times the job's stages: to_numpy (getImage), compute (the effect)
+    and whatever the effect and the commit record through
+    utils.instrumentation.stage(). steps are the recipe steps the effect
+    performs, if any, for the commit to record in a project.
+    """
+    progress = pyqtSignal(int)
+    finished = pyqtSignal(object)
+    failed = pyqtSignal(str)
+    cancelled = pyqtSignal()
+
+    def __init__(self, name, effect, dirtyRect=None, steps=None):
+        super().__init__()
+        self.name = name
+        self.effect = effect
+        self.dirtyRect = dirtyRect
+        self.steps = steps
+        self.trace = None  # OperationTrace, created when the job starts
+        self._cancelled = threading.Event()
+        self._percent = None  # Last percentage emitted
+
+    def cancel(self):
+        self._cancelled.set()
+
+    def isCancelled(self):
+        return self._cancelled.is_set()
+
+    def setProgress(self, percent):
+        """Report progress in percent, raising EffectCancelled if cancelled"""
+        if self.isCancelled():
+            raise EffectCancelled()
+        percent = int(percent)
+        if percent != self._percent:
+            self._percent = percent
+            self.progress.emit(percent)
+
+    def reportProgress(self, done, total):
+        """Report done of total units of work, see setProgress()"""
+        self.setProgress(100 * done / total if total else 100)
+
+
+class _EffectTask(QRunnable):
+    def __init__(self, job, image_array):
+        super().__init__()
+        self.job = job
+        self.image_array = image_array
+
+    def run(self):
+        try:
+            self.job.setProgress(0)
+            with activate(self.job.trace), self.job.trace.stage('compute'):
+                self.job.effect(self.image_array, self.job)
+            self.job.setProgress(100)
+        except EffectCancelled:
+            self.job.cancelled.emit()
+        except Exception as e:
+            self.job.failed.emit(f"{self.job.name}: {e}")
+        else:
+            self.job.finished.emit(self.image_array)
+
+
+class EffectRunner(QObject):
+    """Run effects one at a time on a worker thread
+
+    Effects submitted while one is running are queued. Each job takes its own
+    copy of the current image when it starts, so it sees the result of the
+    jobs before it, and the result is only committed once the effect has
+    finished.
+    """
+    started = pyqtSignal(str)
+    progress = pyqtSignal(int)
+    failed = pyqtSignal(str)
+    idle = pyqtSignal()
+    jobDone = pyqtSignal(object)  # The EffectJob, with trace.status 'ok', 'failed' or 'cancelled'
+
+    def __init__(self, getImage, commit, parent=None):
+        """
+        Args:
+            getImage: Callable returning a copy of the current image as an
+                (H, W, 4) RGBA uint8 array for a job to edit, or None
+            commit: Callable taking (image_array, dirtyRect) to show the result
+        """
+        super().__init__(parent)
+        self._getImage = getImage
+        self._commit = commit
+        self._queue = deque()
+        self._current = None
+        self._pool = QThreadPool(self)
+        self._pool.setMaxThreadCount(1)
+
+    def isBusy(self):
+        return self._current is not None or bool(self._queue)
+
+    @property
+    def current(self):
+        """The EffectJob running or being committed, or None"""
+        return self._current
+
+    def submit(self, name, effect, dirtyRect=None, steps=None):
+        """Queue an effect and return its EffectJob"""
+        job = EffectJob(name, effect, dirtyRect, steps)
+        self._queue.append(job)
+        if self._current is None:
+            self._startNext()
+        return job
+
+    def cancel(self):
+        """Cancel the running effect and drop the queued ones"""
+        self._queue.clear()
+        if self._current is not None:
+            self._current.cancel()
+
+    def waitForDone(self):
+        """Block until every queued effect has been committed or dropped"""
+        while self.isBusy():
+            QCoreApplication.processEvents(QEventLoop.AllEvents | QEventLoop.WaitForMoreEvents, 50)
+
+    def _startNext(self):
+        self._current = None
+        while self._queue:
+            job = self._queue.popleft()
+            job.trace = OperationTrace(job.name)
+            with job.trace.stage('to_numpy'):
+                image_array = self._getImage()
+            if image_array is None:
+                continue
+
+            self._current = job
+            job.progress.connect(self.progress)
+            job.finished.connect(self._onFinished)
+            job.failed.connect(self._onFailed)
+            job.cancelled.connect(self._onCancelled)
+            self.started.emit(job.name)
+            self._pool.start(_EffectTask(job, image_array))
+            return
+        self.idle.emit()
+
+    def _onFinished(self, image_array):
+        job = self._current
+        if job.isCancelled():
+            job.trace.close('cancelled')
+        else:
+            with activate(job.trace):
+                self._commit(image_array, job.dirtyRect)
+            job.trace.close()
+        self._finishJob(job)
+
+    def _onFailed(self, message):
+        job = self._current
+        job.trace.fields['error'] = message
+        job.trace.close('failed')
+        self.failed.emit(message)
+        self._finishJob(job)
+
+    def _onCancelled(self):
+        job = self._current
+        job.trace.close('cancelled')
+        self._finishJob(job)
+
+    def _finishJob(self, job):
+        self.jobDone.emit(job)
+        self._startNext()
@@ -0,0 +1,89 @@
+import os
+
+from PyQt5.QtWidgets import QLabel, QVBoxLayout, QWidget, QPushButton, QListWidget, QListWidgetItem, QListView, QFileDialog
+from PyQt5.QtCore import Qt, QSize
+from PyQt5.QtGui import QIcon, QPixmap
+
+from ui.thumbnail_loader import ThumbnailLoader
+from utils.batch_processing import collect_inputs
+from utils.thumbnails import thumbnail_cache
+from config.settings import Settings
+
+
+class FolderBrowserWidget(QWidget):
+    """Thumbnails of the images in a folder; double-click one to open it"""
+    def __init__(self, image_and_selection_source, cache=None):
+        """
+        Args:
+            cache: ThumbnailCache to use, defaults to the one in Settings.Thumbnails.CACHE_DIR
+        """
+        super().__init__()
+        self.folder = None
+        self.paths = []
+        self.image_and_selection_source = image_and_selection_source
+        self._loader = ThumbnailLoader(cache or thumbnail_cache, Settings.Thumbnails.WORKERS, self)
+        self._loader.loaded.connect(self._onThumbnail)
+        self._generation = 0
+        self._initUI()
+
+    def _initUI(self):
+        """Initialize the user interface"""
+        layout = QVBoxLayout()
+
+        # Open folder button
+        self.openFolderButton = QPushButton(
+            Settings.get_button_text_with_shortcut(Settings.ButtonText.File.OPEN_FOLDER),
+            self
+        )
+        self.openFolderButton.clicked.connect(self._openFolder)
+        self.openFolderButton.setFixedHeight(Settings.Common.Sizes.BUTTON_HEIGHT)
+        layout.addWidget(self.openFolderButton)
+
+        # Folder label
+        self.folderLabel = QLabel(Settings.Thumbnails.EMPTY_TEXT, self)
+        self.folderLabel.setFixedHeight(Settings.Common.Sizes.LABEL_HEIGHT)
+        layout.addWidget(self.folderLabel)
+
+        # Thumbnail grid
+        size = Settings.Thumbnails.SIZE
+        self.thumbnailList = QListWidget(self)
+        self.thumbnailList.setViewMode(QListView.IconMode)
+        self.thumbnailList.setIconSize(QSize(size, size))
+        self.thumbnailList.setResizeMode(QListView.Adjust)
+        self.thumbnailList.setMovement(QListView.Static)
+        self.thumbnailList.setUniformItemSizes(True)
+        self.thumbnailList.itemActivated.connect(self._openItem)
+        layout.addWidget(self.thumbnailList)
+
+        self.setLayout(layout)
+
+    def _openFolder(self):
+        folder = QFileDialog.getExistingDirectory(self, Settings.Thumbnails.OPEN_TITLE, self.folder or "")
+        if folder:
+            self.setFolder(folder)
+
+    def setFolder(self, folder):
+        """List the images in folder and load their thumbnails in the background"""
+        self.folder = folder
+        self.paths = collect_inputs([folder])
+        self.folderLabel.setText(Settings.Thumbnails.FOLDER_TEXT.format(
+            folder=os.path.basename(folder) or folder, count=len(self.paths)))
+        self.thumbnailList.clear()
+        for path in self.paths:
+            item = QListWidgetItem(os.path.basename(path))
+            item.setData(Qt.UserRole, path)
+            item.setToolTip(path)
+            self.thumbnailList.addItem(item)
+        self._generation = self._loader.load(self.paths)
+
+    def _onThumbnail(self, generation, index, image):
+        if generation == self._generation and not image.isNull():
+            self.thumbnailList.item(index).setIcon(QIcon(QPixmap.fromImage(image)))
+
+    def waitForThumbnails(self):
+        self._loader.waitForDone()
+
+    def _openItem(self, item):
+        """Open the image of a double-clicked (or activated) thumbnail"""
+        if not self.image_and_selection_source.isBusy():
+            self.image_and_selection_source.openImage(item.data(Qt.UserRole))
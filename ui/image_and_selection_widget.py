@@ -1,82 +1,80 @@
-from PyQt5.QtCore import Qt, QPoint
-from PyQt5.QtWidgets import (QVBoxLayout, QWidget, QPushButton, QFileDialog, 
-                           QScrollArea, QSlider, QLabel, QApplication)
-from PyQt5.QtGui import QPixmap, QPainter, QColor, QPen, QPolygon
-from config.settings import Settings
-
+import os
+import re
+from collections import deque
+from contextlib import contextmanager
 
-# Use mouse to select a rectangle or lasso region
-class SelectableLabel(QLabel):
-    def __init__(self, parent=None):
-        super().__init__(parent)
-        self.selection_polygon = QPolygon()
-        self.start_point = QPoint()
-        self.is_selecting = False
-        self.mode = Settings.Image.Selection.MODES['RECT']  # Default mode is rectangle
-
-    def toggleMode(self):
-        # Toggle between rectangle and lasso modes
-        self.mode = Settings.Image.Selection.MODES['LASSO'] if self.mode == Settings.Image.Selection.MODES['RECT'] else Settings.Image.Selection.MODES['RECT']
-
-    def mousePressEvent(self, event):
-        if event.button() == Qt.LeftButton:
-            self.is_selecting = True
-            self.start_point = event.pos()
-            self.selection_polygon = QPolygon()
-            self.selection_polygon.append(self.start_point)
-            self.update()
-
-    def mouseMoveEvent(self, event):
-        if self.is_selecting:
-            if self.mode == Settings.Image.Selection.MODES['RECT']:
-                # Calculate the rectangle points based on start and current points
-                current_point = event.pos()
-                self.selection_polygon = QPolygon([
-                    self.start_point,
-                    QPoint(current_point.x(), self.start_point.y()),
-                    current_point,
-                    QPoint(self.start_point.x(), current_point.y())
-                ])
-            elif self.mode == Settings.Image.Selection.MODES['LASSO']:
-                # Append the current point to create a free-form selection
-                self.selection_polygon.append(event.pos())
-            self.update()
-
-    def mouseReleaseEvent(self, event):
-        if event.button() == Qt.LeftButton:
-            self.is_selecting = False
-            self.update()
-
-    def paintEvent(self, event):
-        super().paintEvent(event)
-        if not self.selection_polygon.isEmpty():
-            painter = QPainter(self)
-            pen_color = QColor(*Settings.Image.Selection.PEN_COLOR)
-            painter.setPen(QPen(pen_color, Settings.Image.Selection.PEN_WIDTH, Qt.SolidLine))
-            painter.drawPolygon(self.selection_polygon)
+import numpy as np
+from PyQt5.QtCore import Qt, QRect, QSize, pyqtSignal
+from PyQt5.QtWidgets import (QVBoxLayout, QHBoxLayout, QWidget, QPushButton, QFileDialog, 
+                           QProgressBar, QMessageBox)
+from PyQt5.QtGui import QPixmap, QPainter
+from config.settings import Settings
+from utils.image_history import ImageHistory, changed_rect
+from utils.qimage_bridge import pixmap_to_array, array_to_qimage, array_to_pixmap
+from utils.preview import preview_region, proxy_size, scale_step
+from utils.recipe import run_recipe, validate_steps
+from utils.selection import load_selections
+from utils.project import Project, open_project, bind_selection
+from utils.working_buffer import WorkingBuffer, image_pixel_count
+from utils.instrumentation import instrumentation, activate, stage, format_trace
+from ui.effect_runner import EffectRunner
+from ui.tiled_image_view import SelectableImageView
+from ui.image_saver import ImageSaver
+from ui.save_options_dialog import SaveOptionsDialog
 
 
 # A main image widget to open, undo and save widget
 class ImageAndSelectionWidget(QWidget):
+    statusMessage = pyqtSignal(str)
+    operationMeasured = pyqtSignal(str)  # Timing summary of each finished operation
+
     def __init__(self):
         super().__init__()
-        self._imageHistory = []  # Store history images
-        self._redoHistory = []   # Store redo history
+        self._history = ImageHistory(  # Store changed-rect patches for undo/redo
+            Settings.Image.History.BUDGET_BYTES,
+            Settings.Image.History.COMPRESSION_LEVEL
+        )
+        self._buffer = None  # WorkingBuffer of an image too large to hold in RAM
+        self._project = None  # Project whose edits are shown on a proxy, see openProject()
+        self._proxyBase = None  # The project's proxy without edits, decoded on first use
+        self._proxy = None  # The proxy with every edit rendered, None while the cached one is shown
+        self._effectRunner = EffectRunner(self._effectImage, self._commitEffect, self)
+        self._saver = ImageSaver(self)
+        self._saveOptions = None  # Encoder options last chosen in the save dialog
+        self._saveTraces = deque()  # Traces of the queued saves, in order
         self._initUI()
         self.show()
 
     def _initUI(self):
         layout = QVBoxLayout()  # Main layout: vertical
 
-        # Scrollable image area
-        self.scrollArea = QScrollArea(self)
-        self.scrollArea.setWidgetResizable(True)
-        self.scrollArea.setHorizontalScrollBarPolicy(Qt.ScrollBarAsNeeded)
-        self.scrollArea.setVerticalScrollBarPolicy(Qt.ScrollBarAsNeeded)
+        # Zoomable, tiled image area
+        self.view = SelectableImageView(self)
+        layout.addWidget(self.view)
 
-        self.label = SelectableLabel(self)
-        self.scrollArea.setWidget(self.label)
-        layout.addWidget(self.scrollArea)
+        # Progress of the running effect, hidden while idle
+        progressLayout = QHBoxLayout()
+        self.progressBar = QProgressBar(self)
+        self.progressBar.setRange(0, 100)
+        self.progressBar.setFixedHeight(Settings.Common.Sizes.LABEL_HEIGHT)
+        progressLayout.addWidget(self.progressBar)
+
+        self.cancelButton = QPushButton(
+            Settings.get_button_text_with_shortcut(Settings.ButtonText.Edit.CANCEL),
+            self
+        )
+        self.cancelButton.clicked.connect(self.cancelEffects)
+        progressLayout.addWidget(self.cancelButton)
+        layout.addLayout(progressLayout)
+
+        self._effectRunner.started.connect(self._onEffectStarted)
+        self._effectRunner.progress.connect(self.progressBar.setValue)
+        self._effectRunner.failed.connect(self._onEffectFailed)
+        self._effectRunner.idle.connect(self._onEffectsIdle)
+        self._effectRunner.jobDone.connect(self._onEffectDone)
+        self._onEffectsIdle()
+        self._saver.saved.connect(self._onImageSaved)
+        self._saver.failed.connect(self._onSaveFailed)
 
         # Control buttons
         self.openImageButton = QPushButton(
@@ -95,6 +93,22 @@ class ImageAndSelectionWidget(QWidget):
         self.saveButton.setFixedHeight(Settings.Common.Sizes.BUTTON_HEIGHT)
         layout.addWidget(self.saveButton)
 
+        self.openProjectButton = QPushButton(
+            Settings.get_button_text_with_shortcut(Settings.ButtonText.File.OPEN_PROJECT),
+            self
+        )
+        self.openProjectButton.clicked.connect(self._openProject)
+        self.openProjectButton.setFixedHeight(Settings.Common.Sizes.BUTTON_HEIGHT)
+        layout.addWidget(self.openProjectButton)
+
+        self.saveProjectButton = QPushButton(
+            Settings.get_button_text_with_shortcut(Settings.ButtonText.File.SAVE_PROJECT),
+            self
+        )
+        self.saveProjectButton.clicked.connect(self.saveProject)
+        self.saveProjectButton.setFixedHeight(Settings.Common.Sizes.BUTTON_HEIGHT)
+        layout.addWidget(self.saveProjectButton)
+
         self.undoButton = QPushButton(
             Settings.get_button_text_with_shortcut(Settings.ButtonText.Edit.UNDO),
             self
@@ -112,34 +126,307 @@ class ImageAndSelectionWidget(QWidget):
         layout.addWidget(self.redoButton)
 
         self.toggleSelectionModeButton = QPushButton(
-            Settings.get_button_text_with_shortcut(Settings.ButtonText.Edit.TOGGLE_MODE).format(Settings.Image.Selection.MODES[self.label.mode]),
+            Settings.get_button_text_with_shortcut(Settings.ButtonText.Edit.TOGGLE_MODE).format(Settings.Image.Selection.MODES[self.view.mode]),
             self
         )
         self.toggleSelectionModeButton.clicked.connect(self._toggleSelectionMode)
         self.toggleSelectionModeButton.setFixedHeight(Settings.Common.Sizes.BUTTON_HEIGHT)
         layout.addWidget(self.toggleSelectionModeButton)
 
+        self.loadSelectionsButton = QPushButton(
+            Settings.get_button_text_with_shortcut(Settings.ButtonText.Edit.LOAD_SELECTIONS),
+            self
+        )
+        self.loadSelectionsButton.clicked.connect(self._loadSelections)
+        self.loadSelectionsButton.setFixedHeight(Settings.Common.Sizes.BUTTON_HEIGHT)
+        layout.addWidget(self.loadSelectionsButton)
+
         self.setLayout(layout)
 
     def _undo(self):
-        if self._imageHistory:
-            if self.label.pixmap():
-                self._redoHistory.append(self.label.pixmap().copy())
-            previous_pixmap = self._imageHistory.pop()
-            self.label.setPixmap(previous_pixmap)
+        if self.view.pixmap() and not self.isBusy():
+            self.view.clearPreview()
+            with self._operation(Settings.Instrumentation.UNDO_NAME):
+                if self._project is not None:
+                    if self._project.undo():
+                        # Replay the remaining edits on the unedited proxy
+                        self._proxy = None
+                        self._showProxy(self._renderedProxy())
+                else:
+                    self._history.undo(self._swapPixels)
 
     def _redo(self):
-        if self._redoHistory:
-            if self.label.pixmap():
-                self._imageHistory.append(self.label.pixmap().copy())
-            next_pixmap = self._redoHistory.pop()
-            self.label.setPixmap(next_pixmap)
+        if self.view.pixmap() and not self.isBusy():
+            self.view.clearPreview()
+            with self._operation(Settings.Instrumentation.REDO_NAME):
+                if self._project is not None:
+                    proxy = self._renderedProxy()
+                    steps = self._project.redo()
+                    if steps is not None:
+                        self._proxy = self._project.render_proxy(proxy.copy(), steps)
+                        self._showProxy(self._proxy)
+                else:
+                    self._history.redo(self._swapPixels)
+
+    @contextmanager
+    def _operation(self, name, **fields):
+        """Trace the enclosed block as one operation; see utils.instrumentation"""
+        trace = instrumentation.start(name, **fields)
+        try:
+            with activate(trace):
+                yield trace
+        except Exception as e:
+            self._finishTrace(trace, 'failed', error=f"{type(e).__name__}: {e}")
+            raise
+        self._finishTrace(trace)
+
+    def _finishTrace(self, trace, status=None, **fields):
+        """Log a finished operation with the history size and show its timings"""
+        instrumentation.finish(trace, status, history_bytes=self._history.nbytes, **fields)
+        self.operationMeasured.emit(format_trace(trace))
+
+    def _onEffectDone(self, job):
+        if job.trace is not None:
+            self._finishTrace(job.trace)
+
+    def _swapPixels(self, rect, pixels):
+        """Write pixels into the image at rect and return the pixels replaced"""
+        if self._buffer is not None:
+            self._saver.waitForDone()  # A save in progress may still be reading the buffer
+            with stage('write_back'):
+                replaced = self._buffer.read(rect)
+                self._buffer.write(rect, pixels)
+            with stage('set_image'):
+                self._showOverview(rect)
+            return replaced
+
+        pixmap = self.view.pixmap()
+        if rect is None:
+            with stage('to_numpy'):
+                replaced = pixmap_to_array(pixmap)
+            with stage('set_image'):
+                self.view.setPixmap(array_to_pixmap(pixels))
+            return replaced
+
+        x, y, width, height = rect
+        with stage('to_numpy'):
+            replaced = pixmap_to_array(pixmap.copy(x, y, width, height))
+        with stage('set_image'):
+            painter = QPainter(pixmap)
+            painter.setCompositionMode(QPainter.CompositionMode_Source)
+            painter.drawImage(x, y, array_to_qimage(pixels))
+            painter.end()
+            self.view.setPixmap(pixmap, QRect(x, y, width, height))
+        return replaced
+
+    def _addToUndo(self, pixmap, dirtyRect=None):
+        """Record the pixels of the current image that pixmap will replace
+
+        Args:
+            pixmap: The image about to be shown
+            dirtyRect: QRect known to contain every changed pixel, if any
+
+        Returns:
+            QRect: The changed area, or None if the whole image must be redrawn
+        """
+        current = self.view.pixmap()
+        if not current or current.isNull():
+            return None
+
+        if current.size() != pixmap.size():
+            self._history.push(None, pixmap_to_array(current))
+            return None
+
+        if dirtyRect is None:
+            rect = changed_rect(pixmap_to_array(current), pixmap_to_array(pixmap))
+        else:
+            dirtyRect = dirtyRect.intersected(current.rect())
+            rect = None if dirtyRect.isEmpty() else dirtyRect.getRect()
+
+        if rect is None:
+            return QRect()
+        self._history.push(rect, pixmap_to_array(current.copy(*rect)))
+        return QRect(*rect)
+
+    def _effectImage(self):
+        """Return the array an effect edits: a pixel copy, or a copy-on-write buffer view"""
+        if self._buffer is not None:
+            return self._buffer.snapshot()
+        if self._project is not None:
+            return self._renderedProxy().copy()
+        pixmap = self.view.pixmap()
+        return pixmap_to_array(pixmap) if pixmap else None
+
+    def _commitEffect(self, image_array, dirtyRect):
+        if self._project is not None:
+            # The effect rendered the job's steps on the proxy; record them
+            self._project.add(self._effectRunner.current.steps)
+            self._proxy = image_array
+            with stage('set_image'):
+                self._showProxy(image_array)
+            return
+
+        if self._buffer is None:
+            with stage('to_pixmap'):
+                pixmap = array_to_pixmap(image_array)
+            with stage('set_image'):
+                self.setImage(pixmap, dirtyRect)
+            return
+
+        # Only the changed area of the copy-on-write view is written back
+        if dirtyRect is not None:
+            dirtyRect = dirtyRect.intersected(QRect(0, 0, *self._buffer.size))
+            if dirtyRect.isEmpty():
+                return
+            dirtyRect = dirtyRect.getRect()
+        with stage('changed_rect'):
+            rect = self._buffer.changed_rect(image_array, dirtyRect)
+        if rect is None:
+            return
+        x, y, width, height = rect
+        self._saver.waitForDone()  # A save in progress may still be reading the buffer
+        with stage('write_back'):
+            self._history.push(rect, self._buffer.read(rect))
+            self._buffer.write(rect, image_array[y:y + height, x:x + width])
+        with stage('set_image'):
+            self.view.clearPreview()
+            self._showOverview(rect)
+
+    def _showOverview(self, rect=None):
+        """Show the working buffer's overview, redrawing only the part covering rect"""
+        overview = self._buffer.overview
+        imageSize = QSize(*self._buffer.size)
+        if rect is None:
+            self.view.setPixmap(array_to_pixmap(overview), None, self._buffer.factor, imageSize, self._buffer)
+            return
+
+        x, y, width, height = self._buffer.overview_rect(rect)
+        pixmap = self.view.pixmap()
+        painter = QPainter(pixmap)
+        painter.setCompositionMode(QPainter.CompositionMode_Source)
+        painter.drawImage(x, y, array_to_qimage(np.ascontiguousarray(overview[y:y + height, x:x + width])))
+        painter.end()
+        self.view.setPixmap(pixmap, QRect(x, y, width, height), self._buffer.factor, imageSize, self._buffer)
+
+    def setWorkingBuffer(self, buffer):
+        """Edit buffer instead of an in-memory image, or go back with None
+
+        The undo history is cleared, as it belongs to the previous image.
+        """
+        if self._buffer is not None:
+            self._buffer.close()
+        self._closeProject()
+        self._buffer = buffer
+        self._history.clear()
+        self.view.clearPreview()
+        if buffer is None:
+            self.view.setPixmap(QPixmap())
+        else:
+            self._showOverview()
+
+    def _onEffectStarted(self, name):
+        self.progressBar.setFormat(Settings.Image.Progress.FORMAT.format(name))
+        self.progressBar.setValue(0)
+        self.progressBar.show()
+        self.cancelButton.show()
+
+    def _onEffectFailed(self, message):
+        QMessageBox.warning(self, Settings.Image.Progress.ERROR_TITLE, message)
+
+    def _onEffectsIdle(self):
+        self.progressBar.hide()
+        self.cancelButton.hide()
 
-    def _addToUndo(self):
-        if self.label.pixmap():
-            self._imageHistory.append(self.label.pixmap().copy())
+    def runEffect(self, name, effect, dirtyRect=None, steps=None):
+        """Queue effect(image_array, job) to run on a worker thread
+
+        The effect edits an RGBA copy of the image in place; the result is
+        passed to setImage() once it finishes. See EffectJob.
+
+        steps are the recipe steps the effect performs. In a project they
+        are recorded, with the current selection, and rendered on the proxy
+        instead of running effect; effects without steps are ignored there.
+        """
+        self.view.clearPreview()
+        if self._project is not None:
+            if not steps:
+                return None
+            steps = bind_selection(steps, self.getSelectionPolygon())
+            try:
+                validate_steps(steps)
+            except ValueError as e:
+                QMessageBox.warning(self, Settings.Project.ERROR_TITLE, str(e))
+                return None
+            project = self._project
+
+            def effect(image_array, job):
+                project.render_proxy(image_array, steps, job.reportProgress)
+
+            dirtyRect = None
+        return self._effectRunner.submit(name, effect, dirtyRect, steps)
+
+    def showPreview(self, step):
+        """Preview a recipe step on the visible part of the selection
+
+        The step runs on a downscaled proxy of that area only, so this stays
+        fast on large images; the image itself is not changed.
+        """
+        pixmap = self.getImage()
+        polygon = self.getSelectionPolygon()
+        if not pixmap or pixmap.isNull() or len(polygon) == 0:
+            self.view.clearPreview()
+            return
+        imageSize = self._buffer.size if self._buffer is not None else (pixmap.width(), pixmap.height())
+        displayScale = self.view.zoom
+        if self._project is not None:
+            # Preview no finer than the proxy the edit will be rendered on
+            imageSize = self._project.size
+            displayScale = min(displayScale, 1 / self._project.factor)
+
+        visible = self.view.visibleImageRect()
+        region = preview_region(
+            polygon,
+            (visible.left(), visible.top(), visible.right() + 1, visible.bottom() + 1),
+            imageSize,
+            step,
+            Settings.Image.Preview.MAX_PIXELS,
+            displayScale
+        )
+        if region is None:
+            self.view.clearPreview()
+            return
+
+        box, scale = region
+        rect = QRect(box[0], box[1], box[2] - box[0], box[3] - box[1])
+        width, height = proxy_size(box, scale)
+        if self._buffer is not None:
+            proxy = self._buffer.read_scaled(box, (width, height))
+        elif self._project is not None:
+            factor = self._project.factor
+            left, top = box[0] // factor, box[1] // factor
+            source = QRect(left, top, -(-box[2] // factor) - left, -(-box[3] // factor) - top)
+            proxy = pixmap_to_array(pixmap.copy(source).scaled(width, height, Qt.IgnoreAspectRatio,
+                                                               Qt.SmoothTransformation))
+        else:
+            proxy = pixmap_to_array(pixmap.copy(rect).scaled(width, height, Qt.IgnoreAspectRatio, Qt.SmoothTransformation))
+        run_recipe(proxy, [scale_step(step, polygon, box, scale, imageSize)])
+        self.view.setPreview(array_to_qimage(proxy), rect)
+
+    def clearPreview(self):
+        self.view.clearPreview()
+
+    def cancelEffects(self):
+        self._effectRunner.cancel()
+
+    def isBusy(self):
+        return self._effectRunner.isBusy()
+
+    def waitForEffects(self):
+        self._effectRunner.waitForDone()
 
     def _openImage(self):
+        if self.isBusy():
+            return
         imagePath, _ = QFileDialog.getOpenFileName(
             self, 
             Settings.Image.FileDialog.OPEN_TITLE, 
@@ -147,36 +434,220 @@ class ImageAndSelectionWidget(QWidget):
             Settings.Image.FileDialog.IMAGE_FILTER
         )
         if imagePath:
-            pixmap = QPixmap(imagePath)
-            self.setImage(pixmap)
+            self.openImage(imagePath)
+
+    def openImage(self, imagePath):
+        """Open imagePath, editing it through a working buffer if it is very large"""
+        threshold = Settings.Image.WorkingBuffer.THRESHOLD_PIXELS
+        try:
+            pixels = image_pixel_count(imagePath)
+        except (OSError, ValueError) as e:
+            QMessageBox.warning(self, Settings.Image.FileDialog.OPEN_ERROR_TITLE, str(e))
+            return
+        with self._operation(Settings.Instrumentation.OPEN_NAME, path=imagePath, pixels=pixels):
+            if threshold is not None and pixels >= threshold:
+                try:
+                    with stage('decode'):
+                        buffer = WorkingBuffer.from_file(
+                            imagePath,
+                            Settings.Image.WorkingBuffer.SCRATCH_DIR,
+                            Settings.Image.WorkingBuffer.OVERVIEW_SIDE
+                        )
+                except (OSError, ValueError) as e:
+                    QMessageBox.warning(self, Settings.Image.FileDialog.OPEN_ERROR_TITLE, str(e))
+                    return
+                with stage('set_image'):
+                    self.setWorkingBuffer(buffer)
+            else:
+                with stage('decode'):
+                    pixmap = QPixmap(imagePath)
+                with stage('set_image'):
+                    self.setImage(pixmap)
 
     def _saveImage(self):
-        if self.label.pixmap():
-            filePath, _ = QFileDialog.getSaveFileName(
+        if self.view.pixmap():
+            filePath, selectedFilter = QFileDialog.getSaveFileName(
                 self, 
                 Settings.Image.FileDialog.SAVE_TITLE, 
                 "", 
                 Settings.Image.FileDialog.SAVE_FILTER
             )
             if filePath:
-                self.label.pixmap().save(filePath)
+                if not os.path.splitext(filePath)[1]:
+                    # Use the first extension of the chosen filter
+                    extension = re.search(r"\*(\.\w+)", selectedFilter)
+                    if extension:
+                        filePath += extension.group(1)
+                options = SaveOptionsDialog.getOptions(filePath, self._saveOptions, self)
+                if options is not None:
+                    self._saveOptions = options
+                    self.saveImage(filePath, options)
+
+    def saveImage(self, filePath, options=None):
+        """Write a snapshot of the image to filePath on a background thread
+
+        A project is exported by replaying its edits on the full-resolution
+        source, on the saving thread.
+
+        Args:
+            options: Encoder options, see utils.image_saving.encoder_params
+        """
+        trace = instrumentation.start(Settings.Instrumentation.SAVE_NAME, path=filePath)
+        with trace.stage('snapshot'):
+            if self._project is not None:
+                project = Project(self._project.source, self._project.size, self._project.steps)
+                image_array, keep_alpha = project.render, project.has_alpha()
+            elif self._buffer is not None:
+                image_array, keep_alpha = self._buffer.snapshot(), self._buffer.has_alpha
+            else:
+                pixmap = self.view.pixmap()
+                image_array, keep_alpha = pixmap_to_array(pixmap), pixmap.hasAlphaChannel()
+        self._saveTraces.append(trace)
+        self.statusMessage.emit(Settings.Image.Save.SAVING_TEXT.format(name=os.path.basename(filePath)))
+        self._saver.save(image_array, filePath, options, keep_alpha)
+
+    def waitForSaves(self):
+        self._saver.waitForDone()
+
+    def _onImageSaved(self, result):
+        trace = self._saveTraces.popleft()
+        trace.record('encode', result['seconds'])
+        self._finishTrace(trace, bytes=result['bytes'])
+        self.statusMessage.emit(Settings.Image.Save.SAVED_TEXT.format(
+            name=os.path.basename(result['path']),
+            size=result['bytes'] / (1024 * 1024),
+            seconds=result['seconds']
+        ))
+
+    def _onSaveFailed(self, message):
+        self._finishTrace(self._saveTraces.popleft(), 'failed', error=message)
+        self.statusMessage.emit("")
+        QMessageBox.warning(self, Settings.Image.Save.ERROR_TITLE, message)
 
     def _toggleSelectionMode(self):
-        self.label.toggleMode()
+        self.view.toggleMode()
         self.toggleSelectionModeButton.setText(
-            Settings.get_button_text_with_shortcut(Settings.ButtonText.Edit.TOGGLE_MODE).format(Settings.Image.Selection.MODES[self.label.mode])
+            Settings.get_button_text_with_shortcut(Settings.ButtonText.Edit.TOGGLE_MODE).format(Settings.Image.Selection.MODES[self.view.mode])
         )
 
+    def _loadSelections(self):
+        """Replace the selection with the polygons of a JSON selection file"""
+        filePath, _ = QFileDialog.getOpenFileName(
+            self, Settings.Image.Selection.LOAD_TITLE, "", Settings.Image.Selection.FILE_FILTER
+        )
+        if filePath:
+            try:
+                self.view.setSelections(load_selections(filePath))
+            except (OSError, ValueError) as e:
+                QMessageBox.warning(self, Settings.Image.Selection.ERROR_TITLE, str(e))
+
+    def _openProject(self):
+        if self.isBusy():
+            return
+        imagePath, _ = QFileDialog.getOpenFileName(
+            self,
+            Settings.Image.FileDialog.OPEN_TITLE,
+            "",
+            Settings.Image.FileDialog.IMAGE_FILTER
+        )
+        if imagePath:
+            try:
+                self.openProject(imagePath)
+            except (OSError, ValueError) as e:
+                QMessageBox.warning(self, Settings.Project.ERROR_TITLE, str(e))
+
+    def openProject(self, imagePath):
+        """Edit imagePath non-destructively, reopening the project saved next to it if any
+
+        Edits are shown on a proxy of the image; saving the image replays them
+        at full resolution. A project reopened with its cached proxy shows it
+        without running any effect.
+
+        Raises:
+            OSError, ValueError: If the image or its project cannot be read
+        """
+        with self._operation(Settings.Instrumentation.OPEN_NAME, path=imagePath, project=True):
+            with stage('decode'):
+                project = open_project(imagePath)
+                proxy = project.cached_proxy()
+            if self._buffer is not None:
+                self.setWorkingBuffer(None)
+            self._closeProject()
+            self._project = project
+            if proxy is None:
+                with stage('render'):
+                    proxy = self._renderedProxy()
+            with stage('set_image'):
+                self._showProxy(proxy)
+
+    def saveProject(self):
+        """Write the open project, with its rendered proxy, to its sidecar file"""
+        if self._project is None:
+            return
+        if self._proxy is not None:
+            self._project.cache_proxy(self._proxy)
+        try:
+            path = self._project.save()
+        except OSError as e:
+            QMessageBox.warning(self, Settings.Project.ERROR_TITLE, str(e))
+            return
+        self.statusMessage.emit(Settings.Project.SAVED_TEXT.format(
+            name=os.path.basename(path), steps=len(self._project.steps)))
+
+    def project(self):
+        """Return the open Project, or None when editing pixels directly"""
+        return self._project
+
+    def _closeProject(self):
+        if self._project is not None:
+            self._project = self._proxyBase = self._proxy = None
+            self._history.clear()
+            self.view.setPixmap(QPixmap())  # The proxy is not an image to undo back to
+
+    def _renderedProxy(self):
+        """Return the proxy with every edit of the project rendered, rendering it if needed"""
+        if self._proxy is None:
+            if self._proxyBase is None:
+                self._proxyBase = self._project.load_proxy_source()
+            self._proxy = self._project.render_proxy(self._proxyBase.copy())
+        return self._proxy
+
+    def _showProxy(self, proxy):
+        self.view.clearPreview()
+        self.view.setPixmap(array_to_pixmap(proxy), None, self._project.factor, QSize(*self._project.size))
+
     def getImage(self):
-        return self.label.pixmap()
+        return self.view.pixmap()
     
-    def setImage(self, pixmap):
-        self._addToUndo()
-        self._redoHistory.clear()  # clear redo history when new image is set
-        self.label.setPixmap(pixmap)
-        self.label.adjustSize()
+    def setImage(self, pixmap, dirtyRect=None):
+        if self._buffer is not None:
+            self.setWorkingBuffer(None)
+        self._closeProject()
+        changed = self._addToUndo(pixmap, dirtyRect)  # also clears redo history
+        self.view.clearPreview()
+        self.view.setPixmap(pixmap, changed)
+
+    def zoomIn(self):
+        self.view.zoomIn()
+
+    def zoomOut(self):
+        self.view.zoomOut()
+
+    def resetZoom(self):
+        self.view.resetZoom()
 
     def getSelectionPolygon(self, to_points=True):
+        """Return the selection as a Selection of (x, y) points, or the last QPolygon
+
+        With several regions selected this is a MultiSelection, which effects
+        apply to all regions in one pass. The selection is cached by the view,
+        so effects applied again to the same selection reuse its rasterized
+        mask.
+        """
         if not to_points:
-            return self.label.selection_polygon
-        return [(p.x(), p.y()) for p in self.label.selection_polygon]
\ No newline at end of file
+            return self.view.selection_polygon
+        return self.view.selection()
+
+    def getSelectionRect(self):
+        """Return the bounding QRect of all selected regions"""
+        return self.view.selectionRect()
\ No newline at end of file
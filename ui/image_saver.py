@@ -0,0 +1,60 @@
+from PyQt5.QtCore import QObject, QRunnable, QThreadPool, QCoreApplication, QEventLoop, pyqtSignal
+
+from utils.image_saving import save_image_array
+
+
+class _SaveTask(QRunnable):
+    def __init__(self, saver, image_array, path, options, keep_alpha):
+        super().__init__()
+        self.saver = saver
+        self.image_array = image_array
+        self.path = path
+        self.options = options
+        self.keep_alpha = keep_alpha
+
+    def run(self):
+        try:
+            image_array = self.image_array() if callable(self.image_array) else self.image_array
+            result = save_image_array(image_array, self.path, self.options, self.keep_alpha)
+        except Exception as e:
+            self.saver.failed.emit(f"{self.path}: {e}")
+        else:
+            self.saver.saved.emit(result)
+
+
+class ImageSaver(QObject):
+    """Encode and write images on a background thread
+
+    Each save works on its own snapshot of the image, so editing can go on
+    while it is written. Saves run one at a time, in the order requested.
+    """
+    saved = pyqtSignal(object)  # The save_image_array() result
+    failed = pyqtSignal(str)
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self._pending = 0
+        self._pool = QThreadPool(self)
+        self._pool.setMaxThreadCount(1)
+        self.saved.connect(self._onDone)
+        self.failed.connect(self._onDone)
+
+    def isBusy(self):
+        return self._pending > 0
+
+    def save(self, image_array, path, options=None, keep_alpha=True):
+        """Queue image_array, an RGBA snapshot nothing else writes to, for saving
+
+        image_array may also be a callable returning that snapshot, called on
+        the saving thread, e.g. to replay a project at full resolution.
+        """
+        self._pending += 1
+        self._pool.start(_SaveTask(self, image_array, path, options, keep_alpha))
+
+    def waitForDone(self):
+        """Block until every queued save has finished and been reported"""
+        while self.isBusy():
+            QCoreApplication.processEvents(QEventLoop.AllEvents | QEventLoop.WaitForMoreEvents, 50)
+
+    def _onDone(self, _):
+        self._pending -= 1
@@ -1,5 +1,6 @@
+import argparse
 import sys
-from PyQt5.QtWidgets import QApplication, QMainWindow, QVBoxLayout, QHBoxLayout, QWidget, QTabWidget
+from PyQt5.QtWidgets import QApplication, QMainWindow, QVBoxLayout, QHBoxLayout, QWidget, QTabWidget, QLabel
 from PyQt5.QtCore import Qt
 
 from ui.image_and_selection_widget import ImageAndSelectionWidget
@@ -7,7 +8,11 @@ from ui.mosaic_widget import MosaicWidget
 from ui.text_widget import TextWidget
 from ui.blur_widget import BlurWidget
 from ui.camera_widget import CameraWidget
+from ui.recipe_widget import RecipeWidget
+from ui.redact_widget import RedactWidget
+from ui.folder_browser_widget import FolderBrowserWidget
 from config.settings import Settings
+from utils.instrumentation import instrumentation
 from utils.shortcut_utils import create_shortcut
 
 
@@ -30,6 +35,11 @@ class MainWindow(QMainWindow):
 
         self.imageAndSelectionWidget = ImageAndSelectionWidget()
         self.mainLayout.addWidget(self.imageAndSelectionWidget)
+        self.imageAndSelectionWidget.statusMessage.connect(self.statusBar().showMessage)
+        # Timings of the last operation stay visible next to transient messages
+        self.operationLabel = QLabel()
+        self.statusBar().addPermanentWidget(self.operationLabel)
+        self.imageAndSelectionWidget.operationMeasured.connect(self.operationLabel.setText)
 
         self.tabs = QTabWidget()
         self.mainLayout.addWidget(self.tabs)
@@ -47,6 +57,15 @@ class MainWindow(QMainWindow):
         self.cameraWidget = CameraWidget(self.imageAndSelectionWidget)
         self.tabs.addTab(self.cameraWidget, "Camera Effect")
 
+        self.recipeWidget = RecipeWidget(self.imageAndSelectionWidget)
+        self.tabs.addTab(self.recipeWidget, "Recipe")
+
+        self.redactWidget = RedactWidget(self.imageAndSelectionWidget)
+        self.tabs.addTab(self.redactWidget, "Auto Redact")
+
+        self.folderBrowserWidget = FolderBrowserWidget(self.imageAndSelectionWidget)
+        self.tabs.addTab(self.folderBrowserWidget, "Browse")
+
     def initShortcuts(self):
         # File operations
         create_shortcut(
@@ -59,6 +78,11 @@ class MainWindow(QMainWindow):
             Settings.Shortcut.File.SAVE, 
             self.imageAndSelectionWidget._saveImage
         )
+        create_shortcut(
+            self,
+            Settings.Shortcut.File.OPEN_PROJECT,
+            self.imageAndSelectionWidget._openProject
+        )
 
         # Edit operations
         create_shortcut(
@@ -71,6 +95,28 @@ class MainWindow(QMainWindow):
             Settings.Shortcut.Edit.REDO, 
             self.imageAndSelectionWidget._redo
         )
+        create_shortcut(
+            self, 
+            Settings.Shortcut.Edit.CANCEL, 
+            self.imageAndSelectionWidget.cancelEffects
+        )
+
+        # View operations
+        create_shortcut(
+            self, 
+            Settings.Shortcut.View.ZOOM_IN, 
+            self.imageAndSelectionWidget.zoomIn
+        )
+        create_shortcut(
+            self, 
+            Settings.Shortcut.View.ZOOM_OUT, 
+            self.imageAndSelectionWidget.zoomOut
+        )
+        create_shortcut(
+            self, 
+            Settings.Shortcut.View.RESET_ZOOM, 
+            self.imageAndSelectionWidget.resetZoom
+        )
 
         # Tool operations
         create_shortcut(
@@ -90,8 +136,21 @@ class MainWindow(QMainWindow):
         )
 
 
-def runMainWindow():
-    app = QApplication(sys.argv)
+def parseArguments(argv):
+    """Split argv into the application's options and the arguments left for Qt"""
+    parser = argparse.ArgumentParser(description="Mosaic, blur, text and camera effects for images")
+    parser.add_argument('--trace-memory', action='store_true', default=Settings.Instrumentation.TRACE_MEMORY,
+                        help="Record the peak memory of every operation with tracemalloc (slower)")
+    args, qt_args = parser.parse_known_args(argv[1:])
+    return args, argv[:1] + qt_args
+
+
+def runMainWindow(argv=None):
+    args, qt_argv = parseArguments(sys.argv if argv is None else argv)
+    if args.trace_memory:
+        instrumentation.trace_memory = True
+        instrumentation.start_memory_tracing()
+    app = QApplication(qt_argv)
     ex = MainWindow()
     ex.show()
     sys.exit(app.exec_())
@@ -1,12 +1,10 @@
-from PyQt5.QtWidgets import QLabel, QVBoxLayout, QWidget, QPushButton, QSlider
-from PyQt5.QtCore import Qt
-from PyQt5.QtGui import QPixmap
+from PyQt5.QtWidgets import QLabel, QVBoxLayout, QWidget, QPushButton, QSlider, QCheckBox
+from PyQt5.QtCore import Qt, QTimer
 
 from utils.image_utils import (
-    pixmap_to_pil_image_with_alpha, 
-    pil_image_to_qimage_with_alpha, 
     apply_mosaic
 )
+from utils.qimage_bridge import array_to_pil_image
 from config.settings import Settings
 
 
@@ -14,9 +12,16 @@ class MosaicWidget(QWidget):
     def __init__(self, image_and_selection_source):
         super().__init__()
         self.mosaicSize = Settings.Mosaic.MOSAIC_SIZE['DEFAULT']
+        self.mosaicHeight = self.mosaicSize
         self.image_and_selection_source = image_and_selection_source
         self._initUI()
 
+        # Render the live preview once the slider has settled
+        self._previewTimer = QTimer(self)
+        self._previewTimer.setSingleShot(True)
+        self._previewTimer.setInterval(Settings.Image.Preview.DEBOUNCE_MS)
+        self._previewTimer.timeout.connect(self._updatePreview)
+
     def _initUI(self):
         """Initialize the user interface"""
         layout = QVBoxLayout()
@@ -36,6 +41,26 @@ class MosaicWidget(QWidget):
         self.sizeSlider.setFixedHeight(Settings.Common.Sizes.SLIDER_HEIGHT)
         layout.addWidget(self.sizeSlider)
 
+        # Square blocks toggle; unchecked, the height slider sets a separate block height
+        self.squareCheckBox = QCheckBox(Settings.Mosaic.SQUARE_TEXT, self)
+        self.squareCheckBox.setChecked(True)
+        self.squareCheckBox.toggled.connect(self._changeSquare)
+        layout.addWidget(self.squareCheckBox)
+
+        self.heightLabel = QLabel(Settings.Mosaic.HEIGHT_LABEL_TEXT.format(self.mosaicHeight), self)
+        self.heightLabel.setFixedHeight(Settings.Common.Sizes.LABEL_HEIGHT)
+        layout.addWidget(self.heightLabel)
+
+        self.heightSlider = QSlider(Qt.Horizontal, self)
+        self.heightSlider.setMinimum(Settings.Mosaic.MOSAIC_SIZE['MIN'])
+        self.heightSlider.setMaximum(Settings.Mosaic.MOSAIC_SIZE['MAX'])
+        self.heightSlider.setValue(self.mosaicHeight // Settings.Mosaic.SIZE_MULTIPLIER)
+        self.heightSlider.valueChanged.connect(self._changeMosaicHeight)
+        self.heightSlider.setFixedHeight(Settings.Common.Sizes.SLIDER_HEIGHT)
+        layout.addWidget(self.heightSlider)
+        self.heightLabel.setVisible(False)
+        self.heightSlider.setVisible(False)
+
         # Apply mosaic button
         self.applyMosaicButton = QPushButton(
             Settings.get_button_text_with_shortcut(Settings.ButtonText.Tools.APPLY_MOSAIC),
@@ -51,19 +76,45 @@ class MosaicWidget(QWidget):
         """Update mosaic size based on slider value"""
         self.mosaicSize = value * Settings.Mosaic.SIZE_MULTIPLIER
         self.sizeLabel.setText(Settings.Mosaic.SIZE_LABEL_TEXT.format(self.mosaicSize))
+        self._previewTimer.start()
+
+    def _changeMosaicHeight(self, value):
+        """Update the block height based on slider value"""
+        self.mosaicHeight = value * Settings.Mosaic.SIZE_MULTIPLIER
+        self.heightLabel.setText(Settings.Mosaic.HEIGHT_LABEL_TEXT.format(self.mosaicHeight))
+        self._previewTimer.start()
+
+    def _changeSquare(self, square):
+        """Show the block height slider only for rectangular blocks"""
+        self.heightLabel.setVisible(not square)
+        self.heightSlider.setVisible(not square)
+        self._previewTimer.start()
+
+    def blockSize(self):
+        """Return the block side, or [width, height] for rectangular blocks"""
+        if self.squareCheckBox.isChecked():
+            return self.mosaicSize
+        return [self.mosaicSize, self.mosaicHeight]
+
+    def _updatePreview(self):
+        """Show the current mosaic size on a proxy of the visible selection"""
+        self.image_and_selection_source.showPreview({'op': 'mosaic', 'block_size': self.blockSize()})
 
     def applyMosaic(self):
-        """Apply mosaic effect to the selected area"""
+        """Apply mosaic effect to the selected area on a worker thread"""
+        self._previewTimer.stop()
         pixmap = self.image_and_selection_source.getImage()
         selection_polygon = self.image_and_selection_source.getSelectionPolygon()
 
         if pixmap and len(selection_polygon) > 0:
-            # Convert QPixmap to PIL Image
-            pil_image = pixmap_to_pil_image_with_alpha(pixmap)
-            
-            # Apply mosaic effect
-            apply_mosaic(pil_image, selection_polygon, self.mosaicSize)
-            
-            # Convert back to QPixmap and update image
-            result_pixmap = pil_image_to_qimage_with_alpha(pil_image)
-            self.image_and_selection_source.setImage(QPixmap.fromImage(result_pixmap))
\ No newline at end of file
+            block_size = self.blockSize()
+
+            def effect(image_array, job):
+                apply_mosaic(array_to_pil_image(image_array), selection_polygon, block_size, job.reportProgress)
+
+            self.image_and_selection_source.runEffect(
+                Settings.Mosaic.EFFECT_NAME,
+                effect,
+                self.image_and_selection_source.getSelectionRect(),
+                [{'op': 'mosaic', 'block_size': block_size}]
+            )
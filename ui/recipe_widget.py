@@ -0,0 +1,91 @@
+from PyQt5.QtWidgets import (QLabel, QVBoxLayout, QWidget, QPushButton,
+                           QListWidget, QFileDialog, QMessageBox)
+
+from utils.recipe import load_recipe, validate_steps, run_recipe
+from config.settings import Settings
+
+
+class RecipeWidget(QWidget):
+    def __init__(self, image_and_selection_source):
+        super().__init__()
+        self.steps = []
+        self.image_and_selection_source = image_and_selection_source
+        self._initUI()
+
+    def _initUI(self):
+        """Initialize the user interface"""
+        layout = QVBoxLayout()
+        layout.setSizeConstraint(QVBoxLayout.SetMinAndMaxSize)
+
+        # Load recipe button
+        self.loadRecipeButton = QPushButton(
+            Settings.get_button_text_with_shortcut(Settings.ButtonText.Tools.LOAD_RECIPE),
+            self
+        )
+        self.loadRecipeButton.clicked.connect(self.loadRecipe)
+        self.loadRecipeButton.setFixedHeight(Settings.Common.Sizes.BUTTON_HEIGHT)
+        layout.addWidget(self.loadRecipeButton)
+
+        # Recipe file label
+        self.recipeLabel = QLabel(Settings.Recipe.EMPTY_TEXT, self)
+        self.recipeLabel.setFixedHeight(Settings.Common.Sizes.LABEL_HEIGHT)
+        layout.addWidget(self.recipeLabel)
+
+        # Recipe steps
+        self.stepList = QListWidget(self)
+        layout.addWidget(self.stepList)
+
+        # Apply recipe button
+        self.applyRecipeButton = QPushButton(
+            Settings.get_button_text_with_shortcut(Settings.ButtonText.Tools.APPLY_RECIPE),
+            self
+        )
+        self.applyRecipeButton.clicked.connect(self.applyRecipe)
+        self.applyRecipeButton.setFixedHeight(Settings.Common.Sizes.BUTTON_HEIGHT)
+        layout.addWidget(self.applyRecipeButton)
+
+        self.setLayout(layout)
+
+    def setSteps(self, steps, name=""):
+        """Show steps in the list and use them for the next apply"""
+        self.steps = steps
+        self.recipeLabel.setText(name or Settings.Recipe.EMPTY_TEXT)
+        self.stepList.clear()
+        for index, step in enumerate(steps, 1):
+            params = ", ".join(f"{key}={value}" for key, value in step.items() if key != 'op')
+            self.stepList.addItem(Settings.Recipe.STEP_TEXT.format(index=index, op=step['op'], params=params))
+
+    def loadRecipe(self):
+        """Load a JSON or YAML recipe file"""
+        recipePath, _ = QFileDialog.getOpenFileName(
+            self,
+            Settings.Recipe.OPEN_TITLE,
+            "",
+            Settings.Recipe.FILE_FILTER
+        )
+        if recipePath:
+            try:
+                self.setSteps(load_recipe(recipePath), recipePath)
+            except (OSError, ValueError) as e:
+                QMessageBox.warning(self, Settings.Recipe.ERROR_TITLE, str(e))
+
+    def applyRecipe(self):
+        """Run all recipe steps on the image as a single edit on a worker thread
+
+        Steps without a rect or polygon use the current selection.
+        """
+        pixmap = self.image_and_selection_source.getImage()
+        selection_polygon = self.image_and_selection_source.getSelectionPolygon()
+
+        if pixmap and self.steps:
+            steps = self.steps
+            try:
+                validate_steps(steps, has_selection=len(selection_polygon) > 0)
+            except ValueError as e:
+                QMessageBox.warning(self, Settings.Recipe.ERROR_TITLE, str(e))
+                return
+
+            def effect(image_array, job):
+                run_recipe(image_array, steps, selection_polygon, progress=job.reportProgress)
+
+            self.image_and_selection_source.runEffect(Settings.Recipe.EFFECT_NAME, effect, steps=steps)
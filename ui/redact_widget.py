@@ -0,0 +1,74 @@
+from PyQt5.QtWidgets import QVBoxLayout, QWidget, QPushButton, QCheckBox, QComboBox, QMessageBox
+
+from utils.detection import load_cascade
+from utils.recipe import redact
+from utils.qimage_bridge import array_to_pil_image
+from config.settings import Settings
+
+
+class RedactWidget(QWidget):
+    """Detect faces and license plates and apply mosaic or blur to each of them
+
+    Detection and the effect run as one edit on the effect worker; the
+    detection time and region count show up in the status bar.
+    """
+    def __init__(self, image_and_selection_source):
+        super().__init__()
+        self.image_and_selection_source = image_and_selection_source
+        self._initUI()
+
+    def _initUI(self):
+        """Initialize the user interface"""
+        layout = QVBoxLayout()
+        layout.setSizeConstraint(QVBoxLayout.SetMinAndMaxSize)
+
+        # One checkbox per detection target
+        self.targetCheckBoxes = {}
+        for target in Settings.Detection.CASCADES:
+            checkBox = QCheckBox(Settings.Detection.TARGET_TEXT.get(target, target), self)
+            checkBox.setChecked(target in Settings.Detection.TARGETS)
+            layout.addWidget(checkBox)
+            self.targetCheckBoxes[target] = checkBox
+
+        # Effect applied to the detected regions
+        self.effectComboBox = QComboBox(self)
+        for effect, text in Settings.Detection.EFFECT_TEXT.items():
+            self.effectComboBox.addItem(text, effect)
+        layout.addWidget(self.effectComboBox)
+
+        # Detect and redact button
+        self.redactButton = QPushButton(
+            Settings.get_button_text_with_shortcut(Settings.ButtonText.Tools.AUTO_REDACT),
+            self
+        )
+        self.redactButton.clicked.connect(self.applyRedact)
+        self.redactButton.setFixedHeight(Settings.Common.Sizes.BUTTON_HEIGHT)
+        layout.addWidget(self.redactButton)
+
+        self.setLayout(layout)
+
+    def step(self):
+        """Return the redact recipe step for the current settings"""
+        return {
+            'op': 'redact',
+            'targets': [target for target, checkBox in self.targetCheckBoxes.items() if checkBox.isChecked()],
+            'effect': self.effectComboBox.currentData(),
+        }
+
+    def applyRedact(self):
+        """Detect the checked targets and redact them on a worker thread"""
+        pixmap = self.image_and_selection_source.getImage()
+        step = self.step()
+        if not pixmap or not step['targets']:
+            return
+        try:
+            for target in step['targets']:
+                load_cascade(target)  # Fail here rather than on the worker
+        except ValueError as e:
+            QMessageBox.warning(self, Settings.Detection.ERROR_TITLE, str(e))
+            return
+
+        def effect(image_array, job):
+            redact(array_to_pil_image(image_array), step, job.reportProgress)
+
+        self.image_and_selection_source.runEffect(Settings.Detection.EFFECT_NAME, effect, steps=[step])
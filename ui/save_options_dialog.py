@@ -0,0 +1,64 @@
+from PyQt5.QtWidgets import QDialog, QFormLayout, QSpinBox, QCheckBox, QDialogButtonBox
+
+from utils.image_saving import save_format, default_save_options
+from config.settings import Settings
+
+
+class SaveOptionsDialog(QDialog):
+    """Ask for the encoder options of the format being saved
+
+    Only the controls that apply to the file's format are shown.
+    """
+    def __init__(self, path, options=None, parent=None):
+        super().__init__(parent)
+        self.format = save_format(path)
+        self.options = {**default_save_options(), **(options or {})}
+        self._initUI()
+
+    def _initUI(self):
+        self.setWindowTitle(Settings.Image.Save.OPTIONS_TITLE)
+        layout = QFormLayout()
+
+        if self.format in ('JPEG', 'WEBP'):
+            key = 'quality' if self.format == 'JPEG' else 'webp_quality'
+            self.qualitySpinBox = QSpinBox(self)
+            self.qualitySpinBox.setRange(1, 100)
+            self.qualitySpinBox.setValue(self.options[key])
+            self.qualitySpinBox.valueChanged.connect(lambda value: self.options.update({key: value}))
+            layout.addRow(Settings.Image.Save.QUALITY_LABEL, self.qualitySpinBox)
+
+        if self.format == 'JPEG':
+            self.progressiveCheckBox = QCheckBox(Settings.Image.Save.PROGRESSIVE_LABEL, self)
+            self.progressiveCheckBox.setChecked(self.options['progressive'])
+            self.progressiveCheckBox.toggled.connect(lambda checked: self.options.update(progressive=checked))
+            layout.addRow(self.progressiveCheckBox)
+
+        if self.format == 'PNG':
+            self.compressLevelSpinBox = QSpinBox(self)
+            self.compressLevelSpinBox.setRange(0, 9)
+            self.compressLevelSpinBox.setValue(self.options['compress_level'])
+            self.compressLevelSpinBox.valueChanged.connect(lambda value: self.options.update(compress_level=value))
+            layout.addRow(Settings.Image.Save.COMPRESS_LEVEL_LABEL, self.compressLevelSpinBox)
+
+        if self.format == 'WEBP':
+            self.losslessCheckBox = QCheckBox(Settings.Image.Save.LOSSLESS_LABEL, self)
+            self.losslessCheckBox.setChecked(self.options['lossless'])
+            self.losslessCheckBox.toggled.connect(lambda checked: self.options.update(lossless=checked))
+            layout.addRow(self.losslessCheckBox)
+
+        buttons = QDialogButtonBox(QDialogButtonBox.Ok | QDialogButtonBox.Cancel, self)
+        buttons.accepted.connect(self.accept)
+        buttons.rejected.connect(self.reject)
+        layout.addRow(buttons)
+        self.setLayout(layout)
+
+    @staticmethod
+    def getOptions(path, options=None, parent=None):
+        """Show the dialog and return the chosen options, or None if cancelled
+
+        Formats without encoder options return the given options unchanged.
+        """
+        dialog = SaveOptionsDialog(path, options, parent)
+        if dialog.format not in ('JPEG', 'PNG', 'WEBP'):
+            return dialog.options
+        return dialog.options if dialog.exec_() == QDialog.Accepted else None
@@ -4,6 +4,7 @@ from PyQt5.QtWidgets import (QLabel, QVBoxLayout, QWidget, QPushButton,
 from PyQt5.QtCore import Qt
 from PyQt5.QtGui import QPixmap, QPainter, QFont, QFontDatabase, QColor
 from config.settings import Settings
+from utils.image_utils import text_font, draw_text
 import sys
 
 
@@ -214,43 +215,21 @@ class TextWidget(QWidget):
         self._updateAnglePreview()
 
     def applyText(self):
+        """Draw the text centered on the selection on a worker thread"""
         pixmap = self.image_and_selection_source.getImage()
         selection_points = self.image_and_selection_source.getSelectionPolygon()
         text = self.textInput.text()
 
         if pixmap and len(selection_points) > 0 and text:
-            new_pixmap = QPixmap(pixmap)
-            painter = QPainter(new_pixmap)
-            painter.setRenderHint(QPainter.Antialiasing)
-            
-            font = QFont(self.currentFont)
-            font.setPointSize(self.textSize)
-            painter.setFont(font)
-            painter.setPen(self.textColor)
-
-            # Calculate selection center point
-            x_coords = [p[0] for p in selection_points]
-            y_coords = [p[1] for p in selection_points]
-            center_x = (min(x_coords) + max(x_coords)) / 2
-            center_y = (min(y_coords) + max(y_coords)) / 2
-
-            # Save current painter state
-            painter.save()
-            
-            # Move to center point and rotate
-            painter.translate(center_x, center_y)
-            painter.rotate(self.textAngle)
-            
-            # Calculate text dimensions
-            metrics = painter.fontMetrics()
-            text_width = metrics.horizontalAdvance(text)
-            text_height = metrics.height()
-            
-            # Draw text (offset from center point)
-            painter.drawText(int(-text_width/2), int(text_height/4), text)
-            
-            # Restore painter state
-            painter.restore()
-            painter.end()
-
-            self.image_and_selection_source.setImage(new_pixmap) 
\ No newline at end of file
+            family = self.currentFont.family()
+            font = text_font(family, self.textSize)
+            color = QColor(self.textColor)
+            angle = self.textAngle
+
+            def effect(image_array, job):
+                draw_text(image_array, selection_points, text, font, color.name(), angle)
+
+            # Projects draw the same text through the recipe's text operation
+            step = {'op': 'text', 'text': text, 'size': self.textSize, 'color': color.name(),
+                    'angle': angle, 'font': family}
+            self.image_and_selection_source.runEffect(Settings.Text.EFFECT_NAME, effect, steps=[step])
@@ -0,0 +1,71 @@
+import os
+
+from PyQt5.QtCore import QObject, QRunnable, QThreadPool, QCoreApplication, QEventLoop, pyqtSignal
+from PyQt5.QtGui import QImage
+
+
+class _ThumbnailTask(QRunnable):
+    def __init__(self, loader, generation, index, path):
+        super().__init__()
+        self.loader = loader
+        self.generation = generation
+        self.index = index
+        self.path = path
+
+    def run(self):
+        # Skip the work of a folder that is no longer shown
+        if self.generation == self.loader.generation:
+            try:
+                image = QImage(self.loader.cache.ensure(self.path))
+            except Exception:
+                image = QImage()
+            self.loader.loaded.emit(self.generation, self.index, image)
+        self.loader.done.emit()
+
+
+class ThumbnailLoader(QObject):
+    """Load the thumbnails of a list of images on a pool of worker threads
+
+    Thumbnails come from a utils.thumbnails.ThumbnailCache, which generates
+    the missing ones with reduced-size decoding. Decoding and resizing
+    release the GIL, so the threads share the CPU cores. Images whose
+    thumbnail is already cached are queued first, so a folder seen before
+    fills in at once. Each load() starts a new generation; thumbnails of an
+    earlier one are skipped, or dropped if already running.
+    """
+    loaded = pyqtSignal(int, int, QImage)  # generation, index in the list, thumbnail (null if unreadable)
+    done = pyqtSignal()
+
+    def __init__(self, cache, workers=None, parent=None):
+        """
+        Args:
+            workers: Number of threads, None for one per CPU core
+        """
+        super().__init__(parent)
+        self.cache = cache
+        self.generation = 0
+        self._pending = 0
+        self._pool = QThreadPool(self)
+        self._pool.setMaxThreadCount(workers or os.cpu_count() or 1)
+        self.done.connect(self._onDone)
+
+    def isBusy(self):
+        return self._pending > 0
+
+    def load(self, paths):
+        """Queue the thumbnails of paths and return the generation they are reported with"""
+        self.generation += 1
+        hits = [index for index, path in enumerate(paths) if self.cache.cached(path)]
+        cached = set(hits)
+        for index in hits + [index for index in range(len(paths)) if index not in cached]:
+            self._pending += 1
+            self._pool.start(_ThumbnailTask(self, self.generation, index, paths[index]))
+        return self.generation
+
+    def waitForDone(self):
+        """Block until every queued thumbnail has been reported or skipped"""
+        while self.isBusy():
+            QCoreApplication.processEvents(QEventLoop.AllEvents | QEventLoop.WaitForMoreEvents, 50)
+
+    def _onDone(self):
+        self._pending -= 1
@@ -0,0 +1,455 @@
+import math
+from collections import OrderedDict
+
+from PyQt5.QtCore import Qt, QPoint, QPointF, QRect, QRectF, QSize
+from PyQt5.QtWidgets import QAbstractScrollArea
+from PyQt5.QtGui import QPixmap, QImage, QPainter, QColor, QPen, QPolygon, QTransform
+from config.settings import Settings
+from utils.qimage_bridge import array_to_qimage
+from utils.selection import Selection, PolylineSimplifier, combine
+
+
+class TilePyramid:
+    """Mip pyramid of an image, cut into fixed-size tiles on demand
+
+    Level 0 is the full-resolution image; each further level halves the size
+    of the previous one. Tiles are cached in a bounded LRU and only the tiles
+    touching an edited rectangle are dropped when the image changes.
+
+    The image is either a pixmap, whose coarser levels are built the first
+    time they are needed, or a source read tile by tile (see setSource()),
+    which is never held in memory as a whole.
+    """
+    def __init__(self, tile_size, cache_size):
+        self.tile_size = tile_size
+        self.cache_size = cache_size
+        self.pixmap = QPixmap()
+        self.source = None
+        self._levels = []
+        self._tiles = OrderedDict()
+
+    def setPixmap(self, pixmap, dirtyRect=None):
+        """Show pixmap, rebuilding only what dirtyRect touches if it is given"""
+        resized = self.source is not None or pixmap.size() != self.pixmap.size()
+        self.pixmap = pixmap
+        self.source = None
+        if dirtyRect is None or resized:
+            self._tiles.clear()
+            self._levels = [None] * self.levelCount()
+            return
+
+        for level in range(1, len(self._levels)):
+            if self._levels[level] is not None:
+                self._updateLevel(level, self._levelRect(dirtyRect, level))
+        self._dropTiles(dirtyRect)
+
+    def setSource(self, source, dirtyRect=None):
+        """Show source, an image too large to hold as a pixmap, or nothing with None
+
+        source has a size and read_scaled(box, size), like a
+        utils.working_buffer.WorkingBuffer. Every tile of every level is read
+        from it on demand, so only the pixels shown are paged in and no level
+        is built as a whole.
+
+        Args:
+            dirtyRect: Changed area in source pixels, for the same source
+        """
+        changed = source is not self.source or not self.pixmap.isNull()
+        self.pixmap = QPixmap()
+        self.source = source
+        if dirtyRect is None or changed:
+            self._tiles.clear()
+            self._levels = [None] * self.levelCount() if source is not None else []
+            return
+        self._dropTiles(dirtyRect)
+
+    def isNull(self):
+        return self.source is None and self.pixmap.isNull()
+
+    def imageSize(self):
+        """(width, height) of level 0"""
+        if self.source is not None:
+            return tuple(self.source.size)
+        return self.pixmap.width(), self.pixmap.height()
+
+    def levelCount(self):
+        """Number of levels until the whole image fits in one tile"""
+        longest = max(*self.imageSize(), 1)
+        return 1 + max(0, math.ceil(math.log2(longest / self.tile_size)))
+
+    def levelForZoom(self, zoom):
+        """Coarsest level that still has at least one pixel per screen pixel"""
+        if zoom >= 1:
+            return 0
+        return min(len(self._levels) - 1, int(math.floor(math.log2(1 / zoom))))
+
+    def levelSize(self, level):
+        scale = 2 ** level
+        width, height = self.imageSize()
+        return (math.ceil(width / scale), math.ceil(height / scale))
+
+    def tile(self, level, column, row):
+        """Return the tile pixmap at (column, row) of level"""
+        key = (level, column, row)
+        tile = self._tiles.get(key)
+        if tile is not None:
+            self._tiles.move_to_end(key)
+            return tile
+
+        rect = self.tileRect(level, column, row)
+        if self.source is not None:
+            box = self._tileImageRect(level, column, row).intersected(QRect(0, 0, *self.imageSize()))
+            pixels = self.source.read_scaled((box.left(), box.top(), box.right() + 1, box.bottom() + 1),
+                                             (rect.width(), rect.height()))
+            tile = QPixmap.fromImage(array_to_qimage(pixels))
+        elif level == 0:
+            tile = self.pixmap.copy(rect)
+        else:
+            tile = QPixmap.fromImage(self._level(level).copy(rect))
+        self._tiles[key] = tile
+        if len(self._tiles) > self.cache_size:
+            self._tiles.popitem(last=False)
+        return tile
+
+    def tileRect(self, level, column, row):
+        """Rectangle of a tile in level pixels, clipped to the level size"""
+        width, height = self.levelSize(level)
+        size = self.tile_size
+        return QRect(column * size, row * size, size, size).intersected(QRect(0, 0, width, height))
+
+    def tilesInRect(self, level, imageRect):
+        """(column, row) of every tile of level overlapping imageRect"""
+        rect = self._levelRect(imageRect, level)
+        size = self.tile_size
+        return [(column, row)
+                for row in range(rect.top() // size, rect.bottom() // size + 1)
+                for column in range(rect.left() // size, rect.right() // size + 1)]
+
+    def _levelRect(self, imageRect, level):
+        """Map a rectangle of image pixels to the level pixels covering it"""
+        scale = 2 ** level
+        width, height = self.levelSize(level)
+        left, top = imageRect.left() // scale, imageRect.top() // scale
+        right = -(-(imageRect.right() + 1) // scale)
+        bottom = -(-(imageRect.bottom() + 1) // scale)
+        return QRect(left, top, right - left, bottom - top).intersected(QRect(0, 0, width, height))
+
+    def _tileImageRect(self, level, column, row):
+        scale = 2 ** level
+        rect = self.tileRect(level, column, row)
+        return QRect(rect.x() * scale, rect.y() * scale, rect.width() * scale, rect.height() * scale)
+
+    def _dropTiles(self, dirtyRect):
+        for key in [key for key in self._tiles if self._tileImageRect(*key).intersects(dirtyRect)]:
+            del self._tiles[key]
+
+    def _level(self, level):
+        if self._levels[level] is None:
+            width, height = self.levelSize(level)
+            image = QImage(width, height, QImage.Format_ARGB32_Premultiplied)
+            self._levels[level] = image
+            self._updateLevel(level, QRect(0, 0, width, height))
+        return self._levels[level]
+
+    def _updateLevel(self, level, rect):
+        """Redraw rect of level by halving the same area of the level below
+
+        Level 1 is drawn from the pixmap one band of tile rows at a time, so
+        no full-resolution copy of the image is made.
+        """
+        width, height = self.levelSize(level - 1)
+        below = self._level(level - 1) if level > 1 else None
+        painter = QPainter(self._levels[level])
+        painter.setCompositionMode(QPainter.CompositionMode_Source)
+        painter.setRenderHint(QPainter.SmoothPixmapTransform)
+        band_rows = self.tile_size if level == 1 else max(1, rect.height())
+        for top in range(rect.top(), rect.top() + rect.height(), band_rows):
+            band = QRect(rect.left(), top, rect.width(), min(band_rows, rect.top() + rect.height() - top))
+            sourceRect = QRect(band.x() * 2, band.y() * 2, band.width() * 2, band.height() * 2)
+            sourceRect = sourceRect.intersected(QRect(0, 0, width, height))
+            if below is None:
+                source = self.pixmap.copy(sourceRect).toImage()
+                sourceRect.moveTo(0, 0)
+            else:
+                source = below
+            painter.drawImage(QRectF(band), source, QRectF(sourceRect))
+        painter.end()
+
+
+# Zoomable image view that selects rectangle or lasso regions with the mouse;
+# shift-drag adds a region to the selection instead of replacing it
+class SelectableImageView(QAbstractScrollArea):
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.selection_polygon = QPolygon()  # In image pixels, the region being drawn or the last one
+        self.selection_parts = []  # Earlier regions of a multi-selection, as QPolygons
+        self.start_point = QPoint()
+        self.is_selecting = False
+        self.mode = Settings.Image.Selection.MODES['RECT']  # Default mode is rectangle
+        self.zoom = 1.0
+        self.scale = 1  # Image pixels per pixmap pixel when showing an overview
+        self.image_size = QSize()
+        self.preview_image = None  # Effect preview drawn over preview_rect
+        self.preview_rect = QRect()
+        self._selection = None  # Selection built from _selectionKey, a copy of all polygons
+        self._selectionKey = []
+        self._lasso = None  # PolylineSimplifier of the lasso being drawn
+        self._pyramid = TilePyramid(Settings.Image.View.TILE_SIZE, Settings.Image.View.TILE_CACHE_SIZE)
+        # Full-resolution tiles of an image shown as an overview, for zooms finer than the overview
+        self._sourcePyramid = TilePyramid(Settings.Image.View.TILE_SIZE, Settings.Image.View.TILE_CACHE_SIZE)
+        self.horizontalScrollBar().valueChanged.connect(self.viewport().update)
+        self.verticalScrollBar().valueChanged.connect(self.viewport().update)
+
+    def selectionPolygons(self):
+        """Return every non-empty polygon of the selection, oldest first"""
+        return [polygon for polygon in self.selection_parts + [self.selection_polygon] if not polygon.isEmpty()]
+
+    def selection(self):
+        """Return the current selection, rebuilt only when a polygon changes
+
+        One region gives a Selection, several a MultiSelection whose parts
+        share one mask. The copies of the polygons it was built from are the
+        invalidation key, so the selection and its rasterized masks survive
+        until the user selects something else, however the polygons were
+        changed.
+        """
+        polygons = self.selectionPolygons()
+        if self._selection is None or self._selectionKey != polygons:
+            self._selectionKey = [QPolygon(polygon) for polygon in polygons]
+            points = [[(point.x(), point.y()) for point in polygon] for polygon in polygons]
+            self._selection = combine(points) if points else Selection(())
+        return self._selection
+
+    def selectionRect(self):
+        """Return the bounding QRect of all selected regions, in image pixels"""
+        rect = QRect()
+        for polygon in self.selectionPolygons():
+            rect = rect.united(polygon.boundingRect())
+        return rect
+
+    def setSelections(self, polygons):
+        """Replace the selection with the given polygons of (x, y) points"""
+        polygons = [QPolygon([QPoint(x, y) for x, y in polygon]) for polygon in polygons]
+        self.selection_parts = polygons[:-1]
+        self.selection_polygon = polygons[-1] if polygons else QPolygon()
+        self.clearPreview()
+        self.viewport().update()
+
+    def clearSelection(self):
+        self.setSelections([])
+
+    def pixmap(self):
+        pixmap = self._pyramid.pixmap
+        return None if pixmap.isNull() else pixmap
+
+    def setPixmap(self, pixmap, dirtyRect=None, scale=1, imageSize=None, source=None):
+        """Show pixmap; when dirtyRect is given only the tiles it touches are redrawn
+
+        Args:
+            dirtyRect: Changed area in pixmap pixels
+            scale: Image pixels per pixmap pixel, for a downsampled overview of
+                an image too large to show directly
+            imageSize: QSize of that image, defaults to the pixmap size times scale
+            source: That image, read tile by tile when zoomed in beyond the
+                overview, see TilePyramid.setSource()
+        """
+        self.scale = scale
+        self.image_size = imageSize or pixmap.size() * scale
+        self._pyramid.setPixmap(pixmap, dirtyRect)
+        if source is not None and dirtyRect is not None:
+            dirtyRect = QRect(dirtyRect.x() * scale, dirtyRect.y() * scale,
+                              dirtyRect.width() * scale, dirtyRect.height() * scale)
+        self._sourcePyramid.setSource(source, dirtyRect)
+        self._updateScrollBars()
+        self.viewport().update()
+
+    def setPreview(self, image, rect):
+        """Draw image scaled into rect (in image pixels) on top of the image"""
+        self.preview_image = image
+        self.preview_rect = rect
+        self.viewport().update()
+
+    def clearPreview(self):
+        if self.preview_image is not None:
+            self.preview_image = None
+            self.viewport().update()
+
+    def toggleMode(self):
+        # Toggle between rectangle and lasso modes
+        self.mode = Settings.Image.Selection.MODES['LASSO'] if self.mode == Settings.Image.Selection.MODES['RECT'] else Settings.Image.Selection.MODES['RECT']
+
+    def setZoom(self, zoom, anchor=None):
+        """Zoom to the given scale, keeping the image point under anchor in place
+
+        Args:
+            anchor: Viewport position to keep fixed, defaults to the center
+        """
+        zoom = min(max(zoom, Settings.Image.View.MIN_ZOOM), Settings.Image.View.MAX_ZOOM)
+        if anchor is None:
+            anchor = self.viewport().rect().center()
+        image_x = (anchor.x() + self.horizontalScrollBar().value()) / self.zoom
+        image_y = (anchor.y() + self.verticalScrollBar().value()) / self.zoom
+
+        self.zoom = zoom
+        self._updateScrollBars()
+        self.horizontalScrollBar().setValue(round(image_x * zoom - anchor.x()))
+        self.verticalScrollBar().setValue(round(image_y * zoom - anchor.y()))
+        self.viewport().update()
+
+    def zoomIn(self):
+        self.setZoom(self.zoom * Settings.Image.View.ZOOM_STEP)
+
+    def zoomOut(self):
+        self.setZoom(self.zoom / Settings.Image.View.ZOOM_STEP)
+
+    def resetZoom(self):
+        self.setZoom(1.0)
+
+    def mapToImage(self, pos):
+        """Map a viewport position to the image pixel under it"""
+        return QPoint(
+            math.floor((pos.x() + self.horizontalScrollBar().value()) / self.zoom),
+            math.floor((pos.y() + self.verticalScrollBar().value()) / self.zoom)
+        )
+
+    def mapFromImage(self, point):
+        """Map an image position to viewport coordinates"""
+        return QPointF(
+            point.x() * self.zoom - self.horizontalScrollBar().value(),
+            point.y() * self.zoom - self.verticalScrollBar().value()
+        )
+
+    def visibleImageRect(self):
+        """Image pixels currently shown in the viewport"""
+        topLeft = self.mapToImage(QPoint(0, 0))
+        bottomRight = self.mapToImage(QPoint(self.viewport().width() - 1, self.viewport().height() - 1))
+        return QRect(topLeft, bottomRight).intersected(QRect(QPoint(0, 0), self.image_size))
+
+    def _updateScrollBars(self):
+        size = self.image_size
+        for scrollBar, length, page in (
+            (self.horizontalScrollBar(), size.width(), self.viewport().width()),
+            (self.verticalScrollBar(), size.height(), self.viewport().height()),
+        ):
+            scrollBar.setPageStep(page)
+            scrollBar.setSingleStep(max(1, page // 10))
+            scrollBar.setRange(0, max(0, math.ceil(length * self.zoom) - page))
+
+    def resizeEvent(self, event):
+        super().resizeEvent(event)
+        self._updateScrollBars()
+
+    def wheelEvent(self, event):
+        if event.modifiers() & Qt.ControlModifier:
+            steps = event.angleDelta().y() / 120
+            self.setZoom(self.zoom * Settings.Image.View.ZOOM_STEP ** steps, event.pos())
+        else:
+            super().wheelEvent(event)
+
+    def mousePressEvent(self, event):
+        if event.button() == Qt.LeftButton:
+            self.clearPreview()
+            self.is_selecting = True
+            self.start_point = self.mapToImage(event.pos())
+            if event.modifiers() & Qt.ShiftModifier:
+                if not self.selection_polygon.isEmpty():
+                    self.selection_parts.append(self.selection_polygon)
+            else:
+                self.selection_parts = []
+            self.selection_polygon = QPolygon()
+            self.selection_polygon.append(self.start_point)
+            if self.mode == Settings.Image.Selection.MODES['LASSO']:
+                # Lasso points are simplified within a tolerance of screen pixels
+                self._lasso = PolylineSimplifier((self.start_point.x(), self.start_point.y()),
+                                                 Settings.Image.Selection.LASSO_TOLERANCE / self.zoom)
+            self.viewport().update()
+
+    def mouseMoveEvent(self, event):
+        if self.is_selecting:
+            current_point = self.mapToImage(event.pos())
+            if self.mode == Settings.Image.Selection.MODES['RECT']:
+                # Calculate the rectangle points based on start and current points
+                self.selection_polygon = QPolygon([
+                    self.start_point,
+                    QPoint(current_point.x(), self.start_point.y()),
+                    current_point,
+                    QPoint(self.start_point.x(), current_point.y())
+                ])
+                self.viewport().update()
+            elif self._lasso is not None:
+                self._addLassoPoint(current_point)
+
+    def _addLassoPoint(self, point):
+        """Add a point to the lasso and repaint only the segments it changed"""
+        last = self.selection_polygon.count() - 1
+        if point == self.selection_polygon.point(last):
+            return
+        changed = [self.selection_polygon.point(last), point]
+        if self._lasso.add((point.x(), point.y())):
+            self.selection_polygon.append(point)
+        else:
+            # The last vertex moves to the new point, redrawing the segment before it
+            changed.append(self.selection_polygon.point(last - 1))
+            self.selection_polygon.setPoint(last, point)
+        self.viewport().update(self._segmentsRect(changed))
+
+    def _segmentsRect(self, points):
+        """Viewport rect covering the lines between image points, pen included"""
+        mapped = [self.mapFromImage(point) for point in points]
+        xs, ys = [point.x() for point in mapped], [point.y() for point in mapped]
+        margin = Settings.Image.Selection.PEN_WIDTH + 1
+        rect = QRectF(min(xs), min(ys), max(xs) - min(xs), max(ys) - min(ys))
+        return rect.adjusted(-margin, -margin, margin, margin).toAlignedRect()
+
+    def mouseReleaseEvent(self, event):
+        if event.button() == Qt.LeftButton:
+            self.is_selecting = False
+            self._lasso = None
+            self.viewport().update()
+
+    def _mapRectFromImage(self, rect):
+        topLeft = self.mapFromImage(rect.topLeft())
+        return QRectF(topLeft.x(), topLeft.y(), rect.width() * self.zoom, rect.height() * self.zoom)
+
+    def paintEvent(self, event):
+        # Draw only the tiles of the matching pyramid level that are exposed;
+        # zoomed in beyond an overview, they are read from the full image
+        pyramid, pyramidScale = self._pyramid, self.scale
+        if not self._sourcePyramid.isNull() and self.zoom * self.scale > 1:
+            pyramid, pyramidScale = self._sourcePyramid, 1
+
+        painter = QPainter(self.viewport())
+        if self.zoom * pyramidScale < 1:
+            painter.setRenderHint(QPainter.SmoothPixmapTransform)
+
+        if not pyramid.isNull():
+            topLeft = self.mapToImage(event.rect().topLeft())
+            bottomRight = self.mapToImage(event.rect().bottomRight())
+            exposed = QRect(
+                QPoint(topLeft.x() // pyramidScale, topLeft.y() // pyramidScale),
+                QPoint(bottomRight.x() // pyramidScale, bottomRight.y() // pyramidScale)
+            ).intersected(QRect(0, 0, *pyramid.imageSize()))
+            level = pyramid.levelForZoom(self.zoom * pyramidScale)
+            scale = 2 ** level * pyramidScale
+            for column, row in pyramid.tilesInRect(level, exposed):
+                tile = pyramid.tile(level, column, row)
+                rect = pyramid.tileRect(level, column, row)
+                target = QRect(rect.x() * scale, rect.y() * scale, rect.width() * scale, rect.height() * scale)
+                painter.drawPixmap(self._mapRectFromImage(target), tile, QRectF(tile.rect()))
+
+        if self.preview_image is not None:
+            painter.drawImage(self._mapRectFromImage(self.preview_rect), self.preview_image)
+
+        # Polygons are drawn in image coordinates with a pen of constant screen width
+        pen = QPen(QColor(*Settings.Image.Selection.PEN_COLOR), Settings.Image.Selection.PEN_WIDTH, Qt.SolidLine)
+        pen.setCosmetic(True)
+        painter.setPen(pen)
+        painter.setTransform(QTransform(self.zoom, 0, 0, self.zoom,
+                                        -self.horizontalScrollBar().value(), -self.verticalScrollBar().value()))
+        for polygon in self.selectionPolygons():
+            if polygon is self.selection_polygon and self._lasso is not None:
+                # An open line while the lasso is drawn, so each move only touches its last segment
+                painter.drawPolyline(polygon)
+            else:
+                painter.drawPolygon(polygon)
+        painter.end()
@@ -0,0 +1,277 @@
+import argparse
+import glob
+import os
+import shlex
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import numpy as np
+from PIL import Image
+
+from config.settings import Settings
+from utils.recipe import OPERATIONS, load_recipe, validate_steps, run_recipe
+from utils.image_saving import save_image_array
+from utils.tiling import set_tile_workers, set_low_memory, tile_scheduler
+from utils.instrumentation import OperationTrace, activate
+
+
+def _parse_value(key, value):
+    """Convert a key=value string from the command line to its Python value"""
+    if key == 'rect':
+        return [int(v) for v in value.split(',')]
+    if key == 'polygon':
+        return [[int(v) for v in point.split(',')] for point in value.split(';')]
+    if key == 'polygons':
+        return [_parse_value('polygon', polygon) for polygon in value.split('|')]
+    if key in ('text', 'timer', 'font', 'color', 'effect'):
+        return value
+    if key == 'targets':
+        return value.split(',')
+    if key == 'block_size' and 'x' in value:
+        return [int(v) for v in value.split('x')]
+    try:
+        return int(value)
+    except ValueError:
+        return float(value)
+
+
+def parse_operation(spec):
+    """Parse an operation spec such as "mosaic rect=10,10,200,100 block_size=20"
+
+    The first word names the operation, the rest are key=value parameters.
+    Polygons are written as "x,y;x,y;...", several of them as
+    "polygons=x,y;x,y;...|x,y;x,y;...", rects as "x,y,width,height" and
+    rectangular mosaic blocks as "block_size=widthxheight".
+
+    Returns:
+        dict: The operation, with its name under 'op'
+    """
+    words = shlex.split(spec)
+    if not words or words[0] not in OPERATIONS:
+        raise ValueError(f"Unknown operation in '{spec}', expected one of: {', '.join(OPERATIONS)}")
+
+    operation = {'op': words[0]}
+    for word in words[1:]:
+        key, separator, value = word.partition('=')
+        if not separator:
+            raise ValueError(f"Expected key=value, got '{word}'")
+        operation[key] = _parse_value(key, value)
+    return operation
+
+
+def collect_inputs(patterns):
+    """Expand files, directories and glob patterns into a sorted list of image paths"""
+    paths = set()
+    for pattern in patterns:
+        if os.path.isdir(pattern):
+            for name in os.listdir(pattern):
+                if name.lower().endswith(Settings.Batch.IMAGE_EXTENSIONS):
+                    paths.add(os.path.join(pattern, name))
+        else:
+            paths.update(path for path in glob.glob(pattern) if os.path.isfile(path))
+    return sorted(paths)
+
+
+def output_paths(paths, output_dir):
+    """Map every input path to the path its result is saved to under output_dir
+
+    Each input keeps its path relative to the deepest directory holding all
+    the inputs, so same-named images from different folders do not
+    overwrite each other. An output that would overwrite an input image, or
+    the output of an earlier input, maps to None instead; paths are compared
+    after os.path.normcase().
+
+    Returns:
+        dict: Output path (or None) of every input path
+    """
+    if not paths:
+        return {}
+    root = os.path.commonpath([os.path.dirname(os.path.abspath(path)) for path in paths])
+    inputs = {os.path.normcase(os.path.abspath(path)) for path in paths}
+    written = set()
+    outputs = {}
+    for path in paths:
+        output = os.path.join(output_dir, os.path.relpath(os.path.abspath(path), root))
+        key = os.path.normcase(os.path.abspath(output))
+        outputs[path] = None if key in inputs or key in written else output
+        written.add(key)
+    return outputs
+
+
+def process_file(path, operations, output, save_options=None):
+    """Open one image, apply the operations and save it to output
+
+    Errors are reported in the result instead of raised, so one bad file does
+    not stop the batch.
+
+    Args:
+        output: Path to save to, see output_paths(); None refuses the file
+        save_options: Encoder options, see utils.image_saving.encoder_params
+
+    Returns:
+        dict: path, output, seconds, megapixels, bytes written, error (None on
+        success) and, when a redact step ran, detect_seconds and detections
+    """
+    start = time.perf_counter()
+    result = {'path': path, 'output': output, 'megapixels': 0.0, 'bytes': 0, 'error': None}
+    if output is None:
+        result['error'] = "Refused: the output would overwrite an input image or another output"
+        result['seconds'] = 0.0
+        return result
+    try:
+        os.makedirs(os.path.dirname(output) or '.', exist_ok=True)
+        with Image.open(path) as source:
+            has_alpha = 'A' in source.mode or 'transparency' in source.info
+            image_array = np.array(source.convert('RGBA'))
+        result['megapixels'] = image_array.shape[0] * image_array.shape[1] / 1e6
+
+        # Redact steps record their detection time and count in the trace
+        trace = OperationTrace(os.path.basename(path))
+        with activate(trace):
+            run_recipe(image_array, operations)
+        if 'detect' in trace.stages:
+            result['detect_seconds'] = trace.stages['detect'] / 1000
+            result['detections'] = trace.fields.get('detections', 0)
+
+        result['bytes'] = save_image_array(image_array, output, save_options, has_alpha)['bytes']
+    except Exception as e:
+        result['error'] = f"{type(e).__name__}: {e}"
+    result['seconds'] = time.perf_counter() - start
+    return result
+
+
+def _init_worker(peak_bytes):
+    # Each process already takes a core, so effects run their tiles inline
+    set_tile_workers(1)
+    set_low_memory(peak_bytes)
+
+
+def run_batch(paths, operations, output_dir, workers=None, report=print, save_options=None, memory_cap=None):
+    """Process every path with a pool of worker processes
+
+    Results are saved under output_dir as laid out by output_paths().
+
+    Args:
+        workers: Number of processes, None for one per CPU core; 1 runs inline
+        report: Callable receiving one line of progress text at a time
+        save_options: Encoder options passed on to process_file()
+        memory_cap: Bytes of effect working memory for the whole batch, split
+            evenly over the processes, which then run in low-memory mode
+            (see utils.tiling.TileScheduler). Decoded images come on top.
+
+    Returns:
+        list: The process_file() result of every path, in completion order
+    """
+    os.makedirs(output_dir, exist_ok=True)
+    outputs = output_paths(paths, output_dir)
+    start = time.perf_counter()
+    results = []
+
+    def record(result):
+        results.append(result)
+        status = result['error'] or f"{result['seconds'] * 1000:.1f} ms, {result['bytes'] / 1e6:.2f} MB"
+        if 'detect_seconds' in result:
+            status += f", {result['detections']} regions detected in {result['detect_seconds'] * 1000:.1f} ms"
+        report(f"[{len(results)}/{len(paths)}] {result['path']}: {status}")
+
+    if workers == 1:
+        peak_bytes = tile_scheduler.peak_bytes
+        if memory_cap is not None:
+            set_low_memory(memory_cap)
+        try:
+            for path in paths:
+                record(process_file(path, operations, outputs[path], save_options))
+        finally:
+            set_low_memory(peak_bytes)
+    else:
+        processes = workers or os.cpu_count() or 1
+        peak_bytes = memory_cap // processes if memory_cap is not None else None
+        with ProcessPoolExecutor(max_workers=processes, initializer=_init_worker, initargs=(peak_bytes,)) as executor:
+            futures = [executor.submit(process_file, path, operations, outputs[path], save_options)
+                       for path in paths]
+            for future in as_completed(futures):
+                record(future.result())
+
+    elapsed = time.perf_counter() - start
+    failed = sum(1 for result in results if result['error'])
+    megapixels = sum(result['megapixels'] for result in results)
+    mean_ms = sum(result['seconds'] for result in results) / max(1, len(results)) * 1000
+    report(f"Processed {len(results)} images ({failed} failed) in {elapsed:.2f} s: "
+           f"{len(results) / max(elapsed, 1e-9):.1f} images/s, "
+           f"{megapixels / max(elapsed, 1e-9):.1f} MP/s, {mean_ms:.1f} ms/image mean")
+    return results
+
+
+def _operation_argument(spec):
+    try:
+        return parse_operation(spec)
+    except ValueError as e:
+        raise argparse.ArgumentTypeError(str(e))
+
+
+def add_save_arguments(parser):
+    """Add the encoder option flags shared by the command line tools"""
+    parser.add_argument('--quality', type=int, default=Settings.Image.Save.JPEG_QUALITY,
+                        help="JPEG quality 1-100 (default: %(default)s)")
+    parser.add_argument('--progressive', action='store_true', default=Settings.Image.Save.JPEG_PROGRESSIVE,
+                        help="Write progressive JPEGs")
+    parser.add_argument('--compress-level', type=int, choices=range(10), metavar='0-9',
+                        default=Settings.Image.Save.PNG_COMPRESS_LEVEL,
+                        help="PNG zlib level, lower is faster (default: %(default)s)")
+    parser.add_argument('--webp-quality', type=int, default=Settings.Image.Save.WEBP_QUALITY,
+                        help="WebP quality 1-100 (default: %(default)s)")
+    parser.add_argument('--lossless', action='store_true', default=Settings.Image.Save.WEBP_LOSSLESS,
+                        help="Write lossless WebP")
+
+
+def save_options_from_args(args):
+    """Collect the flags added by add_save_arguments() into save options"""
+    return {
+        'quality': args.quality,
+        'progressive': args.progressive,
+        'compress_level': args.compress_level,
+        'webp_quality': args.webp_quality,
+        'lossless': args.lossless,
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Apply mosaic, blur, text and camera effects, and redact detected faces and plates, "
+                    "to many images without the GUI.",
+        epilog='Example: batch.py shots/ -o out/ --op "mosaic rect=10,10,200,80 block_size=20" '
+               '--op "camera battery=0.5 timer=00:00:01.000"'
+    )
+    parser.add_argument('inputs', nargs='+', help="Image files, directories or glob patterns")
+    parser.add_argument('-o', '--output-dir', required=True, help="Directory for the processed images")
+    parser.add_argument('--recipe', help="JSON or YAML recipe whose steps run before any --op")
+    parser.add_argument('--op', dest='operations', action='append', type=_operation_argument, default=[],
+                        help="Operation to apply, in order; may be repeated")
+    parser.add_argument('-j', '--workers', type=int, default=Settings.Batch.WORKERS,
+                        help="Number of worker processes (default: one per CPU core)")
+    parser.add_argument('--memory-cap', type=float, metavar='MB',
+                        help="Effect working memory for the whole batch, split over the worker processes; "
+                             "turns on low-memory mode (strip-wise, float32)")
+    add_save_arguments(parser)
+    args = parser.parse_args(argv)
+    if args.memory_cap is not None and args.memory_cap <= 0:
+        parser.error("--memory-cap must be positive")
+
+    operations = args.operations
+    if args.recipe:
+        try:
+            operations = load_recipe(args.recipe) + operations
+        except (OSError, ValueError) as e:
+            parser.error(f"Cannot load recipe: {e}")
+    try:
+        validate_steps(operations)
+    except ValueError as e:
+        parser.error(str(e))
+
+    paths = collect_inputs(args.inputs)
+    if not paths:
+        parser.error("No input images found")
+    memory_cap = int(args.memory_cap * 1024 * 1024) if args.memory_cap is not None else None
+    results = run_batch(paths, operations, args.output_dir, args.workers,
+                        save_options=save_options_from_args(args), memory_cap=memory_cap)
+    return 1 if any(result['error'] for result in results) else 0
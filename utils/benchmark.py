@@ -0,0 +1,263 @@
+import argparse
+import json
+import math
+import platform
+import time
+import tracemalloc
+
+import numpy as np
+from PIL import Image
+
+from config.settings import Settings
+from utils.image_utils import (
+    apply_mosaic,
+    apply_optimized_motion_blur_to_polygon,
+    add_camera_effect,
+    pixmap_to_pil_image_with_alpha,
+    pil_image_to_qimage_with_alpha,
+    motion_blur_kernel_cache,
+    camera_overlay_sprite_cache
+)
+from utils.selection import selection_cache
+from utils.tiling import set_low_memory
+
+
+KERNELS = ('mosaic', 'blur', 'camera', 'pixmap_to_pil', 'pil_to_qimage')
+# Kernels that act on a selection and are timed once per selection shape
+SELECTION_KERNELS = ('mosaic', 'blur')
+SELECTIONS = ('small', 'large', 'lasso')
+
+
+def image_size(megapixels):
+    """Return the (width, height) of a 4:3 image with about the given megapixels"""
+    width = max(1, round(math.sqrt(megapixels * 1e6 * 4 / 3)))
+    return width, max(1, round(width * 3 / 4))
+
+
+def synthetic_image(size, seed=0):
+    """Build an RGBA test image with noise over a gradient, so no kernel sees flat input"""
+    width, height = size
+    rng = np.random.default_rng(seed)
+    pixels = rng.integers(0, 64, (height, width, 4), dtype=np.uint8)
+    pixels[..., 0] += (np.arange(width) * 191 // max(1, width - 1)).astype(np.uint8)
+    pixels[..., 1] += (np.arange(height) * 191 // max(1, height - 1)).astype(np.uint8)[:, None]
+    pixels[..., 3] = 255
+    return Image.fromarray(pixels, 'RGBA')
+
+
+def selection_polygon(shape, size):
+    """Return a polygon for a selection shape, scaled to the image size
+
+    small is a rectangle of 5% of each side, large one of 80%, and lasso a
+    star of Settings.Benchmark.LASSO_POINTS points spanning half the image.
+    """
+    width, height = size
+    center_x, center_y = width // 2, height // 2
+    if shape == 'lasso':
+        points = Settings.Benchmark.LASSO_POINTS
+        polygon = []
+        for index in range(points):
+            angle = 2 * math.pi * index / points
+            radius = 0.25 if index % 2 else 0.15
+            polygon.append((round(center_x + radius * width * math.cos(angle)),
+                            round(center_y + radius * height * math.sin(angle))))
+        return polygon
+    ratio = {'small': 0.05, 'large': 0.8}[shape]
+    half_width, half_height = round(width * ratio / 2), round(height * ratio / 2)
+    return [(center_x - half_width, center_y - half_height), (center_x + half_width, center_y - half_height),
+            (center_x + half_width, center_y + half_height), (center_x - half_width, center_y + half_height)]
+
+
+def _kernel_call(kernel, image, polygon):
+    """Return a callable running kernel once on the image passed to it
+
+    image is only used to build inputs that stay the same between runs, such
+    as the pixmap converted by pixmap_to_pil.
+    """
+    if kernel == 'mosaic':
+        block_size = Settings.Mosaic.MOSAIC_SIZE['DEFAULT']
+        return lambda target: apply_mosaic(target, polygon, block_size)
+    if kernel == 'blur':
+        intensity, angle = Settings.Blur.INTENSITY['DEFAULT'], Settings.Blur.ANGLE['DEFAULT']
+        return lambda target: apply_optimized_motion_blur_to_polygon(target, polygon, intensity, angle, in_place=True)
+    if kernel == 'camera':
+        return lambda target: add_camera_effect(target, 0.5, Settings.Camera.TIMER_TEXT['DEFAULT'])
+    if kernel == 'pixmap_to_pil':
+        from utils.qimage_bridge import array_to_pixmap
+        pixmap = array_to_pixmap(np.asarray(image))
+        return lambda target: pixmap_to_pil_image_with_alpha(pixmap)
+    if kernel == 'pil_to_qimage':
+        return lambda target: pil_image_to_qimage_with_alpha(target)
+    raise ValueError(f"Unknown kernel '{kernel}', expected one of: {', '.join(KERNELS)}")
+
+
+def _clear_caches():
+    selection_cache.clear()
+    motion_blur_kernel_cache.clear()
+    camera_overlay_sprite_cache.clear()
+
+
+def time_call(call, image, repeats, cold=False):
+    """Run call on a fresh copy of image repeats times after one warm-up run
+
+    The kernels edit their image in place, so every run, the warm-up too,
+    gets its own copy, made outside the timed region. Peak memory is what
+    tracemalloc sees, which covers Python and NumPy allocations but not
+    buffers PIL, Qt or OpenCV allocate internally.
+
+    Args:
+        cold: Clear the mask, kernel and sprite caches before every run
+
+    Returns:
+        dict: mean_ms, p95_ms, min_ms and peak_mb over the timed runs
+    """
+    call(image.copy())
+    times = []
+    tracemalloc.start()
+    try:
+        for _ in range(repeats):
+            target = image.copy()
+            if cold:
+                _clear_caches()
+            tracemalloc.reset_peak()
+            start = time.perf_counter()
+            call(target)
+            times.append((time.perf_counter() - start) * 1000)
+            del target
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+    return {
+        'mean_ms': float(np.mean(times)),
+        'p95_ms': float(np.percentile(times, 95)),
+        'min_ms': float(np.min(times)),
+        'peak_mb': peak / 1e6,
+    }
+
+
+def run_benchmarks(megapixels=None, kernels=KERNELS, selections=SELECTIONS, repeats=None, cold=False, report=print):
+    """Time every kernel on synthetic images of each size
+
+    Args:
+        megapixels: Image sizes, defaults to Settings.Benchmark.MEGAPIXELS
+        repeats: Timed runs per case, defaults to Settings.Benchmark.REPEATS
+        report: Callable receiving one line of text per case
+
+    Returns:
+        dict: 'meta' describing the run and 'results', one entry per case
+        keyed by name ("kernel/NMP[/selection]")
+    """
+    megapixels = Settings.Benchmark.MEGAPIXELS if megapixels is None else megapixels
+    repeats = Settings.Benchmark.REPEATS if repeats is None else repeats
+    if any(kernel in ('pixmap_to_pil', 'pil_to_qimage') for kernel in kernels):
+        from PyQt5.QtWidgets import QApplication
+        app = QApplication.instance() or QApplication([])  # QPixmap needs a GUI application
+
+    results = {}
+    for size_mp in megapixels:
+        size = image_size(size_mp)
+        image = synthetic_image(size)
+        for kernel in kernels:
+            shapes = selections if kernel in SELECTION_KERNELS else (None,)
+            for shape in shapes:
+                polygon = selection_polygon(shape, size) if shape else None
+                name = f"{kernel}/{size_mp:g}MP" + (f"/{shape}" if shape else "")
+                result = time_call(_kernel_call(kernel, image, polygon), image, repeats, cold)
+                result.update({'kernel': kernel, 'megapixels': size_mp, 'selection': shape})
+                results[name] = result
+                report(f"{name}: mean {result['mean_ms']:.2f} ms, p95 {result['p95_ms']:.2f} ms, "
+                       f"peak {result['peak_mb']:.1f} MB")
+        del image
+
+    return {
+        'meta': {
+            'time': time.strftime('%Y-%m-%dT%H:%M:%S'),
+            'python': platform.python_version(),
+            'numpy': np.__version__,
+            'platform': platform.platform(),
+            'repeats': repeats,
+            'cold': cold,
+        },
+        'results': results,
+    }
+
+
+def compare(results, baseline, tolerance=None):
+    """Compare two run_benchmarks() outputs case by case
+
+    A case regresses when its mean latency exceeds the baseline's by more than
+    tolerance (a fraction, defaults to Settings.Benchmark.TOLERANCE). Cases
+    missing from either side are skipped.
+
+    Returns:
+        list: (name, baseline_ms, mean_ms, ratio, regressed) for each shared case
+    """
+    tolerance = Settings.Benchmark.TOLERANCE if tolerance is None else tolerance
+    rows = []
+    for name, result in results['results'].items():
+        reference = baseline['results'].get(name)
+        if reference is None:
+            continue
+        ratio = result['mean_ms'] / max(reference['mean_ms'], 1e-9)
+        rows.append((name, reference['mean_ms'], result['mean_ms'], ratio, ratio > 1 + tolerance))
+    return rows
+
+
+def _list_argument(cast, choices=None):
+    def parse(text):
+        values = [cast(value) for value in text.split(',') if value]
+        if choices and any(value not in choices for value in values):
+            raise argparse.ArgumentTypeError(f"Expected a comma separated list of: {', '.join(choices)}")
+        return values
+    return parse
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Time the image_utils kernels on synthetic images and compare with a baseline.",
+        epilog="Example: benchmark.py --megapixels 1,16 -o results.json --baseline baseline.json"
+    )
+    parser.add_argument('--megapixels', type=_list_argument(float),
+                        help="Comma separated image sizes (default: %s)" %
+                             ','.join(f"{size:g}" for size in Settings.Benchmark.MEGAPIXELS))
+    parser.add_argument('--kernels', type=_list_argument(str, KERNELS), default=list(KERNELS),
+                        help="Comma separated kernels to time (default: all)")
+    parser.add_argument('--selections', type=_list_argument(str, SELECTIONS), default=list(SELECTIONS),
+                        help="Comma separated selection shapes for mosaic and blur (default: all)")
+    parser.add_argument('-n', '--repeats', type=int, default=Settings.Benchmark.REPEATS,
+                        help="Timed runs per case (default: %(default)s)")
+    parser.add_argument('--cold', action='store_true', help="Clear the mask, kernel and sprite caches before each run")
+    parser.add_argument('--memory-cap', type=float, metavar='MB',
+                        help="Run mosaic and blur in low-memory mode with this working-memory cap")
+    parser.add_argument('-o', '--output', help="Write the results to this JSON file")
+    parser.add_argument('--baseline', help="JSON results to compare against")
+    parser.add_argument('--tolerance', type=float, default=Settings.Benchmark.TOLERANCE,
+                        help="Allowed slowdown before a case is flagged, as a fraction (default: %(default)s)")
+    args = parser.parse_args(argv)
+    if args.repeats < 1:
+        parser.error("--repeats must be at least 1")
+
+    baseline = None
+    if args.baseline:
+        try:
+            with open(args.baseline, encoding='utf-8') as f:
+                baseline = json.load(f)
+        except (OSError, ValueError) as e:
+            parser.error(f"Cannot load baseline: {e}")
+
+    if args.memory_cap is not None:
+        set_low_memory(int(args.memory_cap * 1024 * 1024))
+    results = run_benchmarks(args.megapixels, args.kernels, args.selections, args.repeats, args.cold)
+    results['meta']['memory_cap_mb'] = args.memory_cap
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(results, f, indent=2)
+
+    if baseline is None:
+        return 0
+    rows = compare(results, baseline, args.tolerance)
+    for name, reference_ms, mean_ms, ratio, regressed in rows:
+        print(f"{'REGRESSION' if regressed else 'ok':10} {name}: {reference_ms:.2f} -> {mean_ms:.2f} ms ({ratio:.2f}x)")
+    regressions = sum(1 for row in rows if row[4])
+    print(f"{regressions} of {len(rows)} cases regressed by more than {args.tolerance:.0%}")
+    return 1 if regressions else 0
@@ -0,0 +1,218 @@
+import argparse
+import os
+import time
+
+import cv2
+import numpy as np
+from PIL import Image
+
+from config.settings import Settings
+from utils.batch_processing import collect_inputs, add_save_arguments, save_options_from_args
+from utils.image_saving import save_format, encoder_params
+from utils.image_utils import camera_overlay_sprite_cache, composite_patches, render_timer_patch
+
+
+def format_timer(seconds):
+    """Format a time in seconds as HH:MM:SS.mmm"""
+    milliseconds = int(round(seconds * 1000))
+    hours, milliseconds = divmod(milliseconds, 3600 * 1000)
+    minutes, milliseconds = divmod(milliseconds, 60 * 1000)
+    seconds, milliseconds = divmod(milliseconds, 1000)
+    return f"{hours:02d}:{minutes:02d}:{seconds:02d}.{milliseconds:03d}"
+
+
+def parse_timer(text):
+    """Parse HH:MM:SS.mmm, MM:SS.mmm or plain seconds into seconds"""
+    seconds = 0.0
+    for part in text.split(':'):
+        seconds = seconds * 60 + float(part)
+    return seconds
+
+
+def is_video(path):
+    return os.path.splitext(path)[1].lower() in Settings.Camera.Sequence.VIDEO_EXTENSIONS
+
+
+def video_fps(path):
+    """Return the frame rate a video reports, or None if it does not report one"""
+    capture = cv2.VideoCapture(path)
+    try:
+        fps = capture.get(cv2.CAP_PROP_FPS) if capture.isOpened() else 0
+    finally:
+        capture.release()
+    return fps if fps > 0 else None
+
+
+def read_frames(source):
+    """Yield (name, frame) one frame at a time from a video or a directory of images
+
+    Video frames come from cv2.VideoCapture in BGR order and are named with
+    Settings.Camera.Sequence.FRAME_NAME; images are RGB or RGBA arrays named
+    after their file, in sorted order. Only the current frame is in memory.
+    """
+    if is_video(source):
+        capture = cv2.VideoCapture(source)
+        if not capture.isOpened():
+            raise ValueError(f"Cannot open video '{source}'")
+        try:
+            index = 0
+            while True:
+                ok, frame = capture.read()
+                if not ok:
+                    break
+                yield Settings.Camera.Sequence.FRAME_NAME.format(index), frame
+                index += 1
+        finally:
+            capture.release()
+    else:
+        for path in collect_inputs([source]):
+            with Image.open(path) as image:
+                frame = np.array(image.convert('RGBA' if 'A' in image.getbands() else 'RGB'))
+            yield os.path.basename(path), frame
+
+
+def add_camera_effect_to_frames(frames, start_seconds=0.0, fps=Settings.Camera.Sequence.DEFAULT_FPS,
+                                battery_level_ratio=1, bgr=False):
+    """Add the camera overlay to a stream of frames, with a timer that runs with the frames
+
+    Frame i shows start_seconds + i / fps as HH:MM:SS.mmm. The static overlay
+    comes from the sprite cache and the timer is rendered only inside its own
+    bounding box, so each frame is touched only where the overlay lies. Frames
+    are modified in place and yielded as they are processed.
+
+    Args:
+        frames: Iterable of (H, W, 3 or 4) uint8 arrays
+        bgr: Whether the frames are in OpenCV's BGR(A) channel order
+    """
+    battery_level_ratio = max(battery_level_ratio, 0.2)
+    for index, frame in enumerate(frames):
+        height, width = frame.shape[:2]
+        patches = list(camera_overlay_sprite_cache.get(width, height, battery_level_ratio))
+        timer = render_timer_patch(width, height, format_timer(start_seconds + index / fps))
+        if timer is not None:
+            patches.append(timer)
+        composite_patches(frame, patches, bgr)
+        yield frame
+
+
+class _VideoWriter:
+    """cv2.VideoWriter opened on the first frame, once the frame size is known"""
+    def __init__(self, path, fps):
+        self.path = path
+        self.fps = fps
+        self.size = None
+        self._writer = None
+
+    def write(self, frame, bgr):
+        height, width = frame.shape[:2]
+        if self._writer is None:
+            self.size = (width, height)
+            fourcc = cv2.VideoWriter_fourcc(*Settings.Camera.Sequence.VIDEO_FOURCC)
+            self._writer = cv2.VideoWriter(self.path, fourcc, self.fps, self.size)
+            if not self._writer.isOpened():
+                raise ValueError(f"Cannot write video '{self.path}'")
+        elif (width, height) != self.size:
+            raise ValueError(f"Frame size {width}x{height} differs from the first frame's {self.size[0]}x{self.size[1]}")
+        if frame.shape[2] == 4:
+            frame = cv2.cvtColor(frame, cv2.COLOR_BGRA2BGR if bgr else cv2.COLOR_RGBA2BGR)
+        elif not bgr:
+            frame = cv2.cvtColor(frame, cv2.COLOR_RGB2BGR)
+        self._writer.write(frame)
+
+    def close(self):
+        if self._writer is not None:
+            self._writer.release()
+
+
+def _save_frame(frame, path, bgr, save_options):
+    if bgr:
+        frame = cv2.cvtColor(frame, cv2.COLOR_BGRA2RGBA if frame.shape[2] == 4 else cv2.COLOR_BGR2RGB)
+    format_name = save_format(path)
+    image = Image.fromarray(frame)
+    if format_name == 'JPEG' and image.mode == 'RGBA':
+        image = image.convert('RGB')
+    image.save(path, format_name, **encoder_params(format_name, save_options))
+
+
+def run_camera_sequence(source, output, start_seconds=0.0, fps=None, battery_level_ratio=1,
+                        save_options=None, report=print):
+    """Stream a video or image directory through the camera overlay into output
+
+    Args:
+        output: A video path (see Settings.Camera.Sequence.VIDEO_EXTENSIONS) or
+            a directory that receives one image per frame
+        fps: Frame rate of the timer and of a video output; None uses the
+            source video's rate, or Settings.Camera.Sequence.DEFAULT_FPS
+        save_options: Encoder options for image outputs, see utils.image_saving.encoder_params
+
+    Returns:
+        dict: Number of frames written and seconds taken
+    """
+    bgr = is_video(source)
+    if fps is None:
+        fps = (video_fps(source) if bgr else None) or Settings.Camera.Sequence.DEFAULT_FPS
+
+    names = []
+
+    def frames():
+        for name, frame in read_frames(source):
+            names.append(name)
+            yield frame
+
+    writer = _VideoWriter(output, fps) if is_video(output) else None
+    if writer is None:
+        os.makedirs(output, exist_ok=True)
+
+    start = time.perf_counter()
+    count = 0
+    try:
+        for frame in add_camera_effect_to_frames(frames(), start_seconds, fps, battery_level_ratio, bgr):
+            if writer is not None:
+                writer.write(frame, bgr)
+            else:
+                _save_frame(frame, os.path.join(output, names[-1]), bgr, save_options)
+            count += 1
+    finally:
+        if writer is not None:
+            writer.close()
+
+    elapsed = time.perf_counter() - start
+    report(f"Wrote {count} frames to {output} in {elapsed:.2f} s: {count / max(elapsed, 1e-9):.1f} frames/s")
+    return {'frames': count, 'seconds': elapsed}
+
+
+def _timer_argument(text):
+    try:
+        return parse_timer(text)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"Expected HH:MM:SS.mmm or seconds, got '{text}'")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Add the camera overlay to every frame of a video or image directory, "
+                    "with a timer that advances with the frame rate.",
+        epilog='Example: camera_sequence.py clip.mp4 -o clip_rec.mp4 --start 00:12:30.000 --battery 0.6'
+    )
+    parser.add_argument('source', help="Video file or directory of frames")
+    parser.add_argument('-o', '--output', required=True, help="Output video file or directory for the frames")
+    parser.add_argument('--start', type=_timer_argument, default=Settings.Camera.TIMER_TEXT['DEFAULT'],
+                        help="Timer value on the first frame, HH:MM:SS.mmm or seconds (default: %(default)s)")
+    parser.add_argument('--fps', type=float,
+                        help="Frame rate (default: the video's own, else %s)" % Settings.Camera.Sequence.DEFAULT_FPS)
+    parser.add_argument('--battery', type=float, default=Settings.Camera.BATTERY_LEVEL['DEFAULT'],
+                        help="Battery level 0-1 (default: %(default)s)")
+    add_save_arguments(parser)
+    args = parser.parse_args(argv)
+
+    if args.fps is not None and args.fps <= 0:
+        parser.error("--fps must be positive")
+    if not is_video(args.source) and not os.path.isdir(args.source):
+        parser.error(f"'{args.source}' is neither a video ({', '.join(Settings.Camera.Sequence.VIDEO_EXTENSIONS)}) "
+                     f"nor a directory")
+    try:
+        result = run_camera_sequence(args.source, args.output, args.start, args.fps, args.battery,
+                                     save_options_from_args(args))
+    except ValueError as e:
+        parser.error(str(e))
+    return 0 if result['frames'] else 1
@@ -0,0 +1,119 @@
+import os
+import threading
+
+import cv2
+
+from config.settings import Settings
+from utils.instrumentation import current_trace, stage
+
+
+_cascades = {}
+_cascades_lock = threading.Lock()
+
+
+def cascade_path(target):
+    """Return the path of the Haar cascade bundled with OpenCV for target"""
+    if target not in Settings.Detection.CASCADES:
+        raise ValueError(f"Unknown detection target '{target}', expected one of: "
+                         f"{', '.join(Settings.Detection.CASCADES)}")
+    return os.path.join(cv2.data.haarcascades, Settings.Detection.CASCADES[target])
+
+
+def load_cascade(target):
+    """Return the loaded classifier for target, loading it once per process
+
+    Raises:
+        ValueError: If the target is unknown or OpenCV was installed without its cascades
+    """
+    with _cascades_lock:
+        cascade = _cascades.get(target)
+        if cascade is None:
+            path = cascade_path(target)
+            cascade = cv2.CascadeClassifier(path) if os.path.isfile(path) else None
+            if cascade is None or cascade.empty():
+                raise ValueError(f"Cannot load the '{target}' cascade from {path}")
+            _cascades[target] = cascade
+        return cascade
+
+
+def cascades_available(targets=None):
+    """Return True if the cascades of all targets (default: every known one) can be loaded"""
+    try:
+        for target in targets or Settings.Detection.CASCADES:
+            load_cascade(target)
+    except ValueError:
+        return False
+    return True
+
+
+def pyramid_level(gray, max_side):
+    """Halve gray with cv2.pyrDown until its longer side is at most max_side
+
+    Returns:
+        tuple: (level, scale_x, scale_y) where scale maps level pixels back to gray pixels
+    """
+    level = gray
+    while max(level.shape[:2]) > max_side and min(level.shape[:2]) > 1:
+        level = cv2.pyrDown(level)
+    return level, gray.shape[1] / level.shape[1], gray.shape[0] / level.shape[0]
+
+
+def _to_gray(image_array):
+    if image_array.ndim == 2:
+        return image_array
+    code = cv2.COLOR_RGBA2GRAY if image_array.shape[2] == 4 else cv2.COLOR_RGB2GRAY
+    return cv2.cvtColor(image_array, code)
+
+
+def detect_regions(image_array, targets=None, max_side=None, padding=None):
+    """Find faces, plates, ... in an RGB(A) array
+
+    Detection runs on the first pyramid level whose longer side is at most
+    max_side, which is much faster on large images and barely changes what
+    the cascades find, since they search at several scales anyway. The boxes
+    are mapped back to full resolution, grown by padding (a fraction of
+    their size) on each side and clipped to the image. The time spent is
+    recorded as the 'detect' stage of the active trace, if any, and the
+    number of regions found is added to its 'detections' field.
+
+    Args:
+        targets: Names from Settings.Detection.CASCADES, defaults to Settings.Detection.TARGETS
+        max_side: Longest side detection runs at, defaults to Settings.Detection.MAX_SIDE
+        padding: Defaults to Settings.Detection.PADDING
+
+    Returns:
+        list: (left, top, right, bottom) boxes, right and bottom exclusive
+    """
+    targets = Settings.Detection.TARGETS if targets is None else targets
+    max_side = Settings.Detection.MAX_SIDE if max_side is None else max_side
+    padding = Settings.Detection.PADDING if padding is None else padding
+    cascades = [load_cascade(target) for target in targets]
+    height, width = image_array.shape[:2]
+
+    boxes = []
+    with stage('detect'):
+        gray, scale_x, scale_y = pyramid_level(_to_gray(image_array), max_side)
+        gray = cv2.equalizeHist(gray)
+        min_size = (Settings.Detection.MIN_SIZE, Settings.Detection.MIN_SIZE)
+        for cascade in cascades:
+            found = cascade.detectMultiScale(gray, scaleFactor=Settings.Detection.SCALE_FACTOR,
+                                             minNeighbors=Settings.Detection.MIN_NEIGHBORS, minSize=min_size)
+            for x, y, w, h in found:
+                pad_x, pad_y = w * padding, h * padding
+                box = (max(0, int((x - pad_x) * scale_x)), max(0, int((y - pad_y) * scale_y)),
+                       min(width, int(round((x + w + pad_x) * scale_x))),
+                       min(height, int(round((y + h + pad_y) * scale_y))))
+                if box[2] > box[0] and box[3] > box[1]:
+                    boxes.append(box)
+
+    trace = current_trace()
+    if trace is not None:
+        trace.fields['detections'] = trace.fields.get('detections', 0) + len(boxes)
+    return boxes
+
+
+def box_polygon(box):
+    """Return the selection polygon of a (left, top, right, bottom) box"""
+    left, top, right, bottom = box
+    return [(left, top), (right - 1, top), (right - 1, bottom - 1), (left, bottom - 1)]
+
@@ -0,0 +1,103 @@
+import zlib
+import numpy as np
+
+
+def changed_rect(before, after):
+    """Return the (x, y, width, height) box of the pixels that differ, or None"""
+    changed = np.any(before != after, axis=-1) if before.ndim == 3 else before != after
+    rows = np.flatnonzero(changed.any(axis=1))
+    if len(rows) == 0:
+        return None
+    cols = np.flatnonzero(changed.any(axis=0))
+    return (int(cols[0]), int(rows[0]), int(cols[-1] - cols[0] + 1), int(rows[-1] - rows[0] + 1))
+
+
+class HistoryEntry:
+    """Pixels of one rectangle of the image, optionally zlib-compressed
+
+    A rect of None means the entry holds the whole image, which is used when
+    the image size changes (e.g. a new image is opened).
+    """
+    def __init__(self, rect, pixels, compression_level=None):
+        self.rect = rect
+        self.shape = pixels.shape
+        self.dtype = pixels.dtype
+        data = np.ascontiguousarray(pixels).tobytes()
+        self.compressed = compression_level is not None
+        self.data = zlib.compress(data, compression_level) if self.compressed else data
+
+    @property
+    def nbytes(self):
+        return len(self.data)
+
+    def pixels(self):
+        """Return the stored pixels as a new array"""
+        data = zlib.decompress(self.data) if self.compressed else self.data
+        return np.frombuffer(data, dtype=self.dtype).reshape(self.shape).copy()
+
+
+class ImageHistory:
+    """Undo/redo stacks of changed-rectangle patches within a byte budget
+
+    Each entry stores the pixels an edit replaced. Undoing swaps them back into
+    the image and keeps the replaced pixels as the matching redo entry, so only
+    one patch per edit is held at any time. When the stored patches exceed the
+    budget, the oldest undo entries are dropped first; the newest entry is
+    always kept.
+    """
+    def __init__(self, budget_bytes, compression_level=None):
+        self.budget_bytes = budget_bytes
+        self.compression_level = compression_level
+        self._undo = []
+        self._redo = []
+
+    @property
+    def nbytes(self):
+        return sum(entry.nbytes for entry in self._undo + self._redo)
+
+    def can_undo(self):
+        return bool(self._undo)
+
+    def can_redo(self):
+        return bool(self._redo)
+
+    def clear(self):
+        self._undo.clear()
+        self._redo.clear()
+
+    def push(self, rect, pixels):
+        """Record the pixels an edit is about to overwrite in rect"""
+        self._undo.append(HistoryEntry(rect, pixels, self.compression_level))
+        self._redo.clear()
+        self._evict()
+
+    def undo(self, swap):
+        """Undo the last edit
+
+        Args:
+            swap: Callable taking (rect, pixels) that writes pixels into the
+                image at rect and returns the pixels it replaced
+
+        Returns:
+            bool: Whether there was an edit to undo
+        """
+        return self._move(self._undo, self._redo, swap)
+
+    def redo(self, swap):
+        """Redo the last undone edit, see undo()"""
+        return self._move(self._redo, self._undo, swap)
+
+    def _move(self, source, target, swap):
+        if not source:
+            return False
+        entry = source.pop()
+        replaced = swap(entry.rect, entry.pixels())
+        target.append(HistoryEntry(entry.rect, replaced, self.compression_level))
+        self._evict()
+        return True
+
+    def _evict(self):
+        total = self.nbytes
+        while total > self.budget_bytes and len(self._undo) + len(self._redo) > 1:
+            stack = self._undo if self._undo else self._redo
+            total -= stack.pop(0).nbytes
@@ -0,0 +1,70 @@
+import os
+import time
+
+from config.settings import Settings
+from utils.qimage_bridge import array_to_pil_image
+
+
+# PIL format name for each extension the encoder options apply to
+SAVE_FORMATS = {
+    '.jpg': 'JPEG',
+    '.jpeg': 'JPEG',
+    '.png': 'PNG',
+    '.webp': 'WEBP',
+}
+
+
+def save_format(path):
+    """Return the PIL format name for path, or None if PIL should guess it"""
+    return SAVE_FORMATS.get(os.path.splitext(path)[1].lower())
+
+
+def default_save_options():
+    """Return the encoder options from Settings.Image.Save"""
+    return {
+        'quality': Settings.Image.Save.JPEG_QUALITY,
+        'progressive': Settings.Image.Save.JPEG_PROGRESSIVE,
+        'compress_level': Settings.Image.Save.PNG_COMPRESS_LEVEL,
+        'webp_quality': Settings.Image.Save.WEBP_QUALITY,
+        'lossless': Settings.Image.Save.WEBP_LOSSLESS,
+    }
+
+
+def encoder_params(format_name, options=None):
+    """Translate save options into PIL save() keyword arguments for one format
+
+    Args:
+        options: Dict with any of quality, progressive (JPEG), compress_level
+            (PNG, 0-9), webp_quality and lossless (WebP); missing keys use the
+            defaults from Settings.Image.Save
+
+    Returns:
+        dict: Keyword arguments for PIL.Image.save
+    """
+    options = {**default_save_options(), **(options or {})}
+    if format_name == 'JPEG':
+        return {'quality': options['quality'], 'progressive': options['progressive']}
+    if format_name == 'PNG':
+        return {'compress_level': options['compress_level']}
+    if format_name == 'WEBP':
+        return {'quality': options['webp_quality'], 'lossless': options['lossless'],
+                'method': Settings.Image.Save.WEBP_METHOD}
+    return {}
+
+
+def save_image_array(image_array, path, options=None, keep_alpha=True):
+    """Encode an (H, W, 4) RGBA uint8 array to path
+
+    The array is wrapped without copying; JPEG, and any format when
+    keep_alpha is False, is encoded from an RGB conversion.
+
+    Returns:
+        dict: path, seconds spent encoding and writing, and bytes written
+    """
+    start = time.perf_counter()
+    format_name = save_format(path)
+    pil_image = array_to_pil_image(image_array)
+    if format_name == 'JPEG' or not keep_alpha:
+        pil_image = pil_image.convert('RGB')
+    pil_image.save(path, format_name, **encoder_params(format_name, options))
+    return {'path': path, 'seconds': time.perf_counter() - start, 'bytes': os.path.getsize(path)}
@@ -1,96 +1,406 @@
 from PIL import Image, ImageDraw, ImageFont
-from PyQt5.QtGui import QImage
+from functools import lru_cache
 import numpy as np
 import cv2
+from PyQt5.QtGui import QColor, QFont, QGuiApplication, QPainter
+
+from config.settings import Settings
+from utils.lru_cache import LRUCache
+from utils.qimage_bridge import pixmap_to_array, array_to_qimage
+from utils.selection import as_selection
+from utils.tiling import tile_scheduler, part_progress
 
 def pixmap_to_pil_image_with_alpha(pixmap):
-    qimage = pixmap.toImage().convertToFormat(QImage.Format.Format_ARGB32)
-    # get QImage data and convert to a NumPy array
-    ptr = qimage.bits()
-    ptr.setsize(qimage.byteCount())
-    arr = np.array(ptr).reshape(qimage.height(), qimage.width(), 4)  # 4 for ARGB
-    # create PIL Image
-    pil_image = Image.fromarray(arr, "RGBA")
-    return pil_image
+    """Convert a QPixmap to an RGBA PIL Image"""
+    return Image.fromarray(pixmap_to_array(pixmap), "RGBA")
 
 def pil_image_to_qimage_with_alpha(pil_image):
-    # convert PIL Image to QImage
-    arr = np.array(pil_image)
-    qimage = QImage(pil_image.tobytes(), pil_image.width, pil_image.height, QImage.Format_ARGB32)
-    return qimage
-
-def apply_mosaic(pil_image, polygon, block_size):
-    """Apply mosaic effect to the specified polygon area of the image."""
-    def get_average_color(pil_image, mask):
-        image_data = np.array(pil_image)
-        mask_data = mask == 1
-        if mask_data.any():
-            avg_color = np.mean(image_data[mask_data], axis=0).astype(int)
-            return tuple(avg_color)
-        return (0, 0, 0, 0)
-
-    mask = Image.new('L', pil_image.size, 0)
-    ImageDraw.Draw(mask).polygon(polygon, outline=1, fill=1)
-    mask_array = np.array(mask)
-
-    for i in range(0, pil_image.width, block_size):
-        for j in range(0, pil_image.height, block_size):
-            box = (i, j, min(i + block_size, pil_image.width), min(j + block_size, pil_image.height))
-            block = pil_image.crop(box)
-            block_mask = mask_array[j: j + block.size[1], i: i + block.size[0]]
-
-            if np.any(block_mask):
-                avg_color = get_average_color(block, block_mask)
-                block_data = np.array(block)
-                block_data[block_mask == 1] = avg_color
-                new_block = Image.fromarray(block_data)
-                pil_image.paste(new_block, box)
-
-def apply_optimized_motion_blur_to_polygon(pil_image, polygon, intense, angle):
-    """Apply motion blur effect to the specified polygon area of the image."""
-    open_cv_image = np.array(pil_image)
-    rgb_img, alpha_channel = open_cv_image[..., :3], open_cv_image[..., 3]
-
-    mask = Image.new('L', pil_image.size, 0)
-    ImageDraw.Draw(mask).polygon(polygon, outline=1, fill=1)
-    mask_array = np.array(mask)
-
+    """Convert an RGBA PIL Image to a QImage"""
+    if pil_image.mode != "RGBA":
+        pil_image = pil_image.convert("RGBA")
+    return array_to_qimage(np.asarray(pil_image))
+
+# Bytes per pixel held while a strip, and on top of it each tile in flight,
+# is processed in low-memory mode; see TileScheduler.strips(). Strips hold
+# PIL's crop and its array copy; mosaic tiles a summed-area table (int32 sums
+# of 3-4 channels plus coverage) and the expanded block means, blur tiles the
+# filtered tile, float32 weights and the float32 blend.
+_MOSAIC_STRIP_COST = 8
+_MOSAIC_TILE_COST = 32
+_BLUR_STRIP_COST = 12
+_BLUR_TILE_COST = 32
+
+def _block_shape(block_size):
+    """Return (width, height) of a block given as one side or a (width, height) pair"""
+    if isinstance(block_size, (tuple, list)):
+        width, height = block_size
+    else:
+        width = height = block_size
+    width, height = int(width), int(height)
+    if width < 1 or height < 1:
+        raise ValueError(f"Block sides must be at least 1, got {width}x{height}")
+    return width, height
+
+def _polygon_bounds(polygon, size, align=1):
+    """Return the (left, top, right, bottom) box covering the polygon.
+
+    The box includes the polygon outline, is clipped to the image size and its
+    top-left corner is snapped down to a multiple of ``align``, one side or a
+    (x, y) pair.
+    """
+    align_x, align_y = _block_shape(align)
     x_coords, y_coords = zip(*polygon)
-    min_x, max_x = min(x_coords), max(x_coords)
-    min_y, max_y = min(y_coords), max(y_coords)
-    rect = (min_x, min_y, max_x - min_x, max_y - min_y)
-
+    left = max(0, min(x_coords) // align_x * align_x)
+    top = max(0, min(y_coords) // align_y * align_y)
+    right = min(size[0], max(x_coords) + 1)
+    bottom = min(size[1], max(y_coords) + 1)
+    return left, top, right, bottom
+
+def _masked_block_means(region, mask, block_size):
+    """Average the masked pixels of every block at once from a summed-area table.
+
+    One cumulative sum over the pixels and the mask coverage gives the sum of
+    any rectangle from its four corners, so every block costs the same
+    whatever its size or shape. Sums are int32 when the region is small enough
+    to rule out overflow, as tiles are, and int64 otherwise.
+
+    Args:
+        region: (H, W, C) pixel array whose origin is aligned to the block grid
+        mask: (H, W) boolean array selecting the pixels to average
+        block_size: Block side, or a (width, height) pair
+
+    Returns:
+        tuple: (means, counts) with shapes (H', W', C) and (H', W'), where
+        H' and W' are the number of block rows and columns, the last ones
+        possibly partial. Means are truncated to integers like
+        ``np.mean(...).astype(int)``.
+    """
+    block_width, block_height = _block_shape(block_size)
+    height, width = mask.shape
+    channels = region.shape[2]
+    dtype = np.int32 if height * width * 255 < 2 ** 31 else np.int64
+
+    # Row and column 0 stay zero so block corners index the table directly;
+    # the extra channel holds the mask coverage
+    table = np.zeros((height + 1, width + 1, channels + 1), dtype=dtype)
+    values = table[1:, 1:]
+    values[..., :channels] = region
+    values[..., :channels] *= mask[..., None]
+    values[..., channels] = mask
+    np.cumsum(values, axis=0, out=values)
+    np.cumsum(values, axis=1, out=values)
+
+    rows = np.r_[0:height:block_height, height]
+    cols = np.r_[0:width:block_width, width]
+    corners = table[rows[:, None], cols[None, :]]
+    sums = corners[1:, 1:] - corners[:-1, 1:] - corners[1:, :-1] + corners[:-1, :-1]
+
+    counts = sums[..., channels]
+    means = np.zeros(sums.shape[:2] + (channels,), dtype=np.int64)
+    covered = counts > 0
+    means[covered] = sums[covered, :channels] // counts[covered, None]
+    return means, counts
+
+def apply_mosaic(pil_image, polygon, block_size, progress=None):
+    """Apply mosaic effect to the specified polygon area of the image.
+
+    block_size is the side of square blocks or a (width, height) pair. Only
+    the blocks overlapping the polygon's bounding box are processed, in tiles
+    of whole blocks spread over the tile scheduler's threads, and the image is
+    modified in place. In low-memory mode the box is processed in strips of
+    whole block rows sized to the scheduler's peak-bytes cap. polygon may be a
+    Selection, whose cached mask is reused, or a MultiSelection, whose parts
+    share one mask and one pass. progress is called with (done, total) as
+    tiles finish, see TileScheduler.run().
+    """
+    block_width, block_height = _block_shape(block_size)
+    selection = as_selection(polygon)
+    box = _polygon_bounds(selection, pil_image.size, align=(block_width, block_height))
+    left, top, right, bottom = box
+    if right <= left or bottom <= top:
+        return
+
+    mask = selection.mask_in(box, pil_image.size)
+    if not mask.any():
+        return
+
+    align = (block_width, block_height)
+    strips = tile_scheduler.strips(right - left, bottom - top, _MOSAIC_STRIP_COST, _MOSAIC_TILE_COST,
+                                   align, fixed_bytes=mask.nbytes)
+    for index, (strip_top, strip_bottom) in enumerate(strips):
+        strip_mask = mask[strip_top:strip_bottom]
+        if not strip_mask.any():
+            continue
+        strip_box = (left, top + strip_top, right, top + strip_bottom)
+        region = np.array(pil_image.crop(strip_box))
+        pixels = region.reshape(strip_mask.shape + (-1,))
+
+        def mosaic_tile(tile):
+            # Tiles are whole blocks, so each block is averaged within one tile
+            tile_left, tile_top, tile_right, tile_bottom = tile
+            tile_mask = strip_mask[tile_top:tile_bottom, tile_left:tile_right]
+            if not tile_mask.any():
+                return
+            tile_pixels = pixels[tile_top:tile_bottom, tile_left:tile_right]
+            means, _ = _masked_block_means(tile_pixels, tile_mask, align)
+
+            # Expand block averages back to pixel resolution and write masked pixels only
+            expanded = means.astype(np.uint8).repeat(block_height, axis=0).repeat(block_width, axis=1)
+            np.copyto(tile_pixels, expanded[:tile_mask.shape[0], :tile_mask.shape[1]], where=tile_mask[..., None])
+
+        tile_scheduler.run(mosaic_tile, tile_scheduler.tiles(right - left, strip_bottom - strip_top, align),
+                           part_progress(progress, index, len(strips)))
+        pil_image.paste(Image.fromarray(region, pil_image.mode), strip_box)
+
+def _motion_blur_kernel(intense, angle):
+    """Build a normalized intense x intense line kernel rotated to the given angle."""
     angle = (angle - 45) % 360
     M = cv2.getRotationMatrix2D((intense / 2, intense / 2), -angle, 1)
     motion_blur_kernel = np.diag(np.ones(intense))
     motion_blur_kernel = cv2.warpAffine(motion_blur_kernel, M, (intense, intense))
-    motion_blur_kernel = motion_blur_kernel / np.sum(motion_blur_kernel)
-
-    center_x = rect[0] + rect[2] // 2
-    center_y = rect[1] + rect[3] // 2
-    y, x = np.ogrid[:rgb_img.shape[0], :rgb_img.shape[1]]
-    weight_mask = np.sqrt((x - center_x) ** 2 + (y - center_y) ** 2)
-    weight_mask = np.clip((1 - weight_mask / np.max(weight_mask)), 0, 1)
-
-    rgb_sub_img = rgb_img[rect[1]:rect[1]+rect[3], rect[0]:rect[0]+rect[2]]
-    blurred_sub_img = cv2.filter2D(rgb_sub_img, -1, motion_blur_kernel)
-
-    mask_sub = mask_array[rect[1]:rect[1]+rect[3], rect[0]:rect[0]+rect[2]]
-    weight_mask_sub = weight_mask[rect[1]:rect[1]+rect[3], rect[0]:rect[0]+rect[2]]
-    
-    final_mask = mask_sub * weight_mask_sub
-    final_mask = cv2.merge([final_mask] * 3)
-
-    blended_sub_img = cv2.convertScaleAbs(rgb_sub_img * (1 - final_mask) + blurred_sub_img * final_mask)
-    blended_sub_img_with_alpha = cv2.merge([
-        blended_sub_img, 
-        alpha_channel[rect[1]:rect[1]+rect[3], rect[0]:rect[0]+rect[2]]
-    ])
+    return motion_blur_kernel / np.sum(motion_blur_kernel)
 
-    image_with_blur = open_cv_image.copy()
-    image_with_blur[rect[1]:rect[1]+rect[3], rect[0]:rect[0]+rect[2]] = blended_sub_img_with_alpha
+class MotionBlurKernelCache(LRUCache):
+    """Bounded LRU cache of motion blur kernels keyed by (intensity, angle)
 
-    return Image.fromarray(image_with_blur, "RGBA")
+    Cached kernels are read-only and shared by the effect worker and the
+    GUI-thread preview.
+    """
+    def get(self, intense, angle):
+        """Return the kernel for (intense, angle), building it on a miss"""
+        return super().get((intense, angle % 360))
+
+    def build(self, key):
+        kernel = _motion_blur_kernel(*key)
+        kernel.setflags(write=False)
+        return kernel
+
+    def warm(self, presets):
+        """Build the kernels for the given (intensity, angle) pairs ahead of use"""
+        for intense, angle in presets:
+            if (intense, angle % 360) not in self:
+                self.get(intense, angle)
+
+motion_blur_kernel_cache = MotionBlurKernelCache(Settings.Blur.KERNEL_CACHE_SIZE)
+
+def warm_motion_blur_kernels(presets=None):
+    """Pre-build the motion blur kernels for presets (defaults to Settings.Blur.PRESETS)"""
+    motion_blur_kernel_cache.warm(Settings.Blur.PRESETS if presets is None else presets)
+
+def _radial_weights(box, center, frame, dtype=None):
+    """Distance falloff weights for the pixels in box.
+
+    The weights are 1 at the center and fall to 0 at the pixel of frame (the
+    full image's (left, top, right, bottom)) farthest from it, so computing them
+    for a sub-box gives the same values as slicing a full-image weight map.
+    With a dtype (np.float32) they are computed in that type, in place.
+    """
+    left, top, right, bottom = box
+    center_x, center_y = center
+    max_dx = max(abs(center_x - frame[0]), abs(frame[2] - 1 - center_x))
+    max_dy = max(abs(center_y - frame[1]), abs(frame[3] - 1 - center_y))
+    max_distance = np.sqrt(max_dx ** 2 + max_dy ** 2)
+
+    if dtype is not None:
+        dx = (np.arange(left, right, dtype=dtype) - center_x) ** 2
+        dy = (np.arange(top, bottom, dtype=dtype) - center_y) ** 2
+        weights = dy[:, None] + dx[None, :]
+        np.sqrt(weights, out=weights)
+        weights *= -1 / max_distance
+        weights += 1
+        return np.clip(weights, 0, 1, out=weights)
+
+    y, x = np.ogrid[top:bottom, left:right]
+    weight_mask = np.sqrt((x - center_x) ** 2 + (y - center_y) ** 2)
+    return np.clip((1 - weight_mask / max_distance), 0, 1)
+
+def apply_optimized_motion_blur_to_polygon(pil_image, polygon, intense, angle, in_place=False,
+                                           falloff_frame=None, progress=None):
+    """Apply motion blur effect to the specified polygon area of the image.
+
+    Only the selection's bounding rectangle plus a halo of half the kernel size
+    is read, so pixels at the edge of the rectangle are filtered with their real
+    neighbours and the cost scales with the selection instead of the image.
+    The rectangle is filtered in tiles, each with its own halo, on the tile
+    scheduler's threads. Each part of a MultiSelection is blurred in turn,
+    with the falloff centered on that part. In low-memory mode the rectangle
+    is processed in strips sized to the scheduler's peak-bytes cap and
+    blended in float32 in place, which may differ from the default float64
+    blend by one level.
+
+    Args:
+        polygon: List of (x, y) points or a Selection, whose cached mask is reused
+        in_place: Write the blurred rectangle back into pil_image instead of
+            into a copy of it
+        falloff_frame: (left, top, right, bottom) of the full image in
+            pil_image's coordinates when pil_image is a crop of it, so the
+            blur falloff matches the full image (defaults to pil_image)
+        progress: Callable taking (done, total), called as tiles finish, see
+            TileScheduler.run()
+
+    Returns:
+        PIL.Image: The blurred image (pil_image itself when in_place is set)
+    """
+    result = pil_image if in_place else pil_image.copy()
+    selection = as_selection(polygon)
+    if len(selection.parts) > 1:
+        for index, part in enumerate(selection.parts):
+            apply_optimized_motion_blur_to_polygon(result, part, intense, angle, True, falloff_frame,
+                                                   part_progress(progress, index, len(selection.parts)))
+        return result
+
+    x_coords, y_coords = zip(*selection)
+    min_x, max_x = min(x_coords), max(x_coords)
+    min_y, max_y = min(y_coords), max(y_coords)
+    rect = (min_x, min_y, max_x - min_x, max_y - min_y)
+    center = (rect[0] + rect[2] // 2, rect[1] + rect[3] // 2)
+
+    box = (max(0, min_x), max(0, min_y), min(pil_image.width, max_x), min(pil_image.height, max_y))
+    left, top, right, bottom = box
+    if right <= left or bottom <= top:
+        return result
+
+    halo = intense // 2 + 1
+    kernel = motion_blur_kernel_cache.get(intense, angle)
+    mask = selection.mask_in(box, pil_image.size)
+    frame = falloff_frame or (0, 0, pil_image.width, pil_image.height)
+    low_memory = tile_scheduler.low_memory
+
+    strips = tile_scheduler.strips(right - left, bottom - top, _BLUR_STRIP_COST, _BLUR_TILE_COST,
+                                   fixed_bytes=mask.nbytes)
+    # Unblurred pixels of the rows just above the next strip, which the last
+    # paste overwrote but the next strip's halo must read: (first row, pixels)
+    carry = None
+    for index, (strip_top, strip_bottom) in enumerate(strips):
+        strip_mask = mask[strip_top:strip_bottom]
+        if not strip_mask.any():
+            continue
+        strip_box = (left, top + strip_top, right, top + strip_bottom)
+        halo_box = (max(0, left - halo), max(0, strip_box[1] - halo),
+                    min(pil_image.width, right + halo), min(pil_image.height, strip_box[3] + halo))
+        inner = (slice(strip_box[1] - halo_box[1], strip_box[3] - halo_box[1]),
+                 slice(left - halo_box[0], right - halo_box[0]))
+
+        halo_img = np.array(pil_image.crop(halo_box))
+        if carry is not None:
+            carry_top, carry_pixels = carry
+            row0, row1 = max(halo_box[1], carry_top), min(halo_box[3], carry_top + len(carry_pixels))
+            if row1 > row0:
+                halo_img[row0 - halo_box[1]:row1 - halo_box[1]] = carry_pixels[row0 - carry_top:row1 - carry_top]
+        sub_img = halo_img[inner].copy()  # Tiles read halo_img and write here only
+
+        def blur_tile(tile):
+            tile_left, tile_top, tile_right, tile_bottom = tile
+            tile_mask = strip_mask[tile_top:tile_bottom, tile_left:tile_right]
+            if not tile_mask.any():
+                return
+            # The tile plus its halo, in halo_img coordinates, clipped like the whole halo box
+            x0, y0 = left - halo_box[0] + tile_left, strip_box[1] - halo_box[1] + tile_top
+            x1, y1 = x0 + tile_right - tile_left, y0 + tile_bottom - tile_top
+            hx0, hy0 = max(0, x0 - halo), max(0, y0 - halo)
+            hx1, hy1 = min(halo_img.shape[1], x1 + halo), min(halo_img.shape[0], y1 + halo)
+            blurred = cv2.filter2D(halo_img[hy0:hy1, hx0:hx1, :3], -1, kernel)[y0 - hy0:y1 - hy0, x0 - hx0:x1 - hx0]
+
+            tile_box = (left + tile_left, strip_box[1] + tile_top, left + tile_right, strip_box[1] + tile_bottom)
+            rgb = halo_img[y0:y1, x0:x1, :3]
+            target = sub_img[tile_top:tile_bottom, tile_left:tile_right, :3]
+            if low_memory:
+                # rgb + (blurred - rgb) * weight, in place in float32
+                weights = _radial_weights(tile_box, center, frame, np.float32)
+                weights *= tile_mask
+                blended = blurred.astype(np.float32)
+                blended -= rgb
+                blended *= weights[..., None]
+                blended += rgb
+                target[...] = cv2.convertScaleAbs(blended)
+            else:
+                final_mask = tile_mask * _radial_weights(tile_box, center, frame)
+                final_mask = cv2.merge([final_mask] * 3)
+                target[...] = cv2.convertScaleAbs(rgb * (1 - final_mask) + blurred * final_mask)
+
+        tile_scheduler.run(blur_tile, tile_scheduler.tiles(right - left, strip_bottom - strip_top),
+                           part_progress(progress, index, len(strips)))
+        if len(strips) > 1:
+            carry_top = max(halo_box[1], strip_box[3] - halo)
+            carry = (carry_top, halo_img[carry_top - halo_box[1]:strip_box[3] - halo_box[1]].copy())
+        result.paste(Image.fromarray(sub_img, "RGBA"), strip_box[:2])
+    return result
+
+def _gui_application():
+    """Return the running Qt application, starting a headless one if there is none
+
+    QPainter needs a GUI application to draw text; batch worker processes and
+    scripts have none of their own.
+    """
+    global _headless_application
+    application = QGuiApplication.instance()
+    if application is None:
+        application = _headless_application = QGuiApplication(['image_tools', '-platform', 'offscreen'])
+    return application
+
+_headless_application = None
+
+def text_font(family=None, size=Settings.Text.FONT_SIZE['DEFAULT']):
+    """Return the font the text tool draws with: a family at a point size"""
+    _gui_application()
+    font = QFont(family) if family else QFont()
+    font.setPointSize(max(1, size))
+    return font
+
+def draw_text(image_array, polygon, text, font, color=(0, 0, 0), angle=0):
+    """Draw text centered on the polygon's bounding box with QPainter
+
+    This is how the text tool draws, and the recipe's text operation draws
+    through it too, so a project renders its text exactly as the tool did.
+    A MultiSelection gets the text centered on each of its parts.
+
+    Args:
+        image_array: Writable (H, W, 4) RGBA uint8 array, modified in place
+        font: QFont, see text_font()
+        color: RGB tuple or any color name accepted by QColor
+        angle: Clockwise rotation in degrees
+    """
+    if not text:
+        return
+    _gui_application()
+    color = QColor(*color) if isinstance(color, (tuple, list)) else QColor(color)
+
+    # QPainter may draw on a QImage outside the GUI thread
+    image = array_to_qimage(image_array)
+    painter = QPainter(image)
+    painter.setRenderHint(QPainter.Antialiasing)
+    painter.setFont(font)
+    painter.setPen(color)
+
+    metrics = painter.fontMetrics()
+    text_width = metrics.horizontalAdvance(text)
+    text_height = metrics.height()
+
+    for part in as_selection(polygon).parts:
+        x_coords, y_coords = zip(*part)
+        painter.save()
+        painter.translate((min(x_coords) + max(x_coords)) / 2, (min(y_coords) + max(y_coords)) / 2)
+        painter.rotate(angle)
+        painter.drawText(int(-text_width / 2), int(text_height / 4), text)
+        painter.restore()
+    painter.end()
+
+def add_text(pil_image, polygon, text, size, color=(0, 0, 0), angle=0, font=None):
+    """Draw text on an RGBA PIL image exactly like the text tool, see draw_text()
+
+    Args:
+        size: Font size in points, as set in the text tool
+        font: Font family, defaulting to the application font
+
+    Returns:
+        PIL.Image: pil_image, modified in place
+    """
+    if not text:
+        return pil_image
+    image_array = np.array(pil_image.convert('RGBA'))
+    draw_text(image_array, polygon, text, text_font(font, size), color, angle)
+    pil_image.paste(Image.fromarray(image_array, 'RGBA'))
+    return pil_image
 
 class CameraEffectConfig:
     """Configuration for camera effect overlay"""
@@ -112,32 +422,76 @@ class CameraEffectConfig:
 
     # Colors
     OUTLINE_COLOR = "white"
-    REC_COLOR = (0, 0, 255)  # red in BGR
+    REC_COLOR = (255, 0, 0)  # red
     TIMER_COLOR = "white"
     TIMER_OUTLINE_WIDTH = 2
     TIMER_OUTLINE_COLOR = "gray"
 
+    FONT_NAME = "arial.ttf"
+
+    # Every static element lies within this fraction of the short side (plus
+    # the margin) from a corner, which bounds the area the sprite is drawn on
+    SPRITE_REACH_RATIO = 0.2
+
     @staticmethod
     def get_battery_color(battery_level):
         """Return appropriate battery color based on level
         
         Returns:
-            tuple: BGR color values
-            - Red (0, 0, 255) for level <= 0.3
-            - Yellow (0, 191, 255) for level <= 0.6
-            - Green (127, 255, 0) for level > 0.6
+            tuple: RGB color values
+            - Red (255, 0, 0) for level <= 0.3
+            - Yellow (255, 191, 0) for level <= 0.6
+            - Green (0, 255, 127) for level > 0.6
         """
         if battery_level <= 0.3:
-            return (0, 0, 255)
+            return (255, 0, 0)
         elif battery_level <= 0.6:
-            return (0, 191, 255)
-        return (127, 255, 0)
+            return (255, 191, 0)
+        return (0, 255, 127)
+
+class _OffsetDraw:
+    """ImageDraw wrapper that draws in full-image coordinates onto a smaller canvas
+
+    The canvas covers the image area starting at (left, top); shapes outside it
+    are clipped as usual.
+    """
+    def __init__(self, draw, left, top):
+        self.draw = draw
+        self.left = left
+        self.top = top
+
+    def _shift(self, points):
+        return [(x - self.left, y - self.top) for x, y in points]
 
-def _draw_corner_frames(draw, image, margin, line_width, cfg):
+    def line(self, xy, **kwargs):
+        self.draw.line(self._shift(xy), **kwargs)
+
+    def arc(self, xy, **kwargs):
+        self.draw.arc(self._shift(xy), **kwargs)
+
+    def rectangle(self, xy, **kwargs):
+        self.draw.rectangle(self._shift(xy), **kwargs)
+
+    def ellipse(self, xy, **kwargs):
+        self.draw.ellipse(self._shift(xy), **kwargs)
+
+    def text(self, xy, text, **kwargs):
+        self.draw.text(self._shift([xy])[0], text, **kwargs)
+
+@lru_cache(maxsize=64)
+def _load_font(font_name, size):
+    """Return the TrueType font at size, falling back to PIL's default font"""
+    size = max(1, size)
+    try:
+        return ImageFont.truetype(font_name, size)
+    except IOError:
+        return ImageFont.load_default(size)
+
+def _draw_corner_frames(draw, width, height, margin, line_width, cfg):
     """Draw corner frame decorations"""
-    arc_radius = int(cfg.ARC_RADIUS_RATIO * min(image.width, image.height))
+    arc_radius = int(cfg.ARC_RADIUS_RATIO * min(width, height))
     arc_line_shift = line_width / 2
-    corner_length = int(cfg.CORNER_LENGTH_RATIO * min(image.width, image.height))
+    corner_length = int(cfg.CORNER_LENGTH_RATIO * min(width, height))
 
     # Top-left corner
     draw.line([(margin + arc_radius / 2, margin), (margin + corner_length, margin)], 
@@ -149,37 +503,37 @@ def _draw_corner_frames(draw, image, margin, line_width, cfg):
              start=180, end=270, fill=cfg.OUTLINE_COLOR, width=line_width)
 
     # Top-right corner
-    draw.line([(image.width - margin - corner_length, margin), 
-               (image.width - margin - arc_radius / 2, margin)], 
+    draw.line([(width - margin - corner_length, margin), 
+               (width - margin - arc_radius / 2, margin)], 
              fill=cfg.OUTLINE_COLOR, width=line_width)
-    draw.line([(image.width - margin, margin + arc_radius / 2), 
-               (image.width - margin, margin + corner_length)], 
+    draw.line([(width - margin, margin + arc_radius / 2), 
+               (width - margin, margin + corner_length)], 
              fill=cfg.OUTLINE_COLOR, width=line_width)
-    draw.arc([(image.width - margin - 2 * arc_radius + arc_line_shift, margin - arc_line_shift), 
-              (image.width - margin + arc_line_shift, margin + 2 * arc_radius - arc_line_shift)], 
+    draw.arc([(width - margin - 2 * arc_radius + arc_line_shift, margin - arc_line_shift), 
+              (width - margin + arc_line_shift, margin + 2 * arc_radius - arc_line_shift)], 
              start=270, end=360, fill=cfg.OUTLINE_COLOR, width=line_width)
 
     # Bottom-left corner
-    draw.line([(margin + arc_radius / 2, image.height - margin), 
-               (margin + corner_length, image.height - margin)], 
+    draw.line([(margin + arc_radius / 2, height - margin), 
+               (margin + corner_length, height - margin)], 
              fill=cfg.OUTLINE_COLOR, width=line_width)
-    draw.line([(margin, image.height - margin - corner_length), 
-               (margin, image.height - margin - arc_radius / 2)], 
+    draw.line([(margin, height - margin - corner_length), 
+               (margin, height - margin - arc_radius / 2)], 
              fill=cfg.OUTLINE_COLOR, width=line_width)
-    draw.arc([(margin - arc_line_shift, image.height - margin - 2 * arc_radius + arc_line_shift), 
-              (margin + 2 * arc_radius - arc_line_shift, image.height - margin + arc_line_shift)], 
+    draw.arc([(margin - arc_line_shift, height - margin - 2 * arc_radius + arc_line_shift), 
+              (margin + 2 * arc_radius - arc_line_shift, height - margin + arc_line_shift)], 
              start=90, end=180, fill=cfg.OUTLINE_COLOR, width=line_width)
 
     # Bottom-right corner
-    draw.line([(image.width - margin - corner_length, image.height - margin), 
-               (image.width - margin - arc_radius / 2, image.height - margin)], 
+    draw.line([(width - margin - corner_length, height - margin), 
+               (width - margin - arc_radius / 2, height - margin)], 
              fill=cfg.OUTLINE_COLOR, width=line_width)
-    draw.line([(image.width - margin, image.height - margin - corner_length), 
-               (image.width - margin, image.height - margin - arc_radius / 2)], 
+    draw.line([(width - margin, height - margin - corner_length), 
+               (width - margin, height - margin - arc_radius / 2)], 
              fill=cfg.OUTLINE_COLOR, width=line_width)
-    draw.arc([(image.width - margin - 2 * arc_radius + arc_line_shift, 
-               image.height - margin - 2 * arc_radius + arc_line_shift), 
-              (image.width - margin + arc_line_shift, image.height - margin + arc_line_shift)], 
+    draw.arc([(width - margin - 2 * arc_radius + arc_line_shift, 
+               height - margin - 2 * arc_radius + arc_line_shift), 
+              (width - margin + arc_line_shift, height - margin + arc_line_shift)], 
              start=0, end=90, fill=cfg.OUTLINE_COLOR, width=line_width)
 
 def _draw_battery_indicator(draw, margin, line_width, level_ratio, fill_color, cfg):
@@ -205,19 +559,16 @@ def _draw_battery_indicator(draw, margin, line_width, level_ratio, fill_color, c
     draw.rectangle(battery_head, outline=cfg.OUTLINE_COLOR, width=line_width, fill=cfg.OUTLINE_COLOR)
     draw.rectangle(battery_fill, fill=fill_color)
 
-def _draw_rec_indicator(draw, image, margin, min_dim, cfg):
+def _draw_rec_indicator(draw, width, margin, min_dim, cfg):
     """Draw REC indicator with circle and text"""
     rec_text_size = int(cfg.REC_TEXT_SIZE_RATIO * min_dim)
     rec_circle_radius = int(cfg.REC_CIRCLE_RADIUS_RATIO * min_dim)
     corner_length = int(cfg.CORNER_LENGTH_RATIO * min_dim)
     icon_offset = int(cfg.ICON_OFFSET_RATIO * cfg.BATTERY_LINE_WIDTH_RATIO * min_dim)
 
-    try:
-        font = ImageFont.truetype("arial.ttf", rec_text_size)
-    except IOError:
-        font = ImageFont.load_default()
+    font = _load_font(cfg.FONT_NAME, rec_text_size)
 
-    rec_circle_position = (image.width - margin - corner_length + icon_offset - rec_text_size - rec_circle_radius // 2,
+    rec_circle_position = (width - margin - corner_length + icon_offset - rec_text_size - rec_circle_radius // 2,
                          margin + icon_offset + rec_circle_radius)
     
     draw.ellipse([(rec_circle_position[0] - rec_circle_radius, rec_circle_position[1] - rec_circle_radius),
@@ -228,41 +579,189 @@ def _draw_rec_indicator(draw, image, margin, min_dim, cfg):
                rec_circle_position[1] - rec_text_size // 2),
               "REC", fill=cfg.REC_COLOR, font=font)
 
-def _draw_timer(draw, margin, line_width, timer_text, height, cfg):
-    """Draw timer text"""
+def _timer_origin(width, height):
+    """Return the timer's text position and font size for an image size"""
+    cfg = CameraEffectConfig
+    _, margin, _, battery_line_width = _camera_layout(width, height)
     rec_text_size = int(cfg.REC_TEXT_SIZE_RATIO * height)
-    icon_offset = line_width * cfg.ICON_OFFSET_RATIO
+    icon_offset = battery_line_width * cfg.ICON_OFFSET_RATIO
+    return (margin + icon_offset, height - margin - icon_offset - rec_text_size), rec_text_size
 
-    try:
-        font = ImageFont.truetype("arial.ttf", rec_text_size)
-    except IOError:
-        font = ImageFont.load_default()
+def _draw_timer(draw, width, height, timer_text, cfg):
+    """Draw timer text"""
+    origin, rec_text_size = _timer_origin(width, height)
+    font = _load_font(cfg.FONT_NAME, rec_text_size)
 
-    draw.text((margin + icon_offset, height - margin - icon_offset - rec_text_size),
-              timer_text, fill=cfg.TIMER_COLOR, font=font,
+    draw.text(origin, timer_text, fill=cfg.TIMER_COLOR, font=font,
               stroke_width=cfg.TIMER_OUTLINE_WIDTH, stroke_fill=cfg.TIMER_OUTLINE_COLOR)
 
-def add_camera_effect(image, battery_level_ratio=1, timer_text=""):
-    """
-    Add camera-style overlay effects to an image
+def render_timer_patch(width, height, timer_text):
+    """Render the timer text as a sparse patch covering only its bounding box
+
+    Returns None if the text draws nothing inside the image.
     """
-    battery_level_ratio = max(battery_level_ratio, 0.2)
     cfg = CameraEffectConfig
-    
-    min_dim = min(image.width, image.height)
+    origin, rec_text_size = _timer_origin(width, height)
+    font = _load_font(cfg.FONT_NAME, rec_text_size)
+    bbox = ImageDraw.Draw(Image.new('RGBA', (1, 1))).textbbox(
+        origin, timer_text, font=font, stroke_width=cfg.TIMER_OUTLINE_WIDTH)
+    # Start the canvas at or before the origin so the text keeps its subpixel offset
+    left = max(0, min(int(bbox[0]), int(origin[0])))
+    top = max(0, min(int(bbox[1]), int(origin[1])))
+    right, bottom = min(width, int(np.ceil(bbox[2]))), min(height, int(np.ceil(bbox[3])))
+    if right <= left or bottom <= top:
+        return None
+    canvas = Image.new('RGBA', (right - left, bottom - top), (0, 0, 0, 0))
+    _draw_timer(_OffsetDraw(ImageDraw.Draw(canvas), left, top), width, height, timer_text, cfg)
+    return _canvas_patch(canvas, left, top)
+
+def _camera_layout(width, height):
+    """Return (min_dim, margin, rect_line_width, battery_line_width) for an image size"""
+    cfg = CameraEffectConfig
+    min_dim = min(width, height)
     margin = int(cfg.MARGIN_RATIO * min_dim)
     rect_line_width = max(1, int(cfg.RECT_LINE_WIDTH_RATIO * min_dim))
     battery_line_width = max(1, int(cfg.BATTERY_LINE_WIDTH_RATIO * min_dim))
-    
-    draw = ImageDraw.Draw(image)
-    
-    _draw_corner_frames(draw, image, margin, rect_line_width, cfg)
+    return min_dim, margin, rect_line_width, battery_line_width
+
+def _draw_camera_overlay(draw, width, height, battery_level_ratio):
+    """Draw the parts of the camera overlay that do not change between frames"""
+    cfg = CameraEffectConfig
+    min_dim, margin, rect_line_width, battery_line_width = _camera_layout(width, height)
+    _draw_corner_frames(draw, width, height, margin, rect_line_width, cfg)
     _draw_battery_indicator(draw, margin, battery_line_width, battery_level_ratio,
                           cfg.get_battery_color(battery_level_ratio), cfg)
-    _draw_rec_indicator(draw, image, margin, min_dim, cfg)
-    
+    _draw_rec_indicator(draw, width, margin, min_dim, cfg)
+
+def _canvas_patch(canvas, left, top):
+    """Turn the drawn pixels of an RGBA canvas placed at (left, top) into a sparse patch
+
+    Returns None if nothing was drawn.
+    """
+    pixels = np.asarray(canvas)
+    ys, xs = np.nonzero(pixels[..., 3])
+    if len(ys) == 0:
+        return None
+    box = (left + int(xs.min()), top + int(ys.min()), left + int(xs.max()) + 1, top + int(ys.max()) + 1)
+    color = pixels[ys, xs]
+    alpha = color[:, 3:].astype(np.uint16)
+    color[:, 3] = 255  # Drawn pixels end up opaque
+    index = (ys - ys.min()) * (box[2] - box[0]) + (xs - xs.min())
+    opaque = alpha[:, 0] == 255
+    partial = ~opaque
+    return (box, index[opaque], color[opaque],
+            index[partial], color[partial], alpha[partial], color[partial] * alpha[partial])
+
+def _render_camera_sprite(width, height, battery_level_ratio):
+    """Render the static overlay as a list of sparse RGBA patches
+
+    Only the four corner areas, where every static element lies, are drawn.
+    Each patch holds the bounding box of the drawn pixels in one corner, then
+    the flat indices (inside the box) and colors of the fully covered pixels,
+    and the indices, colors, (N, 1) coverage and color * coverage (as uint16)
+    of the antialiased edge pixels that need blending.
+    """
+    cfg = CameraEffectConfig
+    min_dim, margin, rect_line_width, battery_line_width = _camera_layout(width, height)
+    # The battery is sized by its line width, which has a floor of one pixel
+    battery_reach = (cfg.ICON_OFFSET_RATIO + cfg.BATTERY_BODY_WIDTH_RATIO + cfg.BATTERY_HEAD_WIDTH_RATIO + 1) * battery_line_width
+    reach = margin + rect_line_width + max(int(cfg.SPRITE_REACH_RATIO * min_dim), battery_reach)
+    # Disjoint so that no pixel is composited twice
+    columns = [(0, min(reach, width // 2)), (max(width - reach, width // 2), width)]
+    rows = [(0, min(reach, height // 2)), (max(height - reach, height // 2), height)]
+
+    patches = []
+    for top, bottom in rows:
+        for left, right in columns:
+            if right <= left or bottom <= top:
+                continue
+            canvas = Image.new('RGBA', (right - left, bottom - top), (0, 0, 0, 0))
+            _draw_camera_overlay(_OffsetDraw(ImageDraw.Draw(canvas), left, top), width, height, battery_level_ratio)
+            patch = _canvas_patch(canvas, left, top)
+            if patch is not None:
+                patches.append(patch)
+    return patches
+
+class CameraOverlaySpriteCache(LRUCache):
+    """Bounded LRU cache of pre-rendered camera overlays keyed by (width, height, battery)
+
+    Cached sprites are read-only and shared by the effect worker and the GUI
+    thread.
+    """
+    def get(self, width, height, battery_level_ratio):
+        """Return the sprite patches for the overlay, rendering them on a miss"""
+        return super().get((width, height, battery_level_ratio))
+
+    def build(self, key):
+        sprite = _render_camera_sprite(*key)
+        for patch in sprite:
+            for array in patch[1:]:
+                array.setflags(write=False)
+        return sprite
+
+camera_overlay_sprite_cache = CameraOverlaySpriteCache(Settings.Camera.SPRITE_CACHE_SIZE)
+
+def _blend_patch(region, patch, channel_order=None):
+    """Blend one sparse patch into region, a contiguous copy of the patch's box
+
+    channel_order reorders the patch colors to the region's layout, e.g.
+    [2, 1, 0] for BGR frames.
+    """
+    _, opaque_index, opaque_color, index, color, alpha, weighted = patch
+    if channel_order is not None:
+        opaque_color, color, weighted = (array[:, channel_order] for array in (opaque_color, color, weighted))
+    flat = region.reshape(-1, region.shape[2])
+    channels = flat.shape[1]
+    flat[opaque_index] = opaque_color[:, :channels]
+
+    pixels = flat[index]
+    blended = (weighted[:, :channels] + pixels * (255 - alpha) + 127) // 255
+    if channels == 4:
+        transparent = pixels[:, 3] == 0
+        blended[transparent, :3] = color[transparent, :3]
+    flat[index] = blended
+
+def _composite_sprite(pil_image, sprite):
+    """Blend sprite patches into an RGB or RGBA image in place
+
+    Fully covered pixels are replaced. At the antialiased edges each channel,
+    alpha included, moves towards the sprite color by the coverage, which is
+    how PIL blends shapes and text drawn directly on the image; like PIL,
+    fully transparent pixels take the sprite color.
+    """
+    for patch in sprite:
+        box = patch[0]
+        region = np.array(pil_image.crop(box))
+        _blend_patch(region, patch)
+        pil_image.paste(Image.fromarray(region, pil_image.mode), box)
+
+def composite_patches(image_array, patches, bgr=False):
+    """Blend sparse patches into an (H, W, 3 or 4) uint8 array in place
+
+    Only the patch boxes are read and written, so the cost does not depend
+    on the frame size. Set bgr for frames in OpenCV's BGR(A) channel order.
+    """
+    channel_order = [2, 1, 0, 3] if bgr else None
+    for patch in patches:
+        left, top, right, bottom = patch[0]
+        region = np.ascontiguousarray(image_array[top:bottom, left:right])
+        _blend_patch(region, patch, channel_order)
+        image_array[top:bottom, left:right] = region
+
+def add_camera_effect(image, battery_level_ratio=1, timer_text=""):
+    """
+    Add camera-style overlay effects to an image
+
+    The corners, battery and REC indicator come from a sprite cached per
+    (size, battery level); only the timer is drawn on each call.
+    """
+    battery_level_ratio = max(battery_level_ratio, 0.2)
+    cfg = CameraEffectConfig
+
+    _composite_sprite(image, camera_overlay_sprite_cache.get(image.width, image.height, battery_level_ratio))
+
     if timer_text:
-        _draw_timer(draw, margin, battery_line_width, timer_text, image.height, cfg)
+        _draw_timer(ImageDraw.Draw(image), image.width, image.height, timer_text, cfg)
     
     return image
 
@@ -0,0 +1,253 @@
+import json
+import logging
+import os
+import socket
+import sys
+import threading
+import time
+import tracemalloc
+from collections import OrderedDict
+from contextlib import contextmanager
+from logging.handlers import RotatingFileHandler
+
+import numpy as np
+
+from config.settings import Settings
+
+
+_active = threading.local()
+
+
+class OperationTrace:
+    """Timings and memory of one user-visible operation, broken into stages
+
+    Stages may be recorded from any thread, one at a time; a stage entered
+    more than once accumulates. When tracemalloc is tracing, the peak
+    allocated above the level at creation is recorded too. tracemalloc sees
+    Python and NumPy allocations only, and operations that overlap share its
+    peak counter, so the figure is a lower bound.
+    """
+    def __init__(self, name, **fields):
+        self.name = name
+        self.fields = dict(fields)
+        self.stages = OrderedDict()  # Stage name -> milliseconds
+        self.status = 'ok'
+        self.total_ms = None
+        self.peak_bytes = None
+        self._start = time.perf_counter()
+        self._baseline = None
+        if tracemalloc.is_tracing():
+            self._baseline = tracemalloc.get_traced_memory()[0]
+            tracemalloc.reset_peak()
+
+    @contextmanager
+    def stage(self, name):
+        """Time the enclosed block as stage name"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(name, time.perf_counter() - start)
+
+    def record(self, name, seconds):
+        """Add seconds measured elsewhere, e.g. on a worker, to stage name"""
+        self.stages[name] = self.stages.get(name, 0.0) + seconds * 1000
+
+    def close(self, status=None):
+        """Stop the clock; later calls keep the first result"""
+        if self.total_ms is not None:
+            return
+        if status is not None:
+            self.status = status
+        self.total_ms = (time.perf_counter() - self._start) * 1000
+        if self._baseline is not None and tracemalloc.is_tracing():
+            self.peak_bytes = max(0, tracemalloc.get_traced_memory()[1] - self._baseline)
+
+    def to_dict(self):
+        return {
+            'op': self.name,
+            'status': self.status,
+            'total_ms': round(self.total_ms, 3) if self.total_ms is not None else None,
+            'stages_ms': {name: round(ms, 3) for name, ms in self.stages.items()},
+            'peak_bytes': self.peak_bytes,
+            **self.fields,
+        }
+
+
+def current_trace():
+    """Return the trace activated on this thread, or None"""
+    return getattr(_active, 'trace', None)
+
+
+@contextmanager
+def activate(trace):
+    """Make trace the target of stage() and annotate() on this thread"""
+    previous = current_trace()
+    _active.trace = trace
+    try:
+        yield trace
+    finally:
+        _active.trace = previous
+
+
+@contextmanager
+def stage(name):
+    """Time the enclosed block into the active trace; does nothing without one"""
+    trace = current_trace()
+    if trace is None:
+        yield
+        return
+    with trace.stage(name):
+        yield
+
+
+def annotate(**fields):
+    """Add fields to the active trace, if any"""
+    trace = current_trace()
+    if trace is not None:
+        trace.fields.update(fields)
+
+
+class Instrumentation:
+    """Finish operation traces and log them as JSON lines
+
+    Each record carries the host name so logs copied from several
+    workstations can be aggregated; see summarize(). The log rotates at
+    max_bytes, keeping backup_count old files.
+    """
+    def __init__(self, log_path=None, max_bytes=0, backup_count=0, trace_memory=False):
+        self.log_path = log_path
+        self.max_bytes = max_bytes
+        self.backup_count = backup_count
+        self.trace_memory = trace_memory
+        self.last = None  # The record of the most recent operation
+        self._logger = None
+        self._host = socket.gethostname()
+
+    def start_memory_tracing(self):
+        """Start tracemalloc if memory tracing is enabled, so traces record their peak"""
+        if self.trace_memory and not tracemalloc.is_tracing():
+            tracemalloc.start()
+
+    def start(self, name, **fields):
+        """Return a new OperationTrace"""
+        self.start_memory_tracing()
+        return OperationTrace(name, **fields)
+
+    def finish(self, trace, status=None, **fields):
+        """Close trace, add fields and log it
+
+        Returns:
+            dict: The logged record
+        """
+        trace.close(status)
+        trace.fields.update(fields)
+        record = {
+            'time': time.strftime('%Y-%m-%dT%H:%M:%S%z'),
+            'host': self._host,
+            **trace.to_dict(),
+        }
+        self.last = record
+        logger = self._getLogger()
+        if logger is not None:
+            logger.info(json.dumps(record))
+        return record
+
+    def _getLogger(self):
+        if self._logger is None and self.log_path:
+            try:
+                os.makedirs(os.path.dirname(os.path.abspath(self.log_path)), exist_ok=True)
+                handler = RotatingFileHandler(self.log_path, maxBytes=self.max_bytes,
+                                              backupCount=self.backup_count, encoding='utf-8')
+            except OSError:
+                self.log_path = None  # Keep working without a log
+                return None
+            handler.setFormatter(logging.Formatter('%(message)s'))
+            self._logger = logging.getLogger(f"{__name__}.{id(self)}")
+            self._logger.setLevel(logging.INFO)
+            self._logger.propagate = False
+            self._logger.addHandler(handler)
+        return self._logger
+
+    def close(self):
+        """Close the log file"""
+        if self._logger is not None:
+            for handler in list(self._logger.handlers):
+                handler.close()
+                self._logger.removeHandler(handler)
+            self._logger = None
+
+
+instrumentation = Instrumentation(
+    Settings.Instrumentation.LOG_PATH,
+    Settings.Instrumentation.LOG_MAX_BYTES,
+    Settings.Instrumentation.LOG_BACKUP_COUNT,
+    Settings.Instrumentation.TRACE_MEMORY
+)
+
+
+def format_trace(trace):
+    """One-line summary of a finished trace for the status bar"""
+    stages = ", ".join(f"{name} {ms:.0f}" for name, ms in trace.stages.items())
+    text = Settings.Instrumentation.STATUS_TEXT.format(name=trace.name, total=trace.total_ms, stages=stages or "-")
+    if trace.peak_bytes is not None:
+        text += Settings.Instrumentation.PEAK_TEXT.format(peak=trace.peak_bytes / (1024 * 1024))
+    if 'history_bytes' in trace.fields:
+        text += Settings.Instrumentation.HISTORY_TEXT.format(history=trace.fields['history_bytes'] / (1024 * 1024))
+    if 'detections' in trace.fields:
+        text += Settings.Instrumentation.DETECTIONS_TEXT.format(detections=trace.fields['detections'])
+    if trace.status != 'ok':
+        text += f" [{trace.status}]"
+    return text
+
+
+def load_records(paths):
+    """Read the records of one or more JSON-lines logs, skipping damaged lines"""
+    records = []
+    for path in paths:
+        with open(path, encoding='utf-8') as f:
+            for line in f:
+                try:
+                    records.append(json.loads(line))
+                except ValueError:
+                    continue
+    return records
+
+
+def summarize(records):
+    """Aggregate records per operation
+
+    Returns:
+        dict: Operation name -> count, hosts, mean/p95/max total ms, mean ms
+        of each stage and max peak bytes, over the successful records
+    """
+    groups = OrderedDict()
+    for record in records:
+        if record.get('status') == 'ok' and record.get('total_ms') is not None:
+            groups.setdefault(record['op'], []).append(record)
+
+    summary = OrderedDict()
+    for name, group in groups.items():
+        totals = np.array([record['total_ms'] for record in group])
+        stage_names = OrderedDict((stage, None) for record in group for stage in record.get('stages_ms', {}))
+        peaks = [record['peak_bytes'] for record in group if record.get('peak_bytes') is not None]
+        summary[name] = {
+            'count': len(group),
+            'hosts': len({record.get('host') for record in group}),
+            'mean_ms': float(totals.mean()),
+            'p95_ms': float(np.percentile(totals, 95)),
+            'max_ms': float(totals.max()),
+            'stages_ms': {stage: float(np.mean([record['stages_ms'].get(stage, 0.0) for record in group]))
+                          for stage in stage_names},
+            'max_peak_bytes': max(peaks) if peaks else None,
+        }
+    return summary
+
+
+if __name__ == "__main__":
+    # Aggregate logs collected from several workstations:
+    # python -m utils.instrumentation host1/operations.jsonl host2/operations.jsonl
+    for name, entry in summarize(load_records(sys.argv[1:])).items():
+        stages = ", ".join(f"{stage} {ms:.1f}" for stage, ms in entry['stages_ms'].items())
+        print(f"{name}: {entry['count']} runs on {entry['hosts']} hosts, mean {entry['mean_ms']:.1f} ms, "
+              f"p95 {entry['p95_ms']:.1f} ms, max {entry['max_ms']:.1f} ms ({stages})")
@@ -0,0 +1,66 @@
+import threading
+from collections import OrderedDict
+
+
+class LRUCache:
+    """Bounded, thread-safe LRU cache that builds missing values itself
+
+    Subclasses implement build(key) and usually wrap get() with a signature
+    that makes the key. Every access to the entries and counters holds a
+    lock, but values are built outside it, so a slow build does not hold up
+    lookups on other threads. Two threads missing the same key at once both
+    build it, and the value stored first is returned to both.
+    """
+    def __init__(self, max_entries):
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        with self._lock:
+            return len(self._entries)
+
+    def __contains__(self, key):
+        with self._lock:
+            return key in self._entries
+
+    def build(self, key):
+        """Return the value for a key that is not cached"""
+        raise NotImplementedError
+
+    def get(self, key):
+        """Return the value for key, building it on a miss"""
+        with self._lock:
+            value = self._entries.get(key)
+            if value is not None:
+                self.hits += 1
+                self._entries.move_to_end(key)
+                return value
+            self.misses += 1
+
+        value = self.build(key)
+
+        with self._lock:
+            stored = self._entries.setdefault(key, value)
+            self._entries.move_to_end(key)
+            if len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+            return stored
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.hits = 0
+            self.misses = 0
+
+    def stats(self):
+        """Return a snapshot of the cache counters"""
+        with self._lock:
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'size': len(self._entries),
+                'max_entries': self.max_entries,
+            }
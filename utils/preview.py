@@ -0,0 +1,88 @@
+import math
+
+from utils.selection import as_selection
+
+
+def preview_region(polygon, visible_box, image_size, step, max_pixels, display_scale=1.0):
+    """Choose the image box and scale at which to render a preview of step
+
+    The box covers the part of the polygon inside visible_box, grown by the
+    blur halo so edge pixels see their real neighbours, and snapped to the
+    mosaic grid so preview blocks line up with the final ones. The scale is at
+    most display_scale and keeps the proxy within max_pixels; for mosaics it is
+    rounded so every block is a whole number of proxy pixels (along the longer
+    side of rectangular blocks).
+
+    Args:
+        polygon: Selection as a list of (x, y) image points
+        visible_box: (left, top, right, bottom) of the image area on screen
+        image_size: (width, height) of the full image
+        step: Recipe step to preview
+        max_pixels: Largest number of pixels the proxy may have
+        display_scale: Screen pixels per image pixel
+
+    Returns:
+        tuple: ((left, top, right, bottom), scale), or None if nothing is visible
+    """
+    x_coords, y_coords = zip(*polygon)
+    margin = step.get('intensity', 0) // 2 + 1 if step['op'] == 'blur' else 0
+    align = step.get('block_size', 1) if step['op'] == 'mosaic' else 1
+    align_x, align_y = align if isinstance(align, (tuple, list)) else (align, align)
+
+    left = max(min(x_coords), visible_box[0]) - margin
+    top = max(min(y_coords), visible_box[1]) - margin
+    right = min(max(x_coords) + 1, visible_box[2]) + margin
+    bottom = min(max(y_coords) + 1, visible_box[3]) + margin
+
+    left = max(0, left // align_x * align_x)
+    top = max(0, top // align_y * align_y)
+    right = min(image_size[0], right)
+    bottom = min(image_size[1], bottom)
+    if right <= left or bottom <= top:
+        return None
+
+    scale = min(1.0, display_scale, math.sqrt(max_pixels / ((right - left) * (bottom - top))))
+    longest = max(align_x, align_y)
+    if longest > 1:
+        scale = max(1, round(longest * scale)) / longest
+    return (left, top, right, bottom), scale
+
+
+def proxy_size(box, scale):
+    """Return the (width, height) of the proxy image for box at scale"""
+    left, top, right, bottom = box
+    return max(1, round((right - left) * scale)), max(1, round((bottom - top) * scale))
+
+
+def scale_step(step, polygon, box, scale, image_size):
+    """Map a recipe step and its polygon into the coordinates of a proxy image
+
+    Args:
+        polygon: The step's selection, or None for steps without one (camera, redact)
+
+    Returns:
+        dict: A copy of step with its polygons, sizes and blur falloff scaled
+    """
+    left, top = box[:2]
+    scaled = dict(step)
+    if polygon is not None:
+        scaled['polygons'] = [[[round((x - left) * scale), round((y - top) * scale)] for x, y in part]
+                              for part in as_selection(polygon).parts]
+        scaled.pop('rect', None)
+        scaled.pop('polygon', None)
+
+    if 'block_size' in step:
+        block_size = step['block_size']
+        if isinstance(block_size, (tuple, list)):
+            scaled['block_size'] = [max(1, round(side * scale)) for side in block_size]
+        else:
+            scaled['block_size'] = max(1, round(block_size * scale))
+    if 'intensity' in step:
+        scaled['intensity'] = max(1, round(step['intensity'] * scale))
+    if 'size' in step:
+        scaled['size'] = max(1, round(step['size'] * scale))
+    if step['op'] == 'blur':
+        scaled['falloff_frame'] = (round(-left * scale), round(-top * scale),
+                                   round((image_size[0] - left) * scale),
+                                   round((image_size[1] - top) * scale))
+    return scaled
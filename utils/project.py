@@ -0,0 +1,268 @@
+import base64
+import hashlib
+import io
+import json
+import math
+import os
+
+import numpy as np
+from PIL import Image
+
+from config.settings import Settings
+from utils.detection import detect_regions, box_polygon
+from utils.preview import scale_step
+from utils.recipe import SELECTION_OPERATIONS, validate_steps, run_recipe, _selection_polygon
+from utils.selection import as_selection
+from utils.tiling import part_progress
+from utils.working_buffer import open_image
+
+
+PROJECT_VERSION = 1
+
+
+def sidecar_path(image_path):
+    """Return the path of the project file kept next to image_path"""
+    return image_path + Settings.Project.SIDECAR_SUFFIX
+
+
+def proxy_factor(size, proxy_side):
+    """Return the whole reduction factor that brings size within proxy_side"""
+    return max(1, math.ceil(max(size) / proxy_side))
+
+
+def bind_selection(steps, selection):
+    """Return copies of steps with the selection stored in those that need one
+
+    Steps that act on a selection but carry no 'rect', 'polygon' or
+    'polygons' get the selection's parts as 'polygons', so every step of a
+    project keeps its own geometry in image coordinates.
+    """
+    bound = []
+    for step in steps:
+        step = dict(step)
+        if step['op'] in SELECTION_OPERATIONS and selection \
+                and 'rect' not in step and 'polygon' not in step and not step.get('polygons'):
+            step['polygons'] = [[[int(x), int(y)] for x, y in part] for part in as_selection(selection).parts]
+        bound.append(step)
+    return bound
+
+
+class Project:
+    """Non-destructive edit stack of one source image
+
+    Each edit is one or more recipe steps (see utils.recipe) holding their
+    selection in image coordinates, so the source pixels are never changed
+    and a step's parameters can still be edited after it was applied.
+    Edits are rendered on a proxy reduced by a whole factor to at most
+    Settings.Project.PROXY_SIDE pixels; render() replays them at full
+    resolution, for export. Redact steps detect their regions once, on the
+    proxy, and keep them as 'polygons' in image coordinates, so the export
+    redacts exactly what the preview showed.
+
+    A project saves to a small JSON sidecar next to the source image. The
+    sidecar also caches the last rendered proxy, so a project reopens
+    without running any effect until it is edited again.
+    """
+    def __init__(self, source, size=None, steps=None, proxy_side=None):
+        """
+        Args:
+            source: Path of the source image
+            size: (width, height) of the source, read from the file if omitted
+            steps: Steps already applied, each undone separately
+            proxy_side: Defaults to Settings.Project.PROXY_SIDE
+        """
+        self.source = os.path.abspath(source)
+        if size is None:
+            with open_image(self.source) as image:
+                size = image.size
+        self.size = tuple(size)
+        self.factor = proxy_factor(self.size, proxy_side or Settings.Project.PROXY_SIDE)
+        self.steps = []
+        self._edits = []  # Number of steps added by each edit, for undo
+        self._undone = []  # Steps of the undone edits, for redo
+        self._cache = None  # (digest, encoded image) of the last rendered proxy
+        if steps:
+            validate_steps(steps)
+            self.steps = [dict(step) for step in steps]
+            self._edits = [1] * len(steps)
+
+    def add(self, steps, selection=None):
+        """Push steps as one edit and return them as stored
+
+        Args:
+            selection: Polygon given to the steps that have no geometry of their own
+
+        Raises:
+            ValueError: If a step is invalid
+        """
+        steps = bind_selection(steps, selection)
+        validate_steps(steps)
+        self.steps.extend(steps)
+        self._edits.append(len(steps))
+        self._undone.clear()
+        return steps
+
+    def update(self, index, **params):
+        """Change the parameters of the step at index, e.g. update(0, block_size=30)
+
+        Raises:
+            ValueError: If the changed step is invalid
+        """
+        step = dict(self.steps[index], **params)
+        validate_steps([step])
+        self.steps[index] = step
+        self._undone.clear()
+
+    def can_undo(self):
+        return bool(self._edits)
+
+    def can_redo(self):
+        return bool(self._undone)
+
+    def undo(self):
+        """Drop the last edit; returns False if there was none"""
+        if not self._edits:
+            return False
+        count = self._edits.pop()
+        self._undone.append(self.steps[-count:])
+        del self.steps[-count:]
+        return True
+
+    def redo(self):
+        """Push the last undone edit again and return its steps, or None"""
+        if not self._undone:
+            return None
+        steps = self._undone.pop()
+        self.steps.extend(steps)
+        self._edits.append(len(steps))
+        return steps
+
+    def proxy_steps(self, steps=None):
+        """Map steps (default: all) into proxy coordinates, see utils.preview.scale_step"""
+        box = (0, 0) + self.size
+        scaled = []
+        for step in self.steps if steps is None else steps:
+            polygon = _selection_polygon(step) if step['op'] in SELECTION_OPERATIONS or step.get('polygons') else None
+            scaled.append(scale_step(step, polygon, box, 1 / self.factor, self.size))
+        return scaled
+
+    def has_alpha(self):
+        """Return whether the source image has transparency"""
+        with open_image(self.source) as image:
+            return 'A' in image.mode or 'transparency' in image.info
+
+    def load_source(self):
+        """Decode the source image as a writable (H, W, 4) RGBA array"""
+        with open_image(self.source) as image:
+            if image.size != self.size:
+                raise ValueError(f"{self.source} is {image.width}x{image.height}, "
+                                 f"the project expects {self.size[0]}x{self.size[1]}")
+            return np.array(image.convert('RGBA'))
+
+    def load_proxy_source(self):
+        """Decode the source image reduced to the proxy, with no edits applied"""
+        with open_image(self.source) as image:
+            image = image.convert('RGBA')
+            return np.array(image.reduce(self.factor) if self.factor > 1 else image)
+
+    def locate(self, step, proxy_array):
+        """Store the regions a redact step finds on proxy_array in the step, in image coordinates"""
+        width, height = self.size
+        step['polygons'] = [
+            [list(point) for point in box_polygon((left * self.factor, top * self.factor,
+                                                   min(width, right * self.factor), min(height, bottom * self.factor)))]
+            for left, top, right, bottom in detect_regions(proxy_array, step.get('targets'))
+        ]
+
+    def render_proxy(self, proxy_array, steps=None, progress=None):
+        """Run steps (default: all) on proxy_array in place and return it
+
+        Redact steps without 'polygons' are located first, see locate().
+
+        Args:
+            progress: Callable taking (done, total), see utils.recipe.run_recipe
+        """
+        steps = self.steps if steps is None else steps
+        for index, step in enumerate(steps):
+            if step['op'] == 'redact' and 'polygons' not in step:
+                self.locate(step, proxy_array)
+            run_recipe(proxy_array, self.proxy_steps([step]), progress=part_progress(progress, index, len(steps)))
+        return proxy_array
+
+    def render(self, progress=None):
+        """Replay every step on the full-resolution source and return the result
+
+        Args:
+            progress: Callable taking (done, total), see utils.recipe.run_recipe
+        """
+        return run_recipe(self.load_source(), self.steps, progress=progress)
+
+    def _digest(self):
+        """Identify the rendered result: the steps, the proxy factor and the source file"""
+        try:
+            modified = os.stat(self.source).st_mtime_ns
+        except OSError:
+            modified = None
+        state = json.dumps([self.size, self.factor, modified, self.steps], sort_keys=True)
+        return hashlib.sha1(state.encode('utf-8')).hexdigest()
+
+    def cache_proxy(self, proxy_array):
+        """Keep the rendered proxy for the sidecar, compressed"""
+        output = io.BytesIO()
+        Image.fromarray(proxy_array, 'RGBA').save(output, Settings.Project.CACHE_FORMAT,
+                                                  quality=Settings.Project.CACHE_QUALITY)
+        self._cache = (self._digest(), output.getvalue())
+
+    def cached_proxy(self):
+        """Return the cached proxy as an RGBA array, or None if the edits or source changed since"""
+        if self._cache is None or self._cache[0] != self._digest():
+            return None
+        with Image.open(io.BytesIO(self._cache[1])) as image:
+            return np.array(image.convert('RGBA'))
+
+    def save(self, path=None):
+        """Write the project to path, by default the sidecar of the source image
+
+        Returns:
+            str: The path written
+        """
+        path = path or sidecar_path(self.source)
+        data = {
+            'version': PROJECT_VERSION,
+            'source': os.path.relpath(self.source, os.path.dirname(os.path.abspath(path))),
+            'size': list(self.size),
+            'steps': self.steps,
+        }
+        if self._cache is not None:
+            data['proxy'] = {'digest': self._cache[0], 'image': base64.b64encode(self._cache[1]).decode('ascii')}
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(data, f)
+        return path
+
+    @classmethod
+    def load(cls, path, proxy_side=None):
+        """Read a project written by save()
+
+        Raises:
+            ValueError: If the file is not a valid project
+        """
+        with open(path, encoding='utf-8') as f:
+            data = json.load(f)
+        if not isinstance(data, dict) or data.get('version') != PROJECT_VERSION:
+            raise ValueError(f"{path} is not an image_tools project (version {PROJECT_VERSION})")
+        try:
+            source = os.path.join(os.path.dirname(os.path.abspath(path)), data['source'])
+            project = cls(source, data['size'], data['steps'], proxy_side)
+            if 'proxy' in data:
+                project._cache = (data['proxy']['digest'], base64.b64decode(data['proxy']['image']))
+        except (KeyError, TypeError) as e:
+            raise ValueError(f"{path} is not a valid project: {e}") from None
+        return project
+
+
+def open_project(image_path, proxy_side=None):
+    """Return the project saved next to image_path, or a new one without edits"""
+    path = sidecar_path(image_path)
+    if os.path.isfile(path):
+        return Project.load(path, proxy_side)
+    return Project(image_path, proxy_side=proxy_side)
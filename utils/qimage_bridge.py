@@ -0,0 +1,76 @@
+from PyQt5 import sip
+from PyQt5.QtGui import QImage, QPixmap
+from PIL import Image
+import numpy as np
+
+
+# QImage format whose bytes are laid out R, G, B, A on every platform
+ARRAY_FORMAT = QImage.Format_RGBA8888
+
+
+class _QImageBuffer:
+    """Expose a QImage's pixel memory through the NumPy array interface
+
+    NumPy keeps this object as the base of the arrays created from it, which in
+    turn keeps the QImage (and therefore the memory) alive.
+    """
+    def __init__(self, qimage):
+        self.qimage = qimage
+        ptr = qimage.bits()
+        ptr.setsize(qimage.sizeInBytes())
+        self.__array_interface__ = {
+            'version': 3,
+            'shape': (qimage.height(), qimage.width(), 4),
+            'typestr': '|u1',
+            'strides': (qimage.bytesPerLine(), 4, 1),
+            'data': (int(ptr), False),
+        }
+
+
+def qimage_to_array(qimage):
+    """Return an (H, W, 4) RGBA uint8 view over a QImage's pixels
+
+    Images that are not already RGBA8888 are converted first, which is the only
+    copy made. Writes to the array are visible in the returned view's QImage,
+    not in the original image.
+    """
+    if qimage.format() != ARRAY_FORMAT:
+        qimage = qimage.convertToFormat(ARRAY_FORMAT)
+    return np.asarray(_QImageBuffer(qimage))
+
+
+def pixmap_to_array(pixmap):
+    """Return an (H, W, 4) RGBA uint8 array holding a copy of the pixmap"""
+    return qimage_to_array(pixmap.toImage())
+
+
+def array_to_qimage(array):
+    """Build an RGBA8888 QImage directly over an (H, W, 4) uint8 array
+
+    No pixels are copied: the QImage keeps a reference to the array for as long
+    as the Python wrapper lives. Use QImage.copy() for an independent image.
+    Painting on the QImage writes into the array if the array is writable.
+    """
+    array = np.ascontiguousarray(array, dtype=np.uint8)
+    height, width = array.shape[:2]
+    # Qt treats buffers passed as bytes as read-only and copies them on write
+    data = sip.voidptr(array.ctypes.data) if array.flags.writeable else array.data
+    qimage = QImage(data, width, height, array.strides[0], ARRAY_FORMAT)
+    qimage._array = array
+    return qimage
+
+
+def array_to_pixmap(array):
+    """Convert an (H, W, 4) RGBA uint8 array to a QPixmap"""
+    return QPixmap.fromImage(array_to_qimage(array))
+
+
+def array_to_pil_image(array):
+    """Return a writable RGBA PIL image sharing memory with the array
+
+    Drawing on or pasting into the image writes straight into the array.
+    """
+    height, width = array.shape[:2]
+    pil_image = Image.frombuffer("RGBA", (width, height), array, "raw", "RGBA", array.strides[0], 1)
+    pil_image.readonly = 0
+    return pil_image
@@ -0,0 +1,249 @@
+import json
+import os
+
+import numpy as np
+
+try:
+    import yaml
+except ImportError:  # YAML recipes are optional
+    yaml = None
+
+from config.settings import Settings
+from utils.image_utils import (
+    apply_mosaic,
+    apply_optimized_motion_blur_to_polygon,
+    add_text,
+    add_camera_effect
+)
+from utils.detection import detect_regions, box_polygon
+from utils.qimage_bridge import array_to_pil_image
+from utils.selection import combine
+from utils.tiling import part_progress
+
+
+OPERATIONS = ('mosaic', 'blur', 'text', 'camera', 'redact')
+# Operations that act on a selection and need a 'rect' or 'polygon'
+SELECTION_OPERATIONS = ('mosaic', 'blur', 'text')
+# Effects a redact step applies to every detected region
+REDACT_EFFECTS = ('mosaic', 'blur')
+
+
+def _is_int(value):
+    return isinstance(value, (int, np.integer)) and not isinstance(value, bool)
+
+
+def _is_number(value):
+    return _is_int(value) or isinstance(value, (float, np.floating))
+
+
+def _is_point(value):
+    return isinstance(value, (list, tuple)) and len(value) == 2 and all(_is_number(v) for v in value)
+
+
+def _is_polygon(value):
+    return isinstance(value, (list, tuple)) and len(value) > 0 and all(_is_point(point) for point in value)
+
+
+def _is_block_size(value):
+    if isinstance(value, (list, tuple)):
+        return len(value) == 2 and all(_is_int(side) and side > 0 for side in value)
+    return _is_int(value) and value > 0
+
+
+# Check and expected type of every step parameter, so a malformed recipe is
+# rejected when it is loaded instead of failing halfway through a run
+_PARAMETERS = {
+    'rect': (lambda v: isinstance(v, (list, tuple)) and len(v) == 4 and all(_is_number(x) for x in v),
+             "[x, y, width, height]"),
+    'polygon': (_is_polygon, "a list of [x, y] points"),
+    'polygons': (lambda v: isinstance(v, (list, tuple)) and all(_is_polygon(p) for p in v),
+                 "a list of polygons"),
+    'block_size': (_is_block_size, "a positive int or [width, height]"),
+    'intensity': (_is_int, "an int"),
+    'angle': (_is_number, "a number"),
+    'text': (lambda v: isinstance(v, str), "a string"),
+    'size': (_is_int, "an int"),
+    'color': (lambda v: isinstance(v, str), "a color name such as \"#ff0000\""),
+    'font': (lambda v: isinstance(v, str), "a font family name"),
+    'battery': (_is_number, "a number"),
+    'timer': (lambda v: isinstance(v, str), "a string"),
+    'targets': (lambda v: isinstance(v, (list, tuple)) and all(isinstance(t, str) for t in v),
+                "a list of names"),
+    'falloff_frame': (lambda v: isinstance(v, (list, tuple)) and len(v) == 4 and all(_is_number(x) for x in v),
+                      "[left, top, right, bottom]"),
+}
+
+
+def _selection_polygon(operation, selection=None):
+    """Return the operation's selection as a list of (x, y) points or a MultiSelection"""
+    if 'polygons' in operation:
+        return combine([tuple(point) for point in polygon] for polygon in operation['polygons'])
+    if 'polygon' in operation:
+        return [tuple(point) for point in operation['polygon']]
+    if 'rect' in operation:
+        x, y, width, height = operation['rect']
+        return [(x, y), (x + width, y), (x + width, y + height), (x, y + height)]
+    if selection:
+        return selection
+    raise ValueError(f"Operation '{operation['op']}' needs a 'rect', 'polygon' or 'polygons'")
+
+
+def apply_operation(pil_image, operation, selection=None, progress=None):
+    """Apply one operation to an RGBA PIL image in place
+
+    Args:
+        selection: Polygon used when the operation has no rect or polygon
+        progress: Callable taking (done, total), called as the tiles of a
+            mosaic or blur finish
+    """
+    op = operation['op']
+    if op == 'mosaic':
+        apply_mosaic(pil_image, _selection_polygon(operation, selection),
+                     operation.get('block_size', Settings.Mosaic.MOSAIC_SIZE['DEFAULT']), progress)
+    elif op == 'blur':
+        apply_optimized_motion_blur_to_polygon(
+            pil_image,
+            _selection_polygon(operation, selection),
+            operation.get('intensity', Settings.Blur.INTENSITY['DEFAULT']),
+            operation.get('angle', Settings.Blur.ANGLE['DEFAULT']),
+            in_place=True,
+            falloff_frame=operation.get('falloff_frame'),
+            progress=progress
+        )
+    elif op == 'text':
+        add_text(
+            pil_image,
+            _selection_polygon(operation, selection),
+            operation['text'],
+            operation.get('size', Settings.Text.FONT_SIZE['DEFAULT']),
+            operation.get('color', Settings.Text.DEFAULT_COLOR),
+            operation.get('angle', Settings.Text.ANGLE['DEFAULT']),
+            operation.get('font')
+        )
+    elif op == 'camera':
+        add_camera_effect(pil_image,
+                          operation.get('battery', Settings.Camera.BATTERY_LEVEL['DEFAULT']),
+                          operation.get('timer', ""))
+    elif op == 'redact':
+        redact(pil_image, operation, progress)
+    else:
+        raise ValueError(f"Unknown operation '{op}'")
+
+
+def redact(pil_image, operation, progress=None):
+    """Detect the operation's targets and apply its effect to every region found
+
+    The operation carries 'targets' (default Settings.Detection.TARGETS),
+    'effect' ('mosaic' or 'blur', default mosaic) and that effect's
+    parameters, e.g. {"op": "redact", "targets": ["face", "plate"],
+    "effect": "blur", "intensity": 30}. An operation that already holds
+    'polygons', the regions found when it was first applied, redacts those
+    without detecting again.
+
+    Returns:
+        list: The polygons that were redacted
+    """
+    if 'polygons' in operation:
+        polygons = operation['polygons']
+    else:
+        polygons = [box_polygon(box) for box in detect_regions(np.asarray(pil_image), operation.get('targets'))]
+    if polygons:
+        # All regions share one pass of the effect
+        effect = operation.get('effect', REDACT_EFFECTS[0])
+        apply_operation(pil_image, dict(operation, op=effect, polygons=polygons), progress=progress)
+    return polygons
+
+
+def validate_steps(steps, has_selection=False):
+    """Check that every step names a known operation, has the geometry it needs
+    and that its parameters have the right types
+
+    Raises:
+        ValueError: On the first invalid step
+    """
+    if not isinstance(steps, list):
+        raise ValueError("A recipe must be a list of steps")
+    for index, step in enumerate(steps, 1):
+        if not isinstance(step, dict) or step.get('op') not in OPERATIONS:
+            raise ValueError(f"Step {index}: 'op' must be one of: {', '.join(OPERATIONS)}")
+        for name, value in step.items():
+            if name in _PARAMETERS and not _PARAMETERS[name][0](value):
+                raise ValueError(f"Step {index}: '{name}' must be {_PARAMETERS[name][1]}, got {value!r}")
+        if step['op'] in SELECTION_OPERATIONS and not has_selection \
+                and 'rect' not in step and 'polygon' not in step and not step.get('polygons'):
+            raise ValueError(f"Step {index}: '{step['op']}' needs a 'rect', 'polygon' or 'polygons'")
+        if step['op'] == 'text' and 'text' not in step:
+            raise ValueError(f"Step {index}: 'text' needs a 'text'")
+        if step['op'] == 'redact':
+            if step.get('effect', REDACT_EFFECTS[0]) not in REDACT_EFFECTS:
+                raise ValueError(f"Step {index}: 'effect' must be one of: {', '.join(REDACT_EFFECTS)}")
+            unknown = [target for target in step.get('targets', ()) if target not in Settings.Detection.CASCADES]
+            if unknown:
+                raise ValueError(f"Step {index}: unknown targets {', '.join(unknown)}, expected: "
+                                 f"{', '.join(Settings.Detection.CASCADES)}")
+
+
+def _is_yaml(path):
+    return os.path.splitext(path)[1].lower() in ('.yaml', '.yml')
+
+
+def load_recipe(path):
+    """Load the list of steps from a JSON or YAML recipe file
+
+    The file holds either a list of steps or a mapping with a 'steps' list.
+    Each step is a mapping with an 'op' and that operation's parameters, e.g.
+    {"op": "mosaic", "rect": [10, 10, 200, 80], "block_size": 20}; a
+    [width, height] block_size gives rectangular mosaic blocks, and
+    "polygons": [[[x, y], ...], ...] applies a step to several polygons at once.
+
+    Raises:
+        OSError: If the file cannot be read
+        ValueError: If it is not valid JSON or YAML, or not a valid recipe
+    """
+    with open(path, encoding='utf-8') as f:
+        if _is_yaml(path):
+            if yaml is None:
+                raise ValueError("YAML recipes need PyYAML (pip install pyyaml)")
+            try:
+                recipe = yaml.safe_load(f)
+            except yaml.YAMLError as e:
+                raise ValueError(f"{path}: {e}") from None
+        else:
+            recipe = json.load(f)
+
+    steps = recipe.get('steps') if isinstance(recipe, dict) else recipe
+    validate_steps(steps, has_selection=True)
+    return steps
+
+
+def save_recipe(path, steps):
+    """Write steps to a JSON or YAML recipe file"""
+    validate_steps(steps, has_selection=True)
+    with open(path, 'w', encoding='utf-8') as f:
+        if _is_yaml(path):
+            if yaml is None:
+                raise ValueError("YAML recipes need PyYAML (pip install pyyaml)")
+            yaml.safe_dump({'steps': steps}, f, sort_keys=False)
+        else:
+            json.dump({'steps': steps}, f, indent=2)
+
+
+def run_recipe(image_array, steps, selection=None, progress=None):
+    """Run every step on one (H, W, 4) RGBA uint8 array, in place
+
+    All steps share the same buffer, so a recipe costs one decode and one
+    encode however many steps it has.
+
+    Args:
+        selection: Polygon used by steps that have no rect or polygon
+        progress: Callable taking (done, total): called as the tiles of
+            each step finish and after each step, with total steps * tiles
+            units in all, see utils.tiling.part_progress
+    """
+    validate_steps(steps, has_selection=bool(selection))
+    pil_image = array_to_pil_image(image_array)
+    for index, step in enumerate(steps, 1):
+        apply_operation(pil_image, step, selection, part_progress(progress, index - 1, len(steps)))
+        if progress:
+            progress(index, len(steps))
+    return image_array
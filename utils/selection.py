@@ -0,0 +1,238 @@
+import json
+import math
+
+import numpy as np
+from PIL import Image, ImageDraw
+
+from config.settings import Settings
+from utils.lru_cache import LRUCache
+
+
+class Selection:
+    """A polygon selection that rasterizes its mask once per image size
+
+    The mask covers only the polygon's bounding box (clipped to the image) and
+    is kept, read-only, for every later effect on the same selection. The
+    points never change, so a changed polygon is a new Selection: the point
+    tuple is the key that invalidates cached masks.
+
+    A Selection is also a sequence of (x, y) tuples, so code written for plain
+    polygon lists accepts it unchanged.
+    """
+    def __init__(self, polygon):
+        self.key = tuple((int(x), int(y)) for x, y in polygon)
+        self.points = self.key
+        self._masks = {}
+
+    @property
+    def parts(self):
+        """The single polygons making up the selection, each a Selection"""
+        return (self,)
+
+    def __len__(self):
+        return len(self.points)
+
+    def __iter__(self):
+        return iter(self.points)
+
+    def __getitem__(self, index):
+        return self.points[index]
+
+    def __eq__(self, other):
+        return isinstance(other, Selection) and other.key == self.key
+
+    def __hash__(self):
+        return hash(self.key)
+
+    def __repr__(self):
+        return f"Selection({list(self.key)})"
+
+    def bounds(self):
+        """Return (left, top, right, bottom) of the points, right and bottom inclusive"""
+        x_coords, y_coords = zip(*self.points)
+        return min(x_coords), min(y_coords), max(x_coords), max(y_coords)
+
+    def mask(self, size):
+        """Return (box, mask): the boolean mask over the bounding box clipped to size
+
+        The box is (left, top, right, bottom), right and bottom exclusive, and
+        may be empty when the polygon lies outside the image.
+        """
+        cached = self._masks.get(size)
+        if cached is not None:
+            return cached
+
+        min_x, min_y, max_x, max_y = self.bounds()
+        box = (max(0, min_x), max(0, min_y), min(size[0], max_x + 1), min(size[1], max_y + 1))
+        left, top, right, bottom = box
+        width, height = max(0, right - left), max(0, bottom - top)
+        if width and height:
+            # PIL rounds each scanline's edge crossings after adding the edge's
+            # x coordinate, so shifting x can move an edge pixel. Only y is
+            # shifted; the canvas spans x from 0 to keep the full-image pixels.
+            canvas = Image.new('L', (right, height), 0)
+            draw = ImageDraw.Draw(canvas)
+            for part in self.parts:
+                draw.polygon([(x, y - top) for x, y in part.key], outline=1, fill=1)
+            mask = np.array(canvas)[:, left:] == 1
+        else:
+            mask = np.zeros((height, width), dtype=bool)
+        mask.setflags(write=False)
+        self._masks[size] = (box, mask)
+        return box, mask
+
+    def mask_in(self, box, size):
+        """Return the mask over any box of an image of the given size
+
+        Boxes inside the bounding box get a read-only view of the cached mask;
+        others get a copy padded with False.
+        """
+        (left, top, right, bottom), mask = self.mask(size)
+        box_left, box_top, box_right, box_bottom = box
+        if left <= box_left and top <= box_top and box_right <= right and box_bottom <= bottom:
+            return mask[box_top - top:box_bottom - top, box_left - left:box_right - left]
+
+        result = np.zeros((box_bottom - box_top, box_right - box_left), dtype=bool)
+        x0, y0 = max(left, box_left), max(top, box_top)
+        x1, y1 = min(right, box_right), min(bottom, box_bottom)
+        if x1 > x0 and y1 > y0:
+            result[y0 - box_top:y1 - box_top, x0 - box_left:x1 - box_left] = mask[y0 - top:y1 - top, x0 - left:x1 - left]
+        return result
+
+
+class MultiSelection(Selection):
+    """Several polygons selected together, with one mask for all of them
+
+    The combined mask covers the bounding box of every part and is
+    rasterized in a single pass, so an effect handles all the parts with one
+    crop of the image. As a sequence it holds the points of all parts, whose
+    bounds are the union's. Effects that depend on each polygon's own shape,
+    such as the blur falloff or centered text, iterate over parts instead.
+    """
+    def __init__(self, polygons):
+        self._parts = tuple(as_selection(polygon) for polygon in polygons)
+        if not self._parts:
+            raise ValueError("A MultiSelection needs at least one polygon")
+        self.key = tuple(part.key for part in self._parts)
+        self.points = tuple(point for part in self._parts for point in part.key)
+        self._masks = {}
+
+    @property
+    def parts(self):
+        return self._parts
+
+    def __repr__(self):
+        return f"MultiSelection({[list(part.key) for part in self._parts]})"
+
+
+def combine(polygons):
+    """Return one selection covering all polygons: a Selection for one, else a MultiSelection"""
+    polygons = [polygon for polygon in polygons if len(polygon)]
+    if len(polygons) == 1:
+        return as_selection(polygons[0])
+    return MultiSelection(polygons)
+
+
+def load_selections(path):
+    """Read polygons from a JSON file
+
+    The file holds a list, or a mapping with a 'selections' list, whose
+    entries are polygons ([[x, y], ...]) or rects ({"rect": [x, y, width, height]}).
+
+    Returns:
+        list: The polygons as lists of (x, y) tuples
+
+    Raises:
+        ValueError: If the file is not a valid selection list
+    """
+    with open(path, encoding='utf-8') as f:
+        data = json.load(f)
+    entries = data.get('selections') if isinstance(data, dict) else data
+    if not isinstance(entries, list):
+        raise ValueError("A selection file must hold a list of polygons or rects")
+
+    polygons = []
+    for index, entry in enumerate(entries, 1):
+        try:
+            if isinstance(entry, dict):
+                x, y, width, height = (int(value) for value in entry['rect'])
+                polygons.append([(x, y), (x + width, y), (x + width, y + height), (x, y + height)])
+            else:
+                polygons.append([(int(x), int(y)) for x, y in entry])
+        except (KeyError, TypeError, ValueError):
+            raise ValueError(f"Selection {index}: expected [[x, y], ...] or {{\"rect\": [x, y, width, height]}}")
+        if not polygons[-1]:
+            raise ValueError(f"Selection {index} is empty")
+    return polygons
+
+
+def save_selections(path, polygons):
+    """Write polygons to a JSON file readable by load_selections()"""
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump({'selections': [[list(point) for point in polygon] for polygon in polygons]}, f)
+
+
+def _segment_distance(point, start, end):
+    """Distance from point to the segment from start to end"""
+    dx, dy = end[0] - start[0], end[1] - start[1]
+    length = dx * dx + dy * dy
+    t = 0.0 if length == 0 else max(0.0, min(1.0, ((point[0] - start[0]) * dx + (point[1] - start[1]) * dy) / length))
+    return math.hypot(point[0] - start[0] - t * dx, point[1] - start[1] - t * dy)
+
+
+class PolylineSimplifier:
+    """Simplify a polyline point by point, as a lasso is drawn
+
+    A dropped point lies within tolerance of the segment that replaces it,
+    the criterion of Ramer-Douglas-Peucker, but decided as points arrive:
+    the last vertex follows the newest point until one of the points drawn
+    since the vertex before it would stray more than tolerance from that
+    chord, and then the previous point is kept as a vertex. Each point costs
+    one pass over the points since the last kept vertex.
+    """
+    def __init__(self, start, tolerance):
+        self.tolerance = tolerance
+        self.points = [start]  # Vertices so far; the last one follows the newest point
+        self._run = [start]  # Points drawn since the last kept vertex
+
+    def add(self, point):
+        """Add the newest point
+
+        Returns:
+            bool: True if it was appended as a new vertex, False if it
+            replaced the last vertex
+        """
+        run = self._run
+        run.append(point)
+        if len(self.points) > 1 and all(_segment_distance(p, run[0], point) <= self.tolerance for p in run[1:-1]):
+            self.points[-1] = point
+            return False
+        # Keep the previous point and start a new run from it
+        if len(run) > 2:
+            del run[:-2]
+        self.points.append(point)
+        return True
+
+
+class SelectionCache(LRUCache):
+    """Bounded LRU cache of Selection objects keyed by their points
+
+    Lets effects called with plain polygon lists, such as recipe steps applied
+    to a batch of images, reuse the masks rasterized for the same polygon.
+    """
+    def get(self, polygon):
+        """Return the Selection for polygon, creating it on a miss"""
+        return super().get(tuple((int(x), int(y)) for x, y in polygon))
+
+    def build(self, key):
+        return Selection(key)
+
+
+selection_cache = SelectionCache(Settings.Image.Selection.MASK_CACHE_SIZE)
+
+
+def as_selection(polygon):
+    """Return polygon itself if it is a Selection, else the cached Selection for its points"""
+    if isinstance(polygon, Selection):
+        return polygon
+    return selection_cache.get(polygon)
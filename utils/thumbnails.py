@@ -0,0 +1,90 @@
+import hashlib
+import os
+import tempfile
+
+from PIL import ImageOps
+
+from config.settings import Settings
+from utils.working_buffer import open_image
+
+
+def make_thumbnail(path, size):
+    """Decode path at reduced size and return an RGBA thumbnail at most size pixels on each side
+
+    Image.thumbnail() first asks the decoder for a draft, so JPEGs are
+    decoded at 1/2, 1/4 or 1/8 scale by the DCT instead of in full; other
+    formats are decoded once and reduced. The EXIF orientation is applied,
+    so photos show upright.
+    """
+    with open_image(path, Settings.Thumbnails.MAX_PIXELS) as image:
+        image.thumbnail((size, size))
+        image = ImageOps.exif_transpose(image)
+        return image.convert('RGBA')
+
+
+class ThumbnailCache:
+    """Thumbnails stored on disk, keyed by image path, mtime and file size
+
+    A changed file gets a new key, so stale thumbnails are never shown;
+    they simply stop being used. Entries are written through a temporary
+    file and renamed, so several threads or processes may fill the cache
+    at once.
+    """
+    def __init__(self, directory, size=None, image_format=None, quality=None):
+        """
+        Args:
+            directory: Where thumbnails are kept, created on first write
+            size: Longest thumbnail side, defaults to Settings.Thumbnails.SIZE
+        """
+        self.directory = directory
+        self.size = size or Settings.Thumbnails.SIZE
+        self.format = image_format or Settings.Thumbnails.FORMAT
+        self.quality = quality or Settings.Thumbnails.QUALITY
+
+    def key(self, path):
+        """Return the cache key of the image at path in its current state
+
+        Raises:
+            OSError: If the file cannot be read
+        """
+        path = os.path.abspath(path)
+        stat = os.stat(path)
+        identity = f"{path}|{stat.st_mtime_ns}|{stat.st_size}|{self.size}"
+        return hashlib.sha1(identity.encode('utf-8')).hexdigest()
+
+    def entry_path(self, path):
+        """Return the file the thumbnail of path is (or would be) stored in"""
+        key = self.key(path)
+        return os.path.join(self.directory, key[:2], f"{key}.{self.format.lower()}")
+
+    def cached(self, path):
+        """Return the stored thumbnail file of path, or None if there is none yet"""
+        try:
+            entry = self.entry_path(path)
+        except OSError:
+            return None
+        return entry if os.path.isfile(entry) else None
+
+    def ensure(self, path):
+        """Return the thumbnail file of path, generating and storing it on a miss
+
+        Raises:
+            OSError, ValueError: If the image cannot be decoded or the cache written
+        """
+        entry = self.entry_path(path)
+        if os.path.isfile(entry):
+            return entry
+        thumbnail = make_thumbnail(path, self.size)
+        os.makedirs(os.path.dirname(entry), exist_ok=True)
+        fd, temporary = tempfile.mkstemp(suffix='.tmp', dir=os.path.dirname(entry))
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                thumbnail.save(f, self.format, quality=self.quality)
+            os.replace(temporary, entry)
+        except BaseException:
+            os.remove(temporary)
+            raise
+        return entry
+
+
+thumbnail_cache = ThumbnailCache(Settings.Thumbnails.CACHE_DIR)
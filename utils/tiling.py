@@ -0,0 +1,153 @@
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from config.settings import Settings
+
+
+def tile_boxes(width, height, tile_size, align=1):
+    """Split a width x height area into (left, top, right, bottom) tiles, row by row
+
+    Tile sides are tile_size rounded down to a multiple of align (and at least
+    align), so tiles never cut through a block anchored at the area's origin.
+    align is one side or an (x, y) pair for rectangular blocks.
+    """
+    align_x, align_y = align if isinstance(align, (tuple, list)) else (align, align)
+    step_x = max(align_x, tile_size // align_x * align_x)
+    step_y = max(align_y, tile_size // align_y * align_y)
+    return [(left, top, min(left + step_x, width), min(top + step_y, height))
+            for top in range(0, height, step_y)
+            for left in range(0, width, step_x)]
+
+
+class TileScheduler:
+    """Run a function over tiles on a shared thread pool
+
+    NumPy and OpenCV release the GIL inside their kernels, so threads spread
+    an effect over the CPU cores. How an area is cut into tiles depends only
+    on tile_size, never on the number of workers, so any worker count gives
+    bit-identical results; with one worker the tiles run inline.
+
+    With a peak_bytes cap the scheduler is in low-memory mode: effects cut
+    their area into full-width strips small enough to stay under the cap
+    (see strips()) and use leaner, float32 arithmetic.
+    """
+    def __init__(self, tile_size, workers=None, peak_bytes=None):
+        self.tile_size = tile_size
+        self.workers = workers or os.cpu_count() or 1
+        self.peak_bytes = peak_bytes
+        self._executor = None
+        self._lock = threading.Lock()
+
+    @property
+    def low_memory(self):
+        return self.peak_bytes is not None
+
+    def set_workers(self, workers):
+        """Change the worker count (None for one per CPU core) for later runs"""
+        with self._lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait=False)
+                self._executor = None
+            self.workers = workers or os.cpu_count() or 1
+
+    def set_peak_bytes(self, peak_bytes):
+        """Cap the working memory of later runs, or None for no cap and no low-memory mode"""
+        self.peak_bytes = peak_bytes
+
+    def tiles(self, width, height, align=1):
+        return tile_boxes(width, height, self.tile_size, align)
+
+    def strips(self, width, height, strip_cost, tile_cost, align=1, fixed_bytes=0):
+        """Split a width x height area into full-width (top, bottom) row ranges
+
+        Without a cap the whole area is one strip. With one, each strip is as
+        tall as the cap allows, in whole multiples of the row alignment: a
+        strip holds strip_cost bytes per pixel while it is processed, each
+        of its tiles in flight (one per worker) tile_cost more per pixel, and
+        fixed_bytes are held throughout. When even the thinnest strip
+        exceeds the cap, strips are one alignment step tall.
+
+        Args:
+            align: One side or an (x, y) pair, as for tiles()
+        """
+        if self.peak_bytes is None or height <= 0:
+            return [(0, height)]
+        align_y = align[1] if isinstance(align, (tuple, list)) else align
+
+        def peak(rows):
+            areas = sorted(((right - left) * (bottom - top) for left, top, right, bottom
+                            in self.tiles(width, rows, align)), reverse=True)
+            return fixed_bytes + width * rows * strip_cost + sum(areas[:self.workers]) * tile_cost
+
+        # Largest number of alignment steps whose strip fits, by bisection
+        low, high = 1, -(-height // align_y)
+        while low < high:
+            steps = (low + high + 1) // 2
+            if peak(min(height, steps * align_y)) <= self.peak_bytes:
+                low = steps
+            else:
+                high = steps - 1
+        rows = min(height, low * align_y)
+        return [(top, min(top + rows, height)) for top in range(0, height, rows)]
+
+    def run(self, function, tiles, progress=None):
+        """Call function(tile) for every tile and return the results in tile order
+
+        The function must only write where no other tile reads. An exception
+        raised by a tile is re-raised here.
+
+        Args:
+            progress: Callable taking (tiles_done, total_tiles), called on the
+                calling thread as tiles finish. An exception it raises, such
+                as a cancelled job's, stops the run: tiles not yet started
+                are dropped and the exception is re-raised.
+        """
+        if self.workers <= 1 or len(tiles) <= 1:
+            results = []
+            for tile in tiles:
+                results.append(function(tile))
+                if progress:
+                    progress(len(results), len(tiles))
+            return results
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(self.workers, thread_name_prefix='tile')
+            executor = self._executor
+        futures = [executor.submit(function, tile) for tile in tiles]
+        results = []
+        try:
+            for future in futures:
+                results.append(future.result())
+                if progress:
+                    progress(len(results), len(tiles))
+        except BaseException:
+            for future in futures:
+                future.cancel()
+            raise
+        return results
+
+
+def part_progress(progress, index, count):
+    """Return a (done, total) progress callback for part index of count equal parts
+
+    What the part reports is passed on to progress as the matching share of
+    the whole, so nested loops (steps, strips, tiles) report one steady
+    progress. Returns None when progress is None.
+    """
+    if progress is None:
+        return None
+    return lambda done, total: progress(index * total + done, count * total)
+
+
+tile_scheduler = TileScheduler(Settings.Parallel.TILE_SIZE, Settings.Parallel.WORKERS, Settings.Parallel.PEAK_BYTES)
+
+
+def set_tile_workers(workers):
+    """Set the number of threads effects use, e.g. 1 in batch worker processes"""
+    tile_scheduler.set_workers(workers)
+
+
+def set_low_memory(peak_bytes):
+    """Cap the working memory of each mosaic or blur (None turns low-memory mode off)"""
+    tile_scheduler.set_peak_bytes(peak_bytes)
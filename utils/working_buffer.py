@@ -0,0 +1,293 @@
+import math
+import os
+import struct
+import tempfile
+import weakref
+
+import numpy as np
+from PIL import Image, UnidentifiedImageError
+
+from config.settings import Settings
+from utils.qimage_bridge import array_to_pil_image
+from utils.image_saving import save_image_array
+
+
+def _open_unchecked(path):
+    """Identify an image file like Image.open(), skipping PIL's decompression bomb check
+
+    PIL's limit is one module-wide value, Image.MAX_IMAGE_PIXELS, that cannot
+    be lifted for a single huge image without lifting it for every thread
+    and script at once. The format plugins are tried directly instead, in
+    the order Image.open() tries them.
+    """
+    Image.init()
+    with open(path, 'rb') as f:
+        prefix = f.read(16)
+    for format_id in Image.ID:
+        factory, accept = Image.OPEN[format_id]
+        accepted = not accept or accept(prefix)
+        if not accepted or isinstance(accepted, str):
+            continue
+        try:
+            return factory(path, path)
+        except (SyntaxError, IndexError, TypeError, struct.error):
+            continue
+    raise UnidentifiedImageError(f"cannot identify image file {path!r}")
+
+
+def open_image(path, max_pixels=None):
+    """Open an image file like Image.open(), without decoding its pixels
+
+    The size limit is checked here instead of by PIL, so images beyond PIL's
+    decompression bomb limit open without changing it for the process.
+
+    Args:
+        max_pixels: Largest width * height accepted, defaults to
+            Settings.Image.WorkingBuffer.MAX_PIXELS
+
+    Raises:
+        OSError: If the file cannot be read or is not an image
+        ValueError: If the image has more than max_pixels pixels
+    """
+    max_pixels = Settings.Image.WorkingBuffer.MAX_PIXELS if max_pixels is None else max_pixels
+    image = _open_unchecked(path)
+    if max_pixels is not None and image.width * image.height > max_pixels:
+        image.close()
+        raise ValueError(f"{path} is {image.width}x{image.height}, larger than the limit "
+                         f"of {max_pixels} pixels")
+    return image
+
+
+def image_pixel_count(path):
+    """Return width * height of an image file without decoding its pixels
+
+    Raises:
+        OSError, ValueError: See open_image()
+    """
+    with open_image(path) as image:
+        return image.width * image.height
+
+
+def _raw_tiles(image):
+    """Return the tiles of an unloaded image stored as raw rows, or None
+
+    Uncompressed BMP, PPM and TIFF files, striped or tiled, keep their
+    pixels as raw rows at known offsets, so any band of rows can be read
+    straight from the file. Other formats (PNG, JPEG, compressed TIFF,
+    palette images) cannot be decoded in parts and give None.
+
+    Returns:
+        list: ((left, top, right, bottom), offset, rawmode, stride, ystep) per tile
+    """
+    if not image.tile or image.mode == 'P' or not image.filename:
+        return None
+    tiles = []
+    for codec, extents, offset, args in image.tile:
+        if codec != 'raw':
+            return None
+        left, top, right, bottom = extents
+        rawmode, stride, ystep = (args, 0, 1) if isinstance(args, str) else (tuple(args) + (0, 1))[:3]
+        try:
+            stride = stride or len(Image.new(image.mode, (right - left, 1)).tobytes('raw', rawmode))
+        except (ValueError, OSError):
+            return None  # No packer to measure the row size by
+        tiles.append(((left, top, right, bottom), offset, rawmode, stride, ystep))
+    # Planar TIFFs store each band as its own layer of tiles over the same area
+    if len({tile[0] for tile in tiles}) != len(tiles):
+        return None
+    return tiles
+
+
+def _raw_band(image, tiles, top, bottom):
+    """Read rows top to bottom of an image from its raw tiles, see _raw_tiles()"""
+    band = Image.new(image.mode, (image.width, bottom - top))
+    with open(image.filename, 'rb') as f:
+        for (left, tile_top, right, tile_bottom), offset, rawmode, stride, ystep in tiles:
+            first, last = max(top, tile_top), min(bottom, tile_bottom)
+            if first >= last:
+                continue
+            # Bottom-up tiles store their last row first
+            row = first - tile_top if ystep > 0 else tile_bottom - last
+            f.seek(offset + row * stride)
+            data = f.read((last - first) * stride)
+            part = Image.frombytes(image.mode, (right - left, last - first), data, 'raw', (rawmode, stride, ystep))
+            band.paste(part, (left, first - top))
+    band.info = image.info
+    return band
+
+
+def _load_whole(image, path, max_bytes):
+    """Decode an image that cannot be read in strips, unless it needs more than max_bytes
+
+    Raises:
+        ValueError: If the decoded image would not fit in max_bytes
+    """
+    needed = image.width * image.height * (1 if image.mode in ('1', 'L', 'P') else 4)
+    if max_bytes is not None and needed > max_bytes:
+        raise ValueError(f"{path} is a {image.format} image that can only be decoded whole, which needs "
+                         f"{needed // 2**20} MB, more than the limit of {max_bytes // 2**20} MB. "
+                         f"Save it as an uncompressed TIFF, BMP or PPM to open it strip by strip.")
+    try:
+        image.load()
+    except Image.DecompressionBombError as e:
+        # PIL still checks the whole size when it decodes a TIFF
+        raise ValueError(f"{path}: {e}") from e
+
+
+class WorkingBuffer:
+    """RGBA image held in a numpy.memmap scratch file instead of in RAM
+
+    The pixels live in an (H, W, 4) uint8 memmap, so the OS pages in only the
+    parts an operation reads or writes. The effects in utils.image_utils crop
+    to the selection's bounding box (plus the blur halo) before doing any work,
+    so running them on array_to_pil_image(buffer.array) touches just those
+    rows and columns of the file.
+
+    A block-averaged overview, at most overview_side pixels on its longest
+    side, is kept in RAM for display and refreshed only where the image
+    changes.
+    """
+    def __init__(self, width, height, scratch_dir=None, overview_side=4096, strip_bytes=64 * 1024 * 1024):
+        """
+        Args:
+            scratch_dir: Directory for the scratch file, defaults to the system temp dir
+            overview_side: Longest side of the display overview in pixels
+            strip_bytes: Largest amount of pixels copied through RAM at once
+        """
+        self.width = width
+        self.height = height
+        self.has_alpha = True  # Whether the source image had transparency
+        self.strip_rows = max(1, strip_bytes // (width * 4))
+        fd, self.path = tempfile.mkstemp(suffix='.rgba', dir=scratch_dir)
+        os.close(fd)
+        # Delete the scratch file even if close() is never called
+        self._remove = weakref.finalize(self, os.remove, self.path)
+        self.array = np.memmap(self.path, dtype=np.uint8, mode='w+', shape=(height, width, 4))
+        self.factor = max(1, math.ceil(max(width, height) / overview_side))
+        self.overview = np.zeros((math.ceil(height / self.factor), math.ceil(width / self.factor), 4), np.uint8)
+
+    @classmethod
+    def from_file(cls, path, scratch_dir=None, overview_side=4096, strip_bytes=64 * 1024 * 1024,
+                  max_decode_bytes=None):
+        """Decode an image file into a new working buffer
+
+        Uncompressed files are read and converted to RGBA one strip at a
+        time, so the image never has to fit in RAM. Formats that can only be
+        decoded whole are decoded once in their own mode, then converted one
+        strip at a time, so no full-size RGBA copy is made in RAM; they are
+        refused if that decode needs more than max_decode_bytes.
+
+        Args:
+            max_decode_bytes: Defaults to Settings.Image.WorkingBuffer.MAX_DECODE_BYTES
+
+        Raises:
+            OSError, ValueError: See open_image() and _load_whole()
+        """
+        if max_decode_bytes is None:
+            max_decode_bytes = Settings.Image.WorkingBuffer.MAX_DECODE_BYTES
+        with open_image(path) as image:
+            tiles = _raw_tiles(image)
+            if tiles is None:
+                _load_whole(image, path, max_decode_bytes)
+            buffer = cls(image.width, image.height, scratch_dir, overview_side, strip_bytes)
+            buffer.has_alpha = 'A' in image.mode or 'transparency' in image.info
+            for top in range(0, image.height, buffer.strip_rows):
+                bottom = min(image.height, top + buffer.strip_rows)
+                if tiles is not None:
+                    strip = _raw_band(image, tiles, top, bottom)
+                else:
+                    strip = image.crop((0, top, image.width, bottom))
+                buffer.array[top:bottom] = np.asarray(strip.convert('RGBA'))
+        buffer.refresh_overview()
+        return buffer
+
+    @property
+    def size(self):
+        return self.width, self.height
+
+    def close(self):
+        """Release the memmap and delete the scratch file"""
+        self.array = None
+        self._remove()
+
+    def snapshot(self):
+        """Return a copy-on-write view of the buffer for an effect to edit
+
+        Writes go to private pages in RAM, allocated only for the pages that
+        are written, and never reach the scratch file; copy the changed area
+        back with write() to keep it.
+        """
+        return np.memmap(self.path, dtype=np.uint8, mode='c', shape=(self.height, self.width, 4))
+
+    def read(self, rect):
+        """Return a copy of the pixels in the (x, y, width, height) rect"""
+        x, y, width, height = rect
+        return np.array(self.array[y:y + height, x:x + width])
+
+    def write(self, rect, pixels):
+        """Write pixels into the (x, y, width, height) rect and refresh the overview"""
+        x, y, width, height = rect
+        self.array[y:y + height, x:x + width] = pixels
+        self.refresh_overview(rect)
+
+    def read_scaled(self, box, size):
+        """Return the (left, top, right, bottom) box resampled to size as a new array
+
+        Rows and columns are skipped before resampling, so only about as many
+        pixels as the result needs are paged in.
+        """
+        left, top, right, bottom = box
+        step = max(1, min((right - left) // size[0], (bottom - top) // size[1]))
+        region = np.ascontiguousarray(self.array[top:bottom:step, left:right:step])
+        pil_image = array_to_pil_image(region).resize(size, Image.BILINEAR)
+        return np.array(pil_image)
+
+    def changed_rect(self, snapshot, rect=None):
+        """Return the (x, y, width, height) box where snapshot differs, or None
+
+        Args:
+            rect: (x, y, width, height) known to contain every change, if any
+        """
+        x, y, width, height = rect if rect is not None else (0, 0, self.width, self.height)
+        rows, cols = [], np.zeros(width, bool)
+        for top in range(y, y + height, self.strip_rows):
+            bottom = min(y + height, top + self.strip_rows)
+            changed = np.any(self.array[top:bottom, x:x + width] != snapshot[top:bottom, x:x + width], axis=-1)
+            rows.extend(top + np.flatnonzero(changed.any(axis=1)))
+            cols |= changed.any(axis=0)
+        if not rows:
+            return None
+        cols = np.flatnonzero(cols)
+        return (x + int(cols[0]), int(rows[0]), int(cols[-1] - cols[0] + 1), int(rows[-1] - rows[0] + 1))
+
+    def save(self, path, options=None):
+        """Encode the buffer to path, see utils.image_saving.save_image_array"""
+        return save_image_array(self.array, path, options, self.has_alpha)
+
+    def overview_rect(self, rect):
+        """Map an (x, y, width, height) image rect to the overview pixels it touches"""
+        x, y, width, height = rect
+        left, top = x // self.factor, y // self.factor
+        right = -(-(x + width) // self.factor)
+        bottom = -(-(y + height) // self.factor)
+        return left, top, right - left, bottom - top
+
+    def refresh_overview(self, rect=None):
+        """Recompute the overview pixels covering rect, or all of them
+
+        Each overview pixel is the mean of a factor x factor block of the image;
+        the image is read one strip of whole blocks at a time.
+        """
+        f = self.factor
+        left, top, width, height = self.overview_rect(rect or (0, 0, self.width, self.height))
+        strip = max(1, self.strip_rows // f)
+        for row in range(top, top + height, strip):
+            rows = min(top + height, row + strip) - row
+            block = self.array[row * f:(row + rows) * f, left * f:(left + width) * f]
+            # Pad partial blocks at the right and bottom edges by repeating the last pixel
+            pad_y = rows * f - block.shape[0]
+            pad_x = width * f - block.shape[1]
+            if pad_y or pad_x:
+                block = np.pad(block, ((0, pad_y), (0, pad_x), (0, 0)), mode='edge')
+            sums = block.reshape(rows, f, width, f, 4).sum(axis=(1, 3), dtype=np.uint32)
+            self.overview[row:row + rows, left:left + width] = (sums + f * f // 2) // (f * f)